@@ -152,11 +152,13 @@ class ProductionCollectionManager:
             
         self.logger.info(f"Processing and storing {len(papers)} papers...")
         
+        # Look up already-stored papers in one batched query
+        existing_papers = self.paper_repo.get_many_by_id([paper.id for paper in papers])
+        
         for paper in papers:
             try:
                 # Check if paper already exists
-                existing = self.paper_repo.get_by_id(paper.id)
-                if existing:
+                if paper.id in existing_papers:
                     self.logger.debug(f"Paper {paper.id} already exists, skipping")
                     continue
                 
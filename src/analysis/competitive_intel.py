@@ -462,8 +462,7 @@ class CompetitiveIntelligence:
                     LIMIT 500
                 """, params)
                 
-                for row in cursor.fetchall():
-                    papers.append(paper_repo._row_to_paper(row))
+                papers.extend(paper_repo._rows_to_papers(cursor))
         
         return papers
     
@@ -1,10 +1,8 @@
 """Similarity search engine for semantic paper matching."""
 
 import numpy as np
-import sqlite3
 from typing import List, Dict, Optional, Tuple, Any
 from datetime import datetime
-from sklearn.metrics.pairwise import cosine_similarity
 
 from core.database import db_manager
 from core.models import Paper, SearchQuery, SearchResult, Embedding
@@ -37,25 +35,24 @@ class SimilarityEngine:
                 return []
             
             # Get all embeddings (with caching)
-            all_embeddings = self._get_all_embeddings()
-            if not all_embeddings:
+            paper_ids, embedding_matrix = self._get_embedding_matrix()
+            if not paper_ids:
                 return []
             
             # Calculate similarities
-            query_vector = np.array(query_embedding.embedding).reshape(1, -1)
-            embedding_matrix = np.array([emb["vector"] for emb in all_embeddings])
+            similarities = self._cosine_similarities(query_embedding.embedding, embedding_matrix)
             
-            similarities = cosine_similarity(query_vector, embedding_matrix)[0]
-            
-            # Filter and sort results
-            results = []
-            for i, (similarity, embedding_data) in enumerate(zip(similarities, all_embeddings)):
-                if (similarity >= threshold and 
-                    embedding_data["paper_id"] != paper_id):
-                    
-                    paper = paper_repo.get_by_id(embedding_data["paper_id"])
-                    if paper:
-                        results.append((paper, float(similarity)))
+            # Filter matches, then fetch their papers in one batch
+            matches = [
+                (paper_ids[i], float(similarities[i]))
+                for i in np.flatnonzero(similarities >= threshold)
+                if paper_ids[i] != paper_id
+            ]
+            papers = paper_repo.get_many_by_id([match_id for match_id, _ in matches])
+            results = [
+                (papers[match_id], similarity)
+                for match_id, similarity in matches if match_id in papers
+            ]
             
             # Sort by similarity score (descending)
             results.sort(key=lambda x: x[1], reverse=True)
@@ -76,23 +73,23 @@ class SimilarityEngine:
         with PerformanceLogger(self.logger, "semantic_search", limit=limit):
             
             # Get all embeddings
-            all_embeddings = self._get_all_embeddings()
-            if not all_embeddings:
+            paper_ids, embedding_matrix = self._get_embedding_matrix()
+            if not paper_ids:
                 return []
             
             # Calculate similarities
-            query_vector_np = np.array(query_vector).reshape(1, -1)
-            embedding_matrix = np.array([emb["vector"] for emb in all_embeddings])
-            
-            similarities = cosine_similarity(query_vector_np, embedding_matrix)[0]
+            similarities = self._cosine_similarities(query_vector, embedding_matrix)
             
-            # Filter and collect results
-            results = []
-            for similarity, embedding_data in zip(similarities, all_embeddings):
-                if similarity >= threshold:
-                    paper = paper_repo.get_by_id(embedding_data["paper_id"])
-                    if paper:
-                        results.append((paper, float(similarity)))
+            # Filter matches, then fetch their papers in one batch
+            matches = [
+                (paper_ids[i], float(similarities[i]))
+                for i in np.flatnonzero(similarities >= threshold)
+            ]
+            papers = paper_repo.get_many_by_id([match_id for match_id, _ in matches])
+            results = [
+                (papers[match_id], similarity)
+                for match_id, similarity in matches if match_id in papers
+            ]
             
             # Sort by similarity score (descending)
             results.sort(key=lambda x: x[1], reverse=True)
@@ -129,9 +126,13 @@ class SimilarityEngine:
             
             return stats
     
-    def _get_all_embeddings(self) -> List[Dict[str, Any]]:
-        """Get all embeddings with caching."""
-        cache_key = "all_embeddings"
+    def _get_embedding_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """Get all embeddings as an L2-normalized matrix, with caching.
+        
+        Rows are normalized once per load, so each query's cosine
+        similarities reduce to one matrix-vector product.
+        """
+        cache_key = "embedding_matrix"
         
         if cache_key in self._embedding_cache:
             cached_data, timestamp = self._embedding_cache[cache_key]
@@ -140,25 +141,13 @@ class SimilarityEngine:
                 return cached_data
         
         # Fetch from database
-        embeddings = []
-        with db_manager.get_sqlite_connection() as conn:
-            conn.row_factory = sqlite3.Row
-            results = conn.execute("""
-                SELECT paper_id, embedding, model_version 
-                FROM embeddings
-            """).fetchall()
-            
-            for row in results:
-                # Deserialize embedding
-                embedding_array = np.frombuffer(row["embedding"], dtype=np.float32)
-                embeddings.append({
-                    "paper_id": row["paper_id"],
-                    "vector": embedding_array,
-                    "model_version": row["model_version"]
-                })
+        paper_ids, matrix = embedding_repo.get_all_vectors()
+        if paper_ids:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.maximum(norms, 1e-12)
         
         # Update cache
-        self._embedding_cache[cache_key] = (embeddings, datetime.utcnow())
+        self._embedding_cache[cache_key] = ((paper_ids, matrix), datetime.utcnow())
         
         # Manage cache size
         if len(self._embedding_cache) > self._cache_size_limit:
@@ -167,8 +156,14 @@ class SimilarityEngine:
                            key=lambda k: self._embedding_cache[k][1])
             del self._embedding_cache[oldest_key]
         
-        self.logger.debug("Embeddings loaded", count=len(embeddings))
-        return embeddings
+        self.logger.debug("Embeddings loaded", count=len(paper_ids))
+        return paper_ids, matrix
+    
+    @staticmethod
+    def _cosine_similarities(query_vector: Any, embedding_matrix: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a query against pre-normalized matrix rows."""
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        return embedding_matrix @ (query / max(np.linalg.norm(query), 1e-12))
     
     def clear_cache(self) -> None:
         """Clear the embedding cache."""
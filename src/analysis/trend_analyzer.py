@@ -207,11 +207,7 @@ class TrendAnalyzer:
                 ORDER BY publication_date DESC
             """, (cutoff_date,))
             
-            papers = []
-            for row in cursor.fetchall():
-                papers.append(paper_repo._row_to_paper(row))
-            
-            return papers
+            return paper_repo._rows_to_papers(cursor)
     
     def _group_papers_by_time(
         self, 
@@ -44,6 +44,7 @@ class AppSettings(BaseSettings):
     pdf_storage_path: str = Field(default="cache/pdfs", validation_alias="PDF_STORAGE_PATH")
     embedding_cache_path: str = Field(default="cache/embeddings", validation_alias="EMBEDDING_CACHE_PATH")
     model_cache_path: str = Field(default="models", validation_alias="MODEL_CACHE_PATH")
+    entity_lexicon_path: Optional[str] = Field(default=None, validation_alias="ENTITY_LEXICON_PATH")  # term<TAB>label per line
     
     # Logging
     log_level: str = Field(default="INFO", validation_alias="LOG_LEVEL")
@@ -4,10 +4,11 @@ import sqlite3
 import duckdb
 import asyncio
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Tuple, Callable
 from contextlib import asynccontextmanager, contextmanager
 import threading
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from core.config import config
 from core.logging import get_logger
@@ -164,6 +165,15 @@ class DatabaseManager:
         else:
             raise ValueError(f"Unknown database: {database}")
     
+    async def run_async(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking database call on the executor.
+        
+        Each executor thread keeps its own thread-local connection, so the
+        workers act as a small connection pool reused across calls.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
     def _execute_sqlite(self, query: str, params: Tuple = ()) -> List[Dict[str, Any]]:
         """Execute SQLite query synchronously."""
         with self.get_sqlite_connection() as conn:
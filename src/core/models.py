@@ -2,8 +2,10 @@
 
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from pydantic import BaseModel, Field, field_validator, ConfigDict
+from functools import cached_property
+from pydantic import BaseModel, Field, field_validator, ConfigDict, PrivateAttr
 from enum import Enum
+import numpy as np
 
 
 class PaperType(str, Enum):
@@ -80,6 +82,77 @@ class Paper(BaseModel):
         return [author.strip() for author in v if author.strip()]
     
     model_config = ConfigDict(use_enum_values=True)
+    
+    @classmethod
+    def from_database(cls, values: Dict[str, Any]) -> 'Paper':
+        """Build from stored field values without running validation.
+        
+        Rows were validated when written, so this installs the values as the
+        instance __dict__ directly, which is much cheaper than validating or
+        model_construct. Values must already hold parsed dates and authors.
+        """
+        paper = cls.__new__(cls)
+        object.__setattr__(paper, '__dict__', values)
+        object.__setattr__(paper, '__pydantic_fields_set__', set(values))
+        object.__setattr__(paper, '__pydantic_extra__', None)
+        object.__setattr__(paper, '__pydantic_private__',
+                           {} if cls.__private_attributes__ else None)
+        return paper
+    
+    # Lowercased text fields, computed on first access and kept for the
+    # instance's lifetime; later assignments to the fields are not reflected.
+    @cached_property
+    def title_lc(self) -> str:
+        return (self.title or '').lower()
+    
+    @cached_property
+    def abstract_lc(self) -> str:
+        return (self.abstract or '').lower()
+    
+    @cached_property
+    def journal_lc(self) -> str:
+        return (self.journal or '').lower()
+
+
+class LazyPaper(Paper):
+    """Paper whose timestamp fields stay ISO strings until first accessed.
+    
+    Built by the repository for display-only result sets, where most
+    callers never touch the dates. Serialization parses any remaining ones.
+    """
+    
+    _raw_dates: Dict[str, Optional[str]] = PrivateAttr(default_factory=dict)
+    
+    @classmethod
+    def from_raw(cls, raw_dates: Dict[str, Optional[str]],
+                 values: Dict[str, Any]) -> 'LazyPaper':
+        """Build from already-validated database values without parsing dates."""
+        paper = cls.from_database(values)
+        paper.__pydantic_fields_set__.update(raw_dates)
+        paper._raw_dates = raw_dates
+        return paper
+    
+    def __getattr__(self, name: str) -> Any:
+        private = object.__getattribute__(self, '__pydantic_private__')
+        raw_dates = private.get('_raw_dates') if private else None
+        if raw_dates and name in raw_dates:
+            raw = raw_dates.pop(name)
+            value = datetime.fromisoformat(raw) if raw else None
+            self.__dict__[name] = value
+            return value
+        return super().__getattr__(name)
+    
+    def _parse_pending_dates(self) -> None:
+        for name in list(self._raw_dates):
+            getattr(self, name)
+    
+    def model_dump(self, **kwargs: Any) -> Dict[str, Any]:
+        self._parse_pending_dates()
+        return super().model_dump(**kwargs)
+    
+    def model_dump_json(self, **kwargs: Any) -> str:
+        self._parse_pending_dates()
+        return super().model_dump_json(**kwargs)
 
 
 class Author(BaseModel):
@@ -124,16 +197,18 @@ class Embedding(BaseModel):
     """Paper embedding data model."""
     
     paper_id: str = Field(..., description="Associated paper ID")
-    embedding: List[float] = Field(..., description="Embedding vector")
+    embedding: np.ndarray = Field(..., description="Embedding vector (float32)")
     model_version: str = Field(..., description="Model version used")
     created_at: datetime = Field(default_factory=datetime.utcnow, description="Creation timestamp")
     
-    model_config = ConfigDict(protected_namespaces=())
+    model_config = ConfigDict(protected_namespaces=(), arbitrary_types_allowed=True)
     
-    @field_validator('embedding')
+    @field_validator('embedding', mode='before')
     @classmethod
     def validate_embedding(cls, v):
-        if not v:
+        # Lists are still accepted; everything is held as a flat float32 array
+        v = np.asarray(v, dtype=np.float32).reshape(-1)
+        if v.size == 0:
             raise ValueError('Embedding cannot be empty')
         return v
 
@@ -2,45 +2,201 @@
 
 import json
 import sqlite3
-from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
+from datetime import datetime, timedelta
 
+import numpy as np
+
+from core.config import config
 from core.database import db_manager
-from core.models import Paper, Author, Entity, Embedding, Trend, Alert
+from core.schema import PAPERS_FTS_INSERT_TRIGGER
+from core.models import Paper, LazyPaper, Author, Entity, Embedding, Trend, Alert
 from core.logging import get_logger, PerformanceLogger
 
 
+# Keep IN-list queries well under SQLite's bound-parameter limit
+IN_CLAUSE_CHUNK_SIZE = 500
+
+# INSERT ... RETURNING is available from SQLite 3.35
+SQLITE_SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Above this many papers, aggregate statistics are computed in DuckDB
+ANALYTICS_ROW_THRESHOLD = 100_000
+
+# Keyset pagination cursor: (sort key, rowid) of the last row on a page
+PageCursor = Tuple[Any, int]
+
+# Bound once; row conversion calls it up to three times per paper
+_iso = datetime.fromisoformat
+
+PAPER_COLUMNS = (
+    "id", "title", "abstract", "authors", "journal", "publication_date",
+    "doi", "arxiv_id", "pubmed_id", "pdf_url", "local_pdf_path", "full_text",
+    "paper_type", "source", "relevance_score", "processing_status",
+    "created_at", "updated_at"
+)
+
+# Paper columns bulk_update may set: stored as-is, no serialization
+BULK_UPDATE_COLUMNS = frozenset({
+    "title", "abstract", "journal", "doi", "arxiv_id", "pubmed_id", "pdf_url",
+    "local_pdf_path", "full_text", "relevance_score", "processing_status"
+})
+
+ENTITY_COLUMNS = (
+    "id", "paper_id", "entity_text", "entity_type", "confidence",
+    "start_position", "end_position", "context"
+)
+
+
+# Name-keyed getters for single sqlite3.Row conversions
+_paper_values_by_name = itemgetter(*PAPER_COLUMNS)
+_entity_values_by_name = itemgetter(*ENTITY_COLUMNS)
+
+
+def _positional_getter(cursor: sqlite3.Cursor, columns: Tuple[str, ...]) -> itemgetter:
+    """Build a getter pulling the named columns out of a row by position.
+    
+    Column positions are resolved once per result set; when a name appears
+    more than once (e.g. joins) the first occurrence wins, matching sqlite3.Row.
+    """
+    positions = {}
+    for index, description in enumerate(cursor.description):
+        positions.setdefault(description[0], index)
+    return itemgetter(*(positions[column] for column in columns))
+
+
+# Embeddings are stored as int8 with a float32 per-vector scale prefix.
+# Rows written in this format carry this suffix on their model_version.
+INT8_VERSION_SUFFIX = "+int8"
+
+
+def quantize_embedding(vector: np.ndarray) -> bytes:
+    """Serialize an embedding as scale (float32) + int8 values."""
+    vector = np.asarray(vector, dtype=np.float32)
+    scale = np.float32(np.abs(vector).max()) if vector.size else np.float32(0.0)
+    if scale == 0:
+        quantized = np.zeros(vector.shape, dtype=np.int8)
+    else:
+        quantized = np.clip(np.round(vector / scale * 127), -127, 127).astype(np.int8)
+    return scale.tobytes() + quantized.tobytes()
+
+
+# Section embeddings are stored together as one float16 BLOB; sections_meta
+# maps each section to its element offset, vector count and dimension.
+SECTIONS_DTYPE = np.float16
+
+
+def pack_sections(sections: Dict[str, Any]) -> Tuple[bytes, str]:
+    """Serialize section embeddings as one float16 BLOB plus its JSON layout."""
+    meta = {}
+    blocks = []
+    offset = 0
+    for name, vectors in sections.items():
+        block = np.asarray(vectors, dtype=SECTIONS_DTYPE)
+        block = block.reshape(-1, block.shape[-1])
+        meta[name] = {"offset": offset, "count": block.shape[0], "dim": block.shape[1]}
+        blocks.append(block.ravel())
+        offset += block.size
+    
+    blob = np.concatenate(blocks).tobytes() if blocks else b""
+    return blob, json.dumps(meta)
+
+
+def unpack_sections(blob: bytes, meta: str) -> Dict[str, np.ndarray]:
+    """Decode a sections BLOB into read-only float16 (count, dim) views."""
+    values = np.frombuffer(blob, dtype=SECTIONS_DTYPE)
+    return {
+        name: values[layout["offset"]:layout["offset"] + layout["count"] * layout["dim"]]
+              .reshape(layout["count"], layout["dim"])
+        for name, layout in json.loads(meta).items()
+    }
+
+
+def decode_embedding(blob: bytes, model_version: str) -> Tuple[np.ndarray, str]:
+    """Decode a stored embedding BLOB into (float32 vector, model_version)."""
+    if model_version.endswith(INT8_VERSION_SUFFIX):
+        scale = np.frombuffer(blob, dtype=np.float32, count=1)[0]
+        quantized = np.frombuffer(blob, dtype=np.int8, offset=4)
+        # One pass, one allocation: cast and scale straight into the result
+        vector = np.multiply(quantized, scale / np.float32(127.0), dtype=np.float32)
+        return vector, model_version[:-len(INT8_VERSION_SUFFIX)]
+    
+    # Legacy rows hold raw float32
+    return np.frombuffer(blob, dtype=np.float32), model_version
+
+
 class PaperRepository:
     """Repository for paper data access."""
     
     def __init__(self):
         self.logger = get_logger("paper_repository")
     
+    _INSERT_SQL = """
+        INSERT INTO papers (
+            id, title, abstract, authors, journal, publication_date,
+            doi, arxiv_id, pubmed_id, pdf_url, local_pdf_path, full_text,
+            paper_type, source, relevance_score, processing_status
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
     def create(self, paper: Paper) -> str:
         """Create a new paper record."""
         with PerformanceLogger(self.logger, "create_paper"):
             with db_manager.get_sqlite_connection() as conn:
-                cursor = conn.execute("""
-                    INSERT INTO papers (
-                        id, title, abstract, authors, journal, publication_date,
-                        doi, arxiv_id, pubmed_id, pdf_url, local_pdf_path, full_text,
-                        paper_type, source, relevance_score, processing_status
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    paper.id, paper.title, paper.abstract, 
-                    json.dumps(paper.authors), paper.journal, paper.publication_date,
-                    paper.doi, paper.arxiv_id, paper.pubmed_id, paper.pdf_url,
-                    paper.local_pdf_path, paper.full_text, 
-                    paper.paper_type.value if hasattr(paper.paper_type, 'value') else paper.paper_type,
-                    paper.source.value if hasattr(paper.source, 'value') else paper.source, 
-                    paper.relevance_score, 
-                    paper.processing_status.value if hasattr(paper.processing_status, 'value') else paper.processing_status
-                ))
+                conn.execute(self._INSERT_SQL, self._paper_row(paper))
                 conn.commit()
                 
                 self.logger.info("Paper created", paper_id=paper.id)
                 return paper.id
     
+    def bulk_ingest(self, papers: List[Paper]) -> int:
+        """Insert many papers with full-text indexing deferred to one pass.
+        
+        The per-row FTS insert trigger is dropped for the load, the new rows are
+        indexed with a single INSERT ... SELECT, and the trigger is restored.
+        All of it runs in one transaction, so a failure rolls back the rows,
+        their FTS entries and the trigger drop together.
+        """
+        if not papers:
+            return 0
+        
+        with PerformanceLogger(self.logger, "bulk_ingest_papers", count=len(papers)):
+            with db_manager.get_sqlite_connection() as conn:
+                if conn.in_transaction:
+                    conn.commit()
+                conn.execute("BEGIN")
+                
+                last_rowid = conn.execute(
+                    "SELECT COALESCE(MAX(rowid), 0) FROM papers"
+                ).fetchone()[0]
+                
+                conn.execute("DROP TRIGGER IF EXISTS papers_fts_insert")
+                conn.executemany(self._INSERT_SQL, [self._paper_row(p) for p in papers])
+                conn.execute("""
+                    INSERT INTO papers_fts(rowid, title, abstract, full_text, authors)
+                    SELECT rowid, title, abstract, full_text, authors
+                    FROM papers WHERE rowid > ?
+                """, (last_rowid,))
+                conn.execute(PAPERS_FTS_INSERT_TRIGGER)
+                conn.commit()
+                
+                self.logger.info("Papers bulk ingested", count=len(papers))
+                return len(papers)
+    
+    @staticmethod
+    def _paper_row(paper: Paper) -> Tuple:
+        """Convert a paper to insert parameters."""
+        return (
+            paper.id, paper.title, paper.abstract, 
+            json.dumps(paper.authors), paper.journal, paper.publication_date,
+            paper.doi, paper.arxiv_id, paper.pubmed_id, paper.pdf_url,
+            paper.local_pdf_path, paper.full_text, 
+            paper.paper_type, paper.source,
+            paper.relevance_score, paper.processing_status
+        )
+    
     def get_by_id(self, paper_id: str) -> Optional[Paper]:
         """Get paper by ID."""
         with PerformanceLogger(self.logger, "get_paper_by_id"):
@@ -67,50 +223,166 @@ class PaperRepository:
                     return self._row_to_paper(result)
                 return None
     
-    def search(self, query: str, limit: int = 50, offset: int = 0) -> List[Paper]:
-        """Search papers using full-text search."""
+    def get_many_by_id(self, paper_ids: List[str]) -> Dict[str, Paper]:
+        """Get papers by ID, keyed by ID. Missing IDs are omitted."""
+        with PerformanceLogger(self.logger, "get_papers_by_ids", count=len(paper_ids)):
+            return {paper.id: paper for paper in self._get_many_by("id", paper_ids)}
+    
+    def get_many_by_doi(self, dois: List[str]) -> Dict[str, Paper]:
+        """Get papers by DOI, keyed by DOI. Missing DOIs are omitted."""
+        with PerformanceLogger(self.logger, "get_papers_by_dois", count=len(dois)):
+            return {paper.doi: paper for paper in self._get_many_by("doi", dois)}
+    
+    def _get_many_by(self, column: str, values: List[str]) -> List[Paper]:
+        """Fetch papers matching any of the values with chunked IN-list queries."""
+        values = list(dict.fromkeys(values))
+        papers = []
+        
+        with db_manager.get_sqlite_connection() as conn:
+            conn.row_factory = sqlite3.Row
+            for i in range(0, len(values), IN_CLAUSE_CHUNK_SIZE):
+                chunk = values[i:i + IN_CLAUSE_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    f"SELECT * FROM papers WHERE {column} IN ({placeholders})", chunk
+                )
+                papers.extend(self._rows_to_papers(cursor))
+        
+        return papers
+    
+    def search(self, query: str, limit: int = 50,
+               after: Optional[PageCursor] = None, lazy: bool = False) -> List[Paper]:
+        """Search papers using full-text search.
+        
+        Pass lazy=True for display-only results to defer date parsing.
+        """
+        return self.search_page(query, limit, after, lazy)[0]
+    
+    def search_page(
+        self, 
+        query: str, 
+        limit: int = 50,
+        after: Optional[PageCursor] = None,
+        lazy: bool = False
+    ) -> Tuple[List[Paper], Optional[PageCursor]]:
+        """Search papers by rank, returning the cursor for the next page."""
+        keyset = "AND (fts.rank, p.rowid) > (?, ?)" if after else ""
         with PerformanceLogger(self.logger, "search_papers", query=query):
             with db_manager.get_sqlite_connection() as conn:
                 conn.row_factory = sqlite3.Row
-                results = conn.execute("""
-                    SELECT p.* FROM papers p
+                cursor = conn.execute(f"""
+                    SELECT p.*, fts.rank AS page_key, p.rowid AS page_rowid
+                    FROM papers p
                     JOIN papers_fts fts ON p.rowid = fts.rowid
-                    WHERE papers_fts MATCH ?
-                    ORDER BY rank
-                    LIMIT ? OFFSET ?
-                """, (query, limit, offset)).fetchall()
+                    WHERE papers_fts MATCH ? {keyset}
+                    ORDER BY fts.rank, p.rowid
+                    LIMIT ?
+                """, (query, *(after or ()), limit))
                 
-                papers = [self._row_to_paper(row) for row in results]
+                papers, next_cursor = self._paper_page(cursor, cursor.fetchall(), limit, lazy)
                 self.logger.info("Papers searched", 
                                query=query, results_count=len(papers))
-                return papers
+                return papers, next_cursor
     
-    def get_recent(self, limit: int = 20) -> List[Paper]:
+    def get_recent(self, limit: int = 20, after: Optional[PageCursor] = None,
+                   lazy: bool = False) -> List[Paper]:
         """Get recently added papers."""
+        return self.get_recent_page(limit, after, lazy)[0]
+    
+    def get_recent_page(
+        self, 
+        limit: int = 20,
+        after: Optional[PageCursor] = None,
+        lazy: bool = False
+    ) -> Tuple[List[Paper], Optional[PageCursor]]:
+        """Get recently added papers, returning the cursor for the next page."""
+        keyset = "WHERE created_at <= ? AND (created_at < ? OR rowid > ?)" if after else ""
+        params = (after[0], after[0], after[1]) if after else ()
         with PerformanceLogger(self.logger, "get_recent_papers"):
             with db_manager.get_sqlite_connection() as conn:
                 conn.row_factory = sqlite3.Row
-                results = conn.execute("""
-                    SELECT * FROM papers 
-                    ORDER BY created_at DESC 
+                cursor = conn.execute(f"""
+                    SELECT *, created_at AS page_key, rowid AS page_rowid
+                    FROM papers {keyset}
+                    ORDER BY created_at DESC, rowid 
                     LIMIT ?
-                """, (limit,)).fetchall()
+                """, (*params, limit))
                 
-                return [self._row_to_paper(row) for row in results]
+                return self._paper_page(cursor, cursor.fetchall(), limit, lazy)
     
-    def get_by_source(self, source: str, limit: int = 100) -> List[Paper]:
+    def get_by_source(self, source: str, limit: int = 100,
+                      after: Optional[PageCursor] = None,
+                      lazy: bool = False) -> List[Paper]:
         """Get papers by source."""
+        return self.get_by_source_page(source, limit, after, lazy)[0]
+    
+    def get_by_source_page(
+        self, 
+        source: str, 
+        limit: int = 100,
+        after: Optional[PageCursor] = None,
+        lazy: bool = False
+    ) -> Tuple[List[Paper], Optional[PageCursor]]:
+        """Get papers by source, returning the cursor for the next page.
+        
+        Papers without a publication date sort last, so a page that runs
+        past the dated rows continues into the undated ones by rowid.
+        """
+        select = "SELECT *, publication_date AS page_key, rowid AS page_rowid FROM papers"
+        undated = f"{select} WHERE source = ? AND publication_date IS NULL"
+        if after is None:
+            queries = [(f"{select} WHERE source = ? "
+                        "ORDER BY publication_date DESC, rowid LIMIT ?", (source,))]
+        elif after[0] is not None:
+            queries = [
+                (f"{select} WHERE source = ? AND publication_date <= ? "
+                 "AND (publication_date < ? OR rowid > ?) "
+                 "ORDER BY publication_date DESC, rowid LIMIT ?",
+                 (source, after[0], after[0], after[1])),
+                (f"{undated} ORDER BY rowid LIMIT ?", (source,)),
+            ]
+        else:
+            queries = [(f"{undated} AND rowid > ? ORDER BY rowid LIMIT ?",
+                        (source, after[1]))]
+        
         with PerformanceLogger(self.logger, "get_papers_by_source", source=source):
             with db_manager.get_sqlite_connection() as conn:
                 conn.row_factory = sqlite3.Row
-                results = conn.execute("""
-                    SELECT * FROM papers 
-                    WHERE source = ?
-                    ORDER BY publication_date DESC 
+                rows = []
+                for sql, params in queries:
+                    if len(rows) >= limit:
+                        break
+                    cursor = conn.execute(sql, (*params, limit - len(rows)))
+                    rows.extend(cursor.fetchall())
+                
+                return self._paper_page(cursor, rows, limit, lazy)
+    
+    def get_unprocessed_papers(self, need_embeddings: bool = True, need_entities: bool = True,
+                               limit: Optional[int] = None) -> List[Paper]:
+        """Get papers lacking embeddings or entities, oldest first, in one query.
+        
+        A paper lacking both is returned once, and the limit applies to the
+        combined result.
+        """
+        conditions = []
+        if need_embeddings:
+            conditions.append("NOT EXISTS (SELECT 1 FROM embeddings e WHERE e.paper_id = papers.id)")
+        if need_entities:
+            conditions.append("NOT EXISTS (SELECT 1 FROM entities en WHERE en.paper_id = papers.id)")
+        if not conditions:
+            return []
+        
+        with PerformanceLogger(self.logger, "get_unprocessed_papers"):
+            with db_manager.get_sqlite_connection() as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(f"""
+                    SELECT * FROM papers
+                    WHERE {" OR ".join(conditions)}
+                    ORDER BY rowid
                     LIMIT ?
-                """, (source, limit)).fetchall()
+                """, (-1 if limit is None else limit,))
                 
-                return [self._row_to_paper(row) for row in results]
+                return self._rows_to_papers(cursor)
     
     def update_processing_status(self, paper_id: str, status: str) -> None:
         """Update paper processing status."""
@@ -137,6 +409,52 @@ class PaperRepository:
             
             self.logger.debug("Paper full text updated", paper_id=paper_id)
     
+    def bulk_update(self, updates: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Apply (paper_id, {column: value}) updates in one transaction.
+        
+        Updates setting the same columns share one executemany statement.
+        Only plain scalar columns can be set this way.
+        """
+        if not updates:
+            return 0
+        
+        by_columns: Dict[Tuple[str, ...], List[Tuple]] = {}
+        for paper_id, fields in updates:
+            columns = tuple(sorted(fields))
+            unknown = set(columns) - BULK_UPDATE_COLUMNS
+            if unknown:
+                raise ValueError(f"Cannot bulk update paper columns: {sorted(unknown)}")
+            by_columns.setdefault(columns, []).append(
+                tuple(fields[column] for column in columns) + (paper_id,)
+            )
+        
+        with PerformanceLogger(self.logger, "bulk_update_papers", count=len(updates)):
+            with db_manager.get_sqlite_connection() as conn:
+                if conn.in_transaction:
+                    conn.commit()
+                conn.execute("BEGIN")
+                try:
+                    for columns, rows in by_columns.items():
+                        assignments = ", ".join(f"{column} = ?" for column in columns)
+                        conn.executemany(f"""
+                            UPDATE papers 
+                            SET {assignments}, updated_at = CURRENT_TIMESTAMP
+                            WHERE id = ?
+                        """, rows)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                
+                self.logger.debug("Papers bulk updated", count=len(updates))
+                return len(updates)
+    
+    def update_relevance_scores(self, scores: Dict[str, float]) -> int:
+        """Update the relevance scores of many papers in one transaction."""
+        return self.bulk_update(
+            [(paper_id, {"relevance_score": score}) for paper_id, score in scores.items()]
+        )
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get paper statistics."""
         with db_manager.get_sqlite_connection() as conn:
@@ -147,6 +465,14 @@ class PaperRepository:
                 "SELECT COUNT(*) FROM papers"
             ).fetchone()[0]
             
+            # Large tables aggregate faster on DuckDB's columnar scan
+            if stats["total_papers"] >= ANALYTICS_ROW_THRESHOLD:
+                try:
+                    return paper_analytics_repo.get_statistics()
+                except Exception as e:
+                    self.logger.warning("DuckDB statistics failed, using SQLite", 
+                                      error=str(e))
+            
             # Papers by source
             source_stats = conn.execute("""
                 SELECT source, COUNT(*) as count 
@@ -171,97 +497,319 @@ class PaperRepository:
             
             return stats
     
+    def _rows_to_papers(
+        self, 
+        cursor: sqlite3.Cursor, 
+        lazy: bool = False,
+        rows: Optional[Iterable[sqlite3.Row]] = None
+    ) -> List[Paper]:
+        """Convert every row of a papers query to Paper models.
+        
+        With lazy=True the rows become LazyPaper instances that skip
+        validation and parse their dates only when accessed. Pass rows
+        when they were already fetched from the cursor.
+        """
+        values = _positional_getter(cursor, PAPER_COLUMNS)
+        to_paper = self._values_to_lazy_paper if lazy else self._values_to_paper
+        return [to_paper(values(row)) for row in (cursor if rows is None else rows)]
+    
+    def _paper_page(
+        self, 
+        cursor: sqlite3.Cursor, 
+        rows: List[sqlite3.Row], 
+        limit: int,
+        lazy: bool
+    ) -> Tuple[List[Paper], Optional[PageCursor]]:
+        """Convert a keyset page, deriving the next cursor from its last row."""
+        papers = self._rows_to_papers(cursor, lazy=lazy, rows=rows)
+        if len(rows) < limit:
+            return papers, None
+        return papers, (rows[-1]["page_key"], rows[-1]["page_rowid"])
+    
     def _row_to_paper(self, row: sqlite3.Row) -> Paper:
         """Convert database row to Paper model."""
-        return Paper(
-            id=row["id"],
-            title=row["title"],
-            abstract=row["abstract"],
-            authors=json.loads(row["authors"]) if row["authors"] else [],
-            journal=row["journal"],
-            publication_date=datetime.fromisoformat(row["publication_date"]) 
-                           if row["publication_date"] else None,
-            doi=row["doi"],
-            arxiv_id=row["arxiv_id"],
-            pubmed_id=row["pubmed_id"],
-            pdf_url=row["pdf_url"],
-            local_pdf_path=row["local_pdf_path"],
-            full_text=row["full_text"],
-            paper_type=row["paper_type"],
-            source=row["source"],
-            relevance_score=row["relevance_score"],
-            processing_status=row["processing_status"],
-            created_at=datetime.fromisoformat(row["created_at"]),
-            updated_at=datetime.fromisoformat(row["updated_at"])
+        return self._values_to_paper(_paper_values_by_name(row))
+    
+    @staticmethod
+    def _values_to_paper(values: Tuple) -> Paper:
+        """Build a Paper from column values ordered as PAPER_COLUMNS."""
+        (paper_id, title, abstract, authors, journal, publication_date,
+         doi, arxiv_id, pubmed_id, pdf_url, local_pdf_path, full_text,
+         paper_type, source, relevance_score, processing_status,
+         created_at, updated_at) = values
+        
+        return Paper.from_database({
+            'id': paper_id,
+            'title': title,
+            'abstract': abstract,
+            'authors': json.loads(authors) if authors else [],
+            'journal': journal,
+            'publication_date': _iso(publication_date) if publication_date else None,
+            'doi': doi,
+            'arxiv_id': arxiv_id,
+            'pubmed_id': pubmed_id,
+            'pdf_url': pdf_url,
+            'local_pdf_path': local_pdf_path,
+            'full_text': full_text,
+            'paper_type': paper_type,
+            'source': source,
+            'relevance_score': relevance_score,
+            'processing_status': processing_status,
+            'created_at': _iso(created_at) if created_at else None,
+            'updated_at': _iso(updated_at) if updated_at else None,
+        })
+    
+    @staticmethod
+    def _values_to_lazy_paper(values: Tuple) -> LazyPaper:
+        """Build a LazyPaper from column values ordered as PAPER_COLUMNS."""
+        (paper_id, title, abstract, authors, journal, publication_date,
+         doi, arxiv_id, pubmed_id, pdf_url, local_pdf_path, full_text,
+         paper_type, source, relevance_score, processing_status,
+         created_at, updated_at) = values
+        
+        return LazyPaper.from_raw(
+            {
+                'publication_date': publication_date,
+                'created_at': created_at,
+                'updated_at': updated_at,
+            },
+            {
+                'id': paper_id,
+                'title': title,
+                'abstract': abstract,
+                'authors': json.loads(authors) if authors else [],
+                'journal': journal,
+                'doi': doi,
+                'arxiv_id': arxiv_id,
+                'pubmed_id': pubmed_id,
+                'pdf_url': pdf_url,
+                'local_pdf_path': local_pdf_path,
+                'full_text': full_text,
+                'paper_type': paper_type,
+                'source': source,
+                'relevance_score': relevance_score,
+                'processing_status': processing_status,
+            }
         )
 
 
+class PaperAnalyticsRepository:
+    """Aggregate queries over the papers table, executed by DuckDB.
+    
+    DuckDB reads the SQLite file through the sqlite_scanner extension and
+    aggregates column batches with its vectorized engine, which scales much
+    better than the SQLite VM once the table holds hundreds of thousands of rows.
+    """
+    
+    def __init__(self):
+        self.logger = get_logger("paper_analytics_repository")
+    
+    def _papers_scan(self) -> str:
+        """Table expression scanning the SQLite papers table."""
+        db_path = config.get_db_paths()["literature"].replace("'", "''")
+        return f"sqlite_scan('{db_path}', 'papers')"
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get paper statistics in a single grouped scan."""
+        recent_cutoff = datetime.utcnow() - timedelta(days=7)
+        
+        with PerformanceLogger(self.logger, "get_paper_statistics_duckdb"):
+            with db_manager.get_duckdb_connection() as conn:
+                conn.execute("LOAD sqlite_scanner")
+                rows = conn.execute(f"""
+                    SELECT source, processing_status, 
+                           COUNT(*) AS count,
+                           COUNT(*) FILTER (WHERE created_at >= ?) AS recent
+                    FROM {self._papers_scan()}
+                    GROUP BY source, processing_status
+                """, [recent_cutoff]).fetchall()
+        
+        stats = {"total_papers": 0, "by_source": {}, "by_status": {}, "recent_count": 0}
+        for source, status, count, recent in rows:
+            stats["total_papers"] += count
+            stats["by_source"][source] = stats["by_source"].get(source, 0) + count
+            stats["by_status"][status] = stats["by_status"].get(status, 0) + count
+            stats["recent_count"] += recent
+        
+        return stats
+
+
 class EntityRepository:
     """Repository for entity data access."""
     
     def __init__(self):
         self.logger = get_logger("entity_repository")
     
-    def create_entities(self, entities: List[Entity]) -> int:
-        """Create multiple entity records."""
+    _INSERT_SQL = """
+        INSERT INTO entities (
+            paper_id, entity_text, entity_type, confidence,
+            start_position, end_position, context
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    def create_entities(self, entities: List[Entity], assign_ids: bool = True) -> int:
+        """Create multiple entity records in one transaction.
+        
+        With assign_ids (and SQLite >= 3.35), each Entity's ``id`` is back-filled
+        from ``INSERT ... RETURNING id`` so callers need no follow-up SELECT.
+        """
         if not entities:
             return 0
         
         with PerformanceLogger(self.logger, "create_entities", count=len(entities)):
             with db_manager.get_sqlite_connection() as conn:
-                entity_data = [
-                    (e.paper_id, e.entity_text, 
-                     e.entity_type.value if hasattr(e.entity_type, 'value') else e.entity_type,
-                     e.confidence, e.start_position, e.end_position, e.context)
-                    for e in entities
-                ]
+                rows = self._entity_rows(entities)
                 
-                cursor = conn.executemany("""
-                    INSERT INTO entities (
-                        paper_id, entity_text, entity_type, confidence,
-                        start_position, end_position, context
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, entity_data)
+                if assign_ids and SQLITE_SUPPORTS_RETURNING:
+                    # executemany discards RETURNING rows, so insert one at a time
+                    sql = self._INSERT_SQL + "RETURNING id"
+                    execute = conn.execute
+                    for entity, row in zip(entities, rows):
+                        entity.id = execute(sql, row).fetchone()[0]
+                    count = len(entities)
+                else:
+                    count = conn.executemany(self._INSERT_SQL, rows).rowcount
                 
                 conn.commit()
-                return cursor.rowcount
+                return count
+    
+    def create_entities_stream(self, entities: Iterable[Entity], 
+                               batch_size: int = 5000) -> Iterator[int]:
+        """Insert entities from an iterable, committing every batch_size rows.
+        
+        Yields the running number of inserted rows after each commit, so
+        NER pipelines can write entities for many papers in a few transactions.
+        """
+        entities = iter(entities)
+        total = 0
+        
+        with db_manager.get_sqlite_connection() as conn:
+            while True:
+                batch = list(islice(entities, batch_size))
+                if not batch:
+                    break
+                
+                conn.executemany(self._INSERT_SQL, self._entity_rows(batch))
+                conn.commit()
+                
+                total += len(batch)
+                self.logger.debug("Entity batch committed", 
+                                batch_size=len(batch), total=total)
+                yield total
+    
+    @staticmethod
+    def _entity_rows(entities: List[Entity]) -> List[Tuple]:
+        """Convert entities to insert parameter tuples.
+        
+        Models store enum fields as plain values (use_enum_values), and the
+        enums subclass str, so sqlite3 binds either form as the value string.
+        """
+        return [
+            (e.paper_id, e.entity_text, e.entity_type,
+             e.confidence, e.start_position, e.end_position, e.context)
+            for e in entities
+        ]
     
     def get_by_paper(self, paper_id: str) -> List[Entity]:
         """Get entities for a specific paper."""
         with db_manager.get_sqlite_connection() as conn:
             conn.row_factory = sqlite3.Row
-            results = conn.execute("""
+            cursor = conn.execute("""
                 SELECT * FROM entities 
                 WHERE paper_id = ?
                 ORDER BY confidence DESC
-            """, (paper_id,)).fetchall()
+            """, (paper_id,))
             
-            return [self._row_to_entity(row) for row in results]
+            return self._rows_to_entities(cursor)
+    
+    def get_by_paper_ids(self, paper_ids: List[str]) -> Dict[str, List[Entity]]:
+        """Get entities for many papers, keyed by paper ID.
+        
+        Papers without entities are omitted, so the keys double as the set
+        of already-processed papers.
+        """
+        paper_ids = list(dict.fromkeys(paper_ids))
+        entities: Dict[str, List[Entity]] = {}
+        
+        with db_manager.get_sqlite_connection() as conn:
+            for i in range(0, len(paper_ids), IN_CLAUSE_CHUNK_SIZE):
+                chunk = paper_ids[i:i + IN_CLAUSE_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(f"""
+                    SELECT * FROM entities 
+                    WHERE paper_id IN ({placeholders})
+                    ORDER BY confidence DESC
+                """, chunk)
+                for entity in self._rows_to_entities(cursor):
+                    entities.setdefault(entity.paper_id, []).append(entity)
+        
+        return entities
     
     def get_by_type(self, entity_type: str, limit: int = 100) -> List[Entity]:
         """Get entities by type."""
         with db_manager.get_sqlite_connection() as conn:
             conn.row_factory = sqlite3.Row
-            results = conn.execute("""
+            cursor = conn.execute("""
                 SELECT * FROM entities 
                 WHERE entity_type = ?
                 ORDER BY confidence DESC
                 LIMIT ?
-            """, (entity_type, limit)).fetchall()
+            """, (entity_type, limit))
             
-            return [self._row_to_entity(row) for row in results]
+            return self._rows_to_entities(cursor)
+
+    def get_statistics(self, paper_id: Optional[str] = None) -> Dict[str, Any]:
+        """Get entity counts and confidence aggregates, optionally for one paper."""
+        where, params = ("WHERE paper_id = ?", (paper_id,)) if paper_id else ("", ())
+
+        with db_manager.get_sqlite_connection() as conn:
+            type_rows = conn.execute(f"""
+                SELECT entity_type, COUNT(*), SUM(confidence)
+                FROM entities {where}
+                GROUP BY entity_type
+            """, params).fetchall()
+
+            stats = {
+                "total_entities": sum(row[1] for row in type_rows),
+                "entities_by_type": {row[0]: row[1] for row in type_rows},
+                "avg_confidence": 0.0,
+            }
+
+            if stats["total_entities"]:
+                stats["avg_confidence"] = (
+                    sum(row[2] for row in type_rows) / stats["total_entities"]
+                )
+                stats["unique_entity_count"] = conn.execute(f"""
+                    SELECT COUNT(DISTINCT lower(entity_text)) FROM entities {where}
+                """, params).fetchone()[0]
+
+        return stats
+
+    def _rows_to_entities(self, cursor: sqlite3.Cursor) -> List[Entity]:
+        """Convert every row of an entities query to Entity models."""
+        values = _positional_getter(cursor, ENTITY_COLUMNS)
+        to_entity = self._values_to_entity
+        return [to_entity(values(row)) for row in cursor]
     
     def _row_to_entity(self, row: sqlite3.Row) -> Entity:
         """Convert database row to Entity model."""
+        return self._values_to_entity(_entity_values_by_name(row))
+    
+    @staticmethod
+    def _values_to_entity(values: Tuple) -> Entity:
+        """Build an Entity from column values ordered as ENTITY_COLUMNS."""
+        (entity_id, paper_id, entity_text, entity_type, confidence,
+         start_position, end_position, context) = values
+        
         return Entity(
-            id=row["id"],
-            paper_id=row["paper_id"],
-            entity_text=row["entity_text"],
-            entity_type=row["entity_type"],
-            confidence=row["confidence"],
-            start_position=row["start_position"],
-            end_position=row["end_position"],
-            context=row["context"]
+            id=entity_id,
+            paper_id=paper_id,
+            entity_text=entity_text,
+            entity_type=entity_type,
+            confidence=confidence,
+            start_position=start_position,
+            end_position=end_position,
+            context=context
         )
 
 
@@ -271,45 +819,252 @@ class EmbeddingRepository:
     def __init__(self):
         self.logger = get_logger("embedding_repository")
     
-    def create(self, embedding: Embedding) -> None:
-        """Create embedding record."""
-        import numpy as np
-        
+    def create(self, embedding: Embedding, sections: Optional[Dict[str, Any]] = None) -> None:
+        """Create embedding record, optionally with the paper's section embeddings."""
         with db_manager.get_sqlite_connection() as conn:
-            # Serialize embedding as binary
-            embedding_blob = np.array(embedding.embedding, dtype=np.float32).tobytes()
+            # Serialize embedding as int8 with a per-vector scale
+            embedding_blob = quantize_embedding(embedding.embedding)
+            sections_blob, sections_meta = pack_sections(sections) if sections else (None, None)
             
             conn.execute("""
                 INSERT OR REPLACE INTO embeddings (
-                    paper_id, embedding, model_version
-                ) VALUES (?, ?, ?)
-            """, (embedding.paper_id, embedding_blob, embedding.model_version))
+                    paper_id, embedding, model_version, sections_blob, sections_meta
+                ) VALUES (?, ?, ?, ?, ?)
+            """, (embedding.paper_id, embedding_blob,
+                  embedding.model_version + INT8_VERSION_SUFFIX,
+                  sections_blob, sections_meta))
             conn.commit()
     
+    def create_or_update(
+        self, 
+        paper_id: str, 
+        embedding_data: Dict[str, Any], 
+        model_version: str
+    ) -> None:
+        """Store a paper's section embeddings and its document vector.
+        
+        The document vector is the average over all sections, falling back to
+        the combined title/abstract embedding. Replaces any earlier row.
+        """
+        vector = embedding_data.get("document_average")
+        if vector is None and embedding_data.get("document"):
+            vector = embedding_data["document"][0]
+        if vector is None:
+            raise ValueError(f"No document embedding for paper {paper_id}")
+        
+        self.create(
+            Embedding(paper_id=paper_id, embedding=vector, model_version=model_version),
+            sections=embedding_data
+        )
+    
     def get_by_paper(self, paper_id: str) -> Optional[Embedding]:
         """Get embedding for a paper."""
-        import numpy as np
-        
         with db_manager.get_sqlite_connection() as conn:
             conn.row_factory = sqlite3.Row
             result = conn.execute("""
-                SELECT * FROM embeddings WHERE paper_id = ?
+                SELECT paper_id, embedding, model_version, created_at
+                FROM embeddings WHERE paper_id = ?
             """, (paper_id,)).fetchone()
             
             if result:
-                # Deserialize embedding
-                embedding_array = np.frombuffer(result["embedding"], dtype=np.float32)
-                
-                return Embedding(
-                    paper_id=result["paper_id"],
-                    embedding=embedding_array.tolist(),
-                    model_version=result["model_version"],
-                    created_at=datetime.fromisoformat(result["created_at"])
-                )
+                return self._row_to_embedding(result)
             return None
+    
+    def get_by_paper_ids(self, paper_ids: List[str]) -> Dict[str, Embedding]:
+        """Get embeddings for many papers, keyed by paper ID. Missing IDs are omitted."""
+        paper_ids = list(dict.fromkeys(paper_ids))
+        embeddings = {}
+        
+        with db_manager.get_sqlite_connection() as conn:
+            conn.row_factory = sqlite3.Row
+            for i in range(0, len(paper_ids), IN_CLAUSE_CHUNK_SIZE):
+                chunk = paper_ids[i:i + IN_CLAUSE_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                for row in conn.execute(
+                    f"""
+                    SELECT paper_id, embedding, model_version, created_at
+                    FROM embeddings WHERE paper_id IN ({placeholders})
+                    """, chunk
+                ):
+                    embeddings[row["paper_id"]] = self._row_to_embedding(row)
+        
+        return embeddings
+    
+    def get_section_embeddings(self, paper_id: str) -> Dict[str, np.ndarray]:
+        """Get a paper's section embeddings as float16 (count, dim) arrays.
+        
+        Empty if the paper has none, e.g. rows written before sections were stored.
+        """
+        with db_manager.get_sqlite_connection() as conn:
+            result = conn.execute("""
+                SELECT sections_blob, sections_meta FROM embeddings WHERE paper_id = ?
+            """, (paper_id,)).fetchone()
+        
+        if not result or result[1] is None:
+            return {}
+        return unpack_sections(result[0], result[1])
+    
+    async def get_by_paper_ids_async(self, paper_ids: List[str]) -> Dict[str, Embedding]:
+        """Async get_by_paper_ids, run on the database executor's connections."""
+        return await db_manager.run_async(self.get_by_paper_ids, paper_ids)
+    
+    async def create_or_update_async(
+        self, 
+        paper_id: str, 
+        embedding_data: Dict[str, Any], 
+        model_version: str
+    ) -> None:
+        """Async create_or_update, run on the database executor's connections."""
+        await db_manager.run_async(self.create_or_update, paper_id, embedding_data, model_version)
+    
+    @staticmethod
+    def _row_to_embedding(row: sqlite3.Row) -> Embedding:
+        """Convert database row to Embedding model."""
+        embedding_array, model_version = decode_embedding(
+            row["embedding"], row["model_version"]
+        )
+        
+        return Embedding(
+            paper_id=row["paper_id"],
+            embedding=embedding_array,
+            model_version=model_version,
+            created_at=datetime.fromisoformat(row["created_at"])
+        )
+    
+    def get_all_vectors(
+        self, 
+        model_version: Optional[str] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """Get every stored vector as one float32 (N, D) matrix.
+        
+        Matrix rows follow the returned paper IDs. Pass model_version to keep
+        only that model's vectors, which also guarantees a single dimension.
+        """
+        with db_manager.get_sqlite_connection() as conn:
+            if model_version is None:
+                rows = conn.execute("""
+                    SELECT paper_id, embedding, model_version FROM embeddings
+                """).fetchall()
+            else:
+                rows = conn.execute("""
+                    SELECT paper_id, embedding, model_version FROM embeddings
+                    WHERE model_version IN (?, ?)
+                """, (model_version, model_version + INT8_VERSION_SUFFIX)).fetchall()
+        
+        if not rows:
+            return [], np.empty((0, 0), dtype=np.float32)
+        
+        paper_ids = [row[0] for row in rows]
+        matrix = np.stack([decode_embedding(row[1], row[2])[0] for row in rows])
+        return paper_ids, matrix
+    
+    def count_embeddings(self, model_version: Optional[str] = None) -> int:
+        """Count stored embeddings, optionally for one model version."""
+        with db_manager.get_sqlite_connection() as conn:
+            if model_version is None:
+                return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return conn.execute("""
+                SELECT COUNT(*) FROM embeddings WHERE model_version IN (?, ?)
+            """, (model_version, model_version + INT8_VERSION_SUFFIX)).fetchone()[0]
+    
+    def get_embedding_fingerprint(self, model_version: str) -> Tuple[int, int]:
+        """Count one model version's stored embeddings, with the embeddings write counter.
+        
+        Every insert, replace or delete bumps the counter, so re-embedded papers
+        change the fingerprint even when the count does not.
+        """
+        with db_manager.get_sqlite_connection() as conn:
+            count = conn.execute("""
+                SELECT COUNT(*) FROM embeddings WHERE model_version IN (?, ?)
+            """, (model_version, model_version + INT8_VERSION_SUFFIX)).fetchone()[0]
+            writes = conn.execute("SELECT writes FROM embedding_writes WHERE id = 1").fetchone()[0]
+        return count, writes
+    
+    def get_token_ids(self, text_hashes: List[str], tokenizer: str) -> Dict[str, np.ndarray]:
+        """Get cached int32 token ids keyed by text hash. Missing hashes are omitted."""
+        text_hashes = list(dict.fromkeys(text_hashes))
+        token_ids = {}
+        
+        with db_manager.get_sqlite_connection() as conn:
+            for i in range(0, len(text_hashes), IN_CLAUSE_CHUNK_SIZE):
+                chunk = text_hashes[i:i + IN_CLAUSE_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                for text_hash, blob in conn.execute(f"""
+                    SELECT text_hash, input_ids FROM token_cache
+                    WHERE tokenizer = ? AND text_hash IN ({placeholders})
+                """, (tokenizer, *chunk)):
+                    token_ids[text_hash] = np.frombuffer(blob, dtype=np.int32)
+        
+        return token_ids
+    
+    def store_token_ids(self, token_ids: Dict[str, np.ndarray], tokenizer: str) -> None:
+        """Cache token ids keyed by text hash, replacing earlier entries."""
+        if not token_ids:
+            return
+        
+        with db_manager.get_sqlite_connection() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO token_cache (text_hash, tokenizer, input_ids)
+                VALUES (?, ?, ?)
+            """, [
+                (text_hash, tokenizer, np.asarray(ids, dtype=np.int32).tobytes())
+                for text_hash, ids in token_ids.items()
+            ])
+            conn.commit()
+    
+    def get_text_embeddings(self, text_hashes: List[str], model_name: str) -> Dict[str, np.ndarray]:
+        """Get cached float32 text embeddings keyed by text hash. Missing hashes are omitted."""
+        text_hashes = list(dict.fromkeys(text_hashes))
+        embeddings = {}
+        
+        with db_manager.get_sqlite_connection() as conn:
+            for i in range(0, len(text_hashes), IN_CLAUSE_CHUNK_SIZE):
+                chunk = text_hashes[i:i + IN_CLAUSE_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                for text_hash, blob in conn.execute(f"""
+                    SELECT text_hash, embedding FROM text_embedding_cache
+                    WHERE model_name = ? AND text_hash IN ({placeholders})
+                """, (model_name, *chunk)):
+                    embeddings[text_hash] = np.frombuffer(blob, dtype=np.float32)
+        
+        return embeddings
+    
+    def store_text_embeddings(self, embeddings: Dict[str, np.ndarray], model_name: str) -> None:
+        """Cache text embeddings keyed by text hash, replacing earlier entries."""
+        if not embeddings:
+            return
+        
+        with db_manager.get_sqlite_connection() as conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO text_embedding_cache (text_hash, model_name, embedding)
+                VALUES (?, ?, ?)
+            """, [
+                (text_hash, model_name, np.asarray(embedding, dtype=np.float32).tobytes())
+                for text_hash, embedding in embeddings.items()
+            ])
+            conn.commit()
+    
+    def get_raw_int8(self, paper_id: str) -> Optional[Tuple[np.ndarray, float]]:
+        """Get the stored int8 vector and its scale for a paper.
+        
+        Returns None if the paper has no embedding or it predates quantization.
+        The float vector is ``int8_values * scale / 127``.
+        """
+        with db_manager.get_sqlite_connection() as conn:
+            result = conn.execute("""
+                SELECT embedding, model_version FROM embeddings WHERE paper_id = ?
+            """, (paper_id,)).fetchone()
+            
+            if not result or not result[1].endswith(INT8_VERSION_SUFFIX):
+                return None
+            
+            blob = result[0]
+            scale = float(np.frombuffer(blob, dtype=np.float32, count=1)[0])
+            return np.frombuffer(blob, dtype=np.int8, offset=4), scale
 
 
 # Repository instances
 paper_repo = PaperRepository()
+paper_analytics_repo = PaperAnalyticsRepository()
 entity_repo = EntityRepository()
 embedding_repo = EmbeddingRepository()
\ No newline at end of file
@@ -9,12 +9,21 @@ from core.config import config
 from core.logging import get_logger
 
 
+# Kept separate so bulk loads can drop and restore it (see PaperRepository.bulk_ingest)
+PAPERS_FTS_INSERT_TRIGGER = """
+            CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN
+                INSERT INTO papers_fts(rowid, title, abstract, full_text, authors) 
+                VALUES (NEW.rowid, NEW.title, NEW.abstract, NEW.full_text, NEW.authors);
+            END
+            """
+
+
 class SchemaManager:
     """Manages database schema creation and migration."""
     
     def __init__(self):
         self.logger = get_logger("schema")
-        self.current_version = 1
+        self.current_version = 8
     
     def get_sqlite_schema(self) -> List[str]:
         """Get SQLite schema creation statements."""
@@ -59,9 +68,7 @@ class SchemaManager:
             """
             CREATE INDEX IF NOT EXISTS idx_papers_journal ON papers(journal)
             """,
-            """
-            CREATE INDEX IF NOT EXISTS idx_papers_doi ON papers(doi)
-            """,
+            *self._papers_sort_indexes(),
             
             # Full-text search index
             """
@@ -76,27 +83,8 @@ class SchemaManager:
             """,
             
             # FTS triggers for automatic indexing
-            """
-            CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN
-                INSERT INTO papers_fts(rowid, title, abstract, full_text, authors) 
-                VALUES (NEW.rowid, NEW.title, NEW.abstract, NEW.full_text, NEW.authors);
-            END
-            """,
-            """
-            CREATE TRIGGER IF NOT EXISTS papers_fts_update AFTER UPDATE ON papers BEGIN
-                UPDATE papers_fts SET 
-                    title = NEW.title, 
-                    abstract = NEW.abstract, 
-                    full_text = NEW.full_text, 
-                    authors = NEW.authors 
-                WHERE rowid = NEW.rowid;
-            END
-            """,
-            """
-            CREATE TRIGGER IF NOT EXISTS papers_fts_delete AFTER DELETE ON papers BEGIN
-                DELETE FROM papers_fts WHERE rowid = OLD.rowid;
-            END
-            """,
+            PAPERS_FTS_INSERT_TRIGGER,
+            *self._papers_fts_sync_triggers(),
             
             # Authors table
             """
@@ -164,6 +152,9 @@ class SchemaManager:
                 FOREIGN KEY (paper_id) REFERENCES papers(id) ON DELETE CASCADE
             )
             """,
+            *self._token_cache_schema(),
+            *self._text_embedding_cache_schema(),
+            *self._embedding_writes_schema(),
             
             # Research trends table
             """
@@ -228,6 +219,100 @@ class SchemaManager:
             """
         ]
     
+    def _papers_sort_indexes(self) -> List[str]:
+        """Indexes serving the ORDER BY of get_by_source and get_recent."""
+        return [
+            """
+            CREATE INDEX IF NOT EXISTS idx_papers_source_pubdate 
+            ON papers(source, publication_date DESC)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_papers_created_at ON papers(created_at DESC)
+            """
+        ]
+    
+    def _papers_fts_sync_triggers(self) -> List[str]:
+        """Keep the external-content FTS index in step with updates and deletes.
+        
+        An external-content FTS5 table must be told the old column values via
+        its 'delete' command; the update trigger only fires when an indexed
+        column changes, so score and status updates skip the index.
+        """
+        return [
+            """
+            CREATE TRIGGER IF NOT EXISTS papers_fts_update 
+            AFTER UPDATE OF title, abstract, full_text, authors ON papers BEGIN
+                INSERT INTO papers_fts(papers_fts, rowid, title, abstract, full_text, authors)
+                VALUES ('delete', OLD.rowid, OLD.title, OLD.abstract, OLD.full_text, OLD.authors);
+                INSERT INTO papers_fts(rowid, title, abstract, full_text, authors)
+                VALUES (NEW.rowid, NEW.title, NEW.abstract, NEW.full_text, NEW.authors);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS papers_fts_delete AFTER DELETE ON papers BEGIN
+                INSERT INTO papers_fts(papers_fts, rowid, title, abstract, full_text, authors)
+                VALUES ('delete', OLD.rowid, OLD.title, OLD.abstract, OLD.full_text, OLD.authors);
+            END
+            """
+        ]
+    
+    def _token_cache_schema(self) -> List[str]:
+        """Token-id cache so re-embedding unchanged texts skips tokenization."""
+        return [
+            """
+            CREATE TABLE IF NOT EXISTS token_cache (
+                text_hash TEXT NOT NULL,
+                tokenizer TEXT NOT NULL,  -- Embedding model that produced the ids
+                input_ids BLOB NOT NULL,  -- int32 numpy array, special tokens included
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (text_hash, tokenizer)
+            ) WITHOUT ROWID
+            """
+        ]
+    
+    def _text_embedding_cache_schema(self) -> List[str]:
+        """Vectors by text hash so unchanged texts are never re-embedded."""
+        return [
+            """
+            CREATE TABLE IF NOT EXISTS text_embedding_cache (
+                text_hash TEXT NOT NULL,
+                model_name TEXT NOT NULL,  -- Embedding model that produced the vector
+                embedding BLOB NOT NULL,  -- float32 numpy array
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (text_hash, model_name)
+            ) WITHOUT ROWID
+            """
+        ]
+    
+    def _embedding_writes_schema(self) -> List[str]:
+        """Counter bumped by every change to embeddings, to tell when a saved index is stale."""
+        return [
+            """
+            CREATE TABLE IF NOT EXISTS embedding_writes (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                writes INTEGER NOT NULL
+            )
+            """,
+            """
+            INSERT OR IGNORE INTO embedding_writes (id, writes) VALUES (1, 0)
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS embeddings_writes_insert AFTER INSERT ON embeddings BEGIN
+                UPDATE embedding_writes SET writes = writes + 1 WHERE id = 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS embeddings_writes_update AFTER UPDATE ON embeddings BEGIN
+                UPDATE embedding_writes SET writes = writes + 1 WHERE id = 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS embeddings_writes_delete AFTER DELETE ON embeddings BEGIN
+                UPDATE embedding_writes SET writes = writes + 1 WHERE id = 1;
+            END
+            """
+        ]
+    
     def get_duckdb_schema(self) -> List[str]:
         """Get DuckDB schema creation statements for analytics."""
         return [
@@ -363,16 +448,98 @@ class SchemaManager:
                         from_version=current_version,
                         to_version=target_version)
         
-        # For now, we only have version 1, so just create the schema
+        # A fresh database gets the version 1 schema, then every migration
         if current_version == 0:
             self.create_sqlite_schema(conn)
         
-        # Future migrations would go here
-        # if current_version < 2:
-        #     self.migrate_to_version_2(conn)
+        if current_version < 2:
+            self.migrate_to_version_2(conn)
+        
+        if current_version < 3:
+            self.migrate_to_version_3(conn)
+        
+        if current_version < 4:
+            self.migrate_to_version_4(conn)
+        
+        if current_version < 5:
+            self.migrate_to_version_5(conn)
+        
+        if current_version < 6:
+            self.migrate_to_version_6(conn)
+        
+        if current_version < 7:
+            self.migrate_to_version_7(conn)
+        
+        if current_version < 8:
+            self.migrate_to_version_8(conn)
         
         self.logger.info("Schema migration completed")
     
+    def migrate_to_version_2(self, conn: sqlite3.Connection) -> None:
+        """Add compound indexes for source/date and recency sorts."""
+        for statement in self._papers_sort_indexes():
+            conn.execute(statement)
+        
+        conn.execute("INSERT OR IGNORE INTO schema_version (version) VALUES (2)")
+        conn.commit()
+        self.logger.info("Migrated schema to version 2")
+    
+    def migrate_to_version_3(self, conn: sqlite3.Connection) -> None:
+        """Drop idx_papers_doi, which duplicates the UNIQUE autoindex on doi."""
+        conn.execute("DROP INDEX IF EXISTS idx_papers_doi")
+        
+        conn.execute("INSERT OR IGNORE INTO schema_version (version) VALUES (3)")
+        conn.commit()
+        self.logger.info("Migrated schema to version 3")
+    
+    def migrate_to_version_4(self, conn: sqlite3.Connection) -> None:
+        """Add the token_cache table."""
+        for statement in self._token_cache_schema():
+            conn.execute(statement)
+        
+        conn.execute("INSERT OR IGNORE INTO schema_version (version) VALUES (4)")
+        conn.commit()
+        self.logger.info("Migrated schema to version 4")
+    
+    def migrate_to_version_5(self, conn: sqlite3.Connection) -> None:
+        """Store section embeddings as a binary BLOB plus JSON layout."""
+        conn.execute("ALTER TABLE embeddings ADD COLUMN sections_blob BLOB")  # float16 vectors
+        conn.execute("ALTER TABLE embeddings ADD COLUMN sections_meta TEXT")  # JSON layout
+        
+        conn.execute("INSERT OR IGNORE INTO schema_version (version) VALUES (5)")
+        conn.commit()
+        self.logger.info("Migrated schema to version 5")
+    
+    def migrate_to_version_6(self, conn: sqlite3.Connection) -> None:
+        """Fix the FTS update/delete triggers and rebuild the index they corrupted."""
+        conn.execute("DROP TRIGGER IF EXISTS papers_fts_update")
+        conn.execute("DROP TRIGGER IF EXISTS papers_fts_delete")
+        for statement in self._papers_fts_sync_triggers():
+            conn.execute(statement)
+        conn.execute("INSERT INTO papers_fts(papers_fts) VALUES ('rebuild')")
+        
+        conn.execute("INSERT OR IGNORE INTO schema_version (version) VALUES (6)")
+        conn.commit()
+        self.logger.info("Migrated schema to version 6")
+    
+    def migrate_to_version_7(self, conn: sqlite3.Connection) -> None:
+        """Add the text_embedding_cache table."""
+        for statement in self._text_embedding_cache_schema():
+            conn.execute(statement)
+        
+        conn.execute("INSERT OR IGNORE INTO schema_version (version) VALUES (7)")
+        conn.commit()
+        self.logger.info("Migrated schema to version 7")
+    
+    def migrate_to_version_8(self, conn: sqlite3.Connection) -> None:
+        """Add the embedding_writes counter and the triggers that bump it."""
+        for statement in self._embedding_writes_schema():
+            conn.execute(statement)
+        
+        conn.execute("INSERT OR IGNORE INTO schema_version (version) VALUES (8)")
+        conn.commit()
+        self.logger.info("Migrated schema to version 8")
+    
     def validate_schema(self, conn: sqlite3.Connection) -> Dict[str, Any]:
         """Validate schema integrity."""
         validation_results = {"valid": True, "issues": []}
@@ -380,7 +547,8 @@ class SchemaManager:
         # Check if required tables exist
         required_tables = [
             "papers", "papers_fts", "authors", "entities", 
-            "embeddings", "trends", "user_settings", "alerts", "schema_version"
+            "embeddings", "token_cache", "text_embedding_cache", "embedding_writes", "trends", "user_settings", "alerts",
+            "schema_version"
         ]
         
         for table in required_tables:
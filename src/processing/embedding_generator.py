@@ -5,21 +5,93 @@ This module handles the generation and management of semantic embeddings for pap
 using sentence transformers optimized for M2 hardware.
 """
 
+import asyncio
 import logging
+import queue
 import time
-from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 import numpy as np
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from pathlib import Path
 import json
 import hashlib
 
-from core.models import Paper
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+from core.config import config
+from core.models import Paper, Embedding
 from core.repository import EmbeddingRepository
-from processing.ml_models import get_model_manager, M2ModelManager
+from processing.ml_models import get_model_manager, M2ModelManager, MODEL2VEC_AVAILABLE
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SECTIONS = ["title", "abstract", "full_text"]
+
+
+def _chunk_offsets(spaces: np.ndarray,
+                   text_length: int,
+                   chunk_size: int,
+                   overlap_size: int,
+                   lookback: int = 50) -> np.ndarray:
+    """
+    Compute (n_chunks, 2) start/end character offsets of overlapping chunks.
+    
+    Chunk ends snap back to the last space within lookback characters, found
+    by binary search over the sorted space positions. Compiled with Numba
+    when installed, without holding the GIL so chunking overlaps encoding
+    in the batch pipeline; otherwise runs as plain Python over one step per
+    chunk.
+    """
+    # Every step advances at least this far, which bounds the chunk count
+    min_step = max(chunk_size - lookback - overlap_size, 1)
+    offsets = np.empty((text_length // min_step + 2, 2), dtype=np.int64)
+    
+    n_chunks = 0
+    start = 0
+    while True:
+        end = start + chunk_size
+        
+        if end < text_length:
+            space_idx = np.searchsorted(spaces, end) - 1
+            if space_idx >= 0 and spaces[space_idx] >= end - lookback and spaces[space_idx] > start:
+                end = spaces[space_idx]
+        else:
+            end = text_length
+        
+        offsets[n_chunks, 0] = start
+        offsets[n_chunks, 1] = end
+        n_chunks += 1
+        
+        # The last chunk reached the end; further ones would only repeat its tail
+        if end >= text_length:
+            break
+        
+        start = max(end - overlap_size, start + 1)
+    
+    return offsets[:n_chunks]
+
+
+if NUMBA_AVAILABLE:
+    _chunk_offsets = njit(cache=True, nogil=True)(_chunk_offsets)
+
+
 @dataclass
 class EmbeddingConfig:
     """Configuration for embedding generation"""
@@ -28,12 +100,38 @@ class EmbeddingConfig:
     overlap_size: int = 50  # Overlap between chunks
     min_text_length: int = 10  # Minimum text length to process
     batch_size: int = 32
+    smart_batch_size: int = 1024  # Mini-batch size once texts are sorted by token length
+    pipeline_batch_papers: int = 128  # Papers per stage of the batch pipeline
+    pipeline_queue_size: int = 4  # Batches buffered between pipeline stages
     cache_embeddings: bool = True
+    cache_token_ids: bool = True  # Reuse stored token ids so re-embedding skips tokenization
+    cache_text_embeddings: bool = True  # Reuse stored vectors of identical texts across runs
     include_sections: List[str] = None  # Which sections to embed separately
+    static_sections: List[str] = None  # Sections routed to the model2vec static model
+    use_ann_index: bool = True  # HNSW similarity search when faiss is installed
+    hnsw_m: int = 32  # Graph neighbours per node
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 64
+    index_dir: Optional[str] = None  # Where the HNSW index is persisted
+    similarity_dtype: str = "float32"  # "float16" halves the exact-search matrix's memory
+    similarity_block_rows: int = 4096  # Rows upcast per block when the matrix is float16
     
     def __post_init__(self):
         if self.include_sections is None:
-            self.include_sections = ["title", "abstract", "full_text"]
+            self.include_sections = list(DEFAULT_SECTIONS)
+        if self.static_sections is None:
+            self.static_sections = ["full_text"]
+        if self.index_dir is None:
+            self.index_dir = config.settings.embedding_cache_path
+
+
+@dataclass
+class ModelInputs:
+    """Transformer-routed segments of a batch, split by the text embedding cache"""
+    stored: Dict[int, np.ndarray]  # Segment position -> vector reused from the cache
+    positions: List[int]  # Segment positions the model still has to encode
+    text_hashes: Optional[List[str]] = None  # Their hashes, when the text cache is on
+    token_ids: Optional[List[np.ndarray]] = None  # Their token ids, when pre-tokenized
 
 
 class EmbeddingGenerator:
@@ -60,41 +158,49 @@ class EmbeddingGenerator:
             "embeddings_generated": 0,
             "total_processing_time": 0.0,
             "cache_hits": 0,
-            "cache_misses": 0
+            "cache_misses": 0,
+            "text_cache_hits": 0
         }
         
+        # Similarity search snapshot: L2-normalized matrix, the paper IDs of its
+        # rows and the number of stored rows dropped as invalid, replaced as one
+        # tuple so concurrent searches never mix them
+        self._similarity: Optional[Tuple[np.ndarray, List[str], int]] = None
+        
+        # HNSW index over the same normalized vectors, positions aligned with _index_ids
+        self._index = None
+        self._index_ids: List[str] = []
+        self._index_id_set: set = set()  # Membership checks without scanning _index_ids
+        self._index_invalid = 0  # Stored vectors left out of the index as invalid
+        self._index_dirty = False
+        
+        # The default sections take a specialized path without membership checks
+        if set(self.config.include_sections) == set(DEFAULT_SECTIONS):
+            self._prepare_texts = self._prepare_default_texts
+        else:
+            self._prepare_texts = self._prepare_texts_for_embedding
+        
         logger.info(f"EmbeddingGenerator initialized with model: {self.config.model_version}")
     
     def _create_text_chunks(self, text: str) -> List[str]:
         """
         Split long text into overlapping chunks for embedding generation
         """
-        if len(text) <= self.config.chunk_size:
+        text_length = len(text)
+        if text_length <= self.config.chunk_size:
             return [text]
         
-        chunks = []
-        start = 0
+        # Locate every space once; chunk ends snap back to them by binary search
+        spaces = np.flatnonzero(
+            np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32) == ord(' ')
+        )
+        offsets = _chunk_offsets(spaces, text_length, self.config.chunk_size, self.config.overlap_size)
         
-        while start < len(text):
-            end = start + self.config.chunk_size
-            
-            # If we're not at the end, try to break at word boundary
-            if end < len(text):
-                # Look for space within the last 50 characters
-                last_space = text.rfind(' ', end - 50, end)
-                if last_space > start:
-                    end = last_space
-            
+        chunks = []
+        for start, end in offsets.tolist():
             chunk = text[start:end].strip()
             if len(chunk) >= self.config.min_text_length:
                 chunks.append(chunk)
-            
-            # Move start position with overlap
-            start = end - self.config.overlap_size
-            
-            # Prevent infinite loop
-            if start >= len(text):
-                break
         
         return chunks
     
@@ -127,166 +233,786 @@ class EmbeddingGenerator:
         
         return texts
     
+    def _prepare_default_texts(self, paper: Paper) -> Dict[str, List[str]]:
+        """
+        _prepare_texts_for_embedding specialized for the default sections
+        """
+        title, abstract, full_text = paper.title, paper.abstract, paper.full_text
+        texts = {}
+        
+        if title:
+            texts["title"] = [title]
+        if abstract:
+            texts["abstract"] = [abstract]
+        if full_text:
+            texts["full_text"] = self._create_text_chunks(full_text)
+        
+        if title and abstract:
+            texts["document"] = [f"{title} {abstract}"]
+        elif title or abstract:
+            texts["document"] = [title or abstract]
+        
+        return texts
+    
     def _calculate_text_hash(self, text: str) -> str:
-        """Calculate hash for text to enable caching"""
-        return hashlib.md5(text.encode('utf-8')).hexdigest()
+        """Calculate a 128-bit hash for text to enable caching
+        
+        Uses SIMD BLAKE3 when installed, otherwise stdlib BLAKE2b; keys are
+        only comparable between runs using the same backend.
+        """
+        data = text.encode('utf-8')
+        if BLAKE3_AVAILABLE:
+            return blake3.blake3(data).hexdigest(16)
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
     
     def _validate_embedding(self, embedding: np.ndarray) -> bool:
         """
-        Validate embedding quality
+        Validate embedding quality in one pass over the vector
         """
-        if embedding is None or len(embedding) == 0:
+        # Check embedding dimension (typically 384 for all-MiniLM-L6-v2)
+        if embedding is None or len(embedding) < 100:  # Reasonable minimum dimension
             return False
         
-        # Check for NaN or infinite values
-        if np.any(np.isnan(embedding)) or np.any(np.isinf(embedding)):
-            return False
+        # NaN or infinite values propagate into the squared norm; an all-zero
+        # vector leaves it at zero
+        squared_norm = float(np.dot(embedding, embedding))
+        return bool(np.isfinite(squared_norm)) and squared_norm > 1e-16
+    
+    def _gather_all_segments(self, papers: List[Paper]) -> Iterator[Tuple[int, str, int, str]]:
+        """
+        Yield (paper_idx, section, chunk_idx, text) for every text segment of the papers
+        """
+        for paper_idx, paper in enumerate(papers):
+            for section, texts in self._prepare_texts(paper).items():
+                for chunk_idx, text in enumerate(texts):
+                    yield paper_idx, section, chunk_idx, text
+    
+    def _encode_length_sorted(self,
+                              texts: List[str],
+                              token_ids: Optional[List[np.ndarray]] = None) -> np.ndarray:
+        """
+        Encode texts in token-length order so each mini-batch pads to similar lengths,
+        returning embeddings in the original text order
         
-        # Check if embedding is all zeros
-        if np.allclose(embedding, 0):
-            return False
+        The model manager does the ordering and token-budgeted batching; this
+        supplies token ids from the cache so texts are not tokenized again.
+        """
+        if self.config.cache_token_ids:
+            if token_ids is None:
+                token_ids = self._get_token_ids(texts)
+            
+            # Texts are tokenized once here; the model only runs its forward pass
+            return self.model_manager.generate_embeddings_from_ids(
+                token_ids,
+                batch_size=self.config.smart_batch_size
+            )
         
-        # Check embedding dimension (typically 384 for all-MiniLM-L6-v2)
-        if len(embedding) < 100:  # Reasonable minimum dimension
-            return False
+        return self.model_manager.generate_embeddings(
+            texts,
+            batch_size=self.config.smart_batch_size
+        )
+    
+    def _get_token_ids(self,
+                       texts: List[str],
+                       text_hashes: Optional[List[str]] = None) -> List[np.ndarray]:
+        """
+        Get token ids for texts from the token cache, tokenizing and storing only misses
+        """
+        if text_hashes is None:
+            text_hashes = [self._calculate_text_hash(text) for text in texts]
+        tokenizer = self.model_manager.config.embedding_model_name
+        
+        try:
+            token_ids = self.embedding_repo.get_token_ids(text_hashes, tokenizer)
+        except Exception as e:
+            logger.warning(f"Token cache lookup failed: {e}")
+            token_ids = {}
+        
+        missing = [i for i, text_hash in enumerate(text_hashes) if text_hash not in token_ids]
+        if missing:
+            tokenized = self.model_manager.tokenize([texts[i] for i in missing])
+            new_ids = {
+                text_hashes[i]: np.asarray(ids, dtype=np.int32)
+                for i, ids in zip(missing, tokenized)
+            }
+            try:
+                self.embedding_repo.store_token_ids(new_ids, tokenizer)
+            except Exception as e:
+                logger.warning(f"Failed to store token ids: {e}")
+            token_ids.update(new_ids)
+        
+        logger.debug(f"Token cache: {len(texts) - len(missing)}/{len(texts)} texts pre-tokenized")
+        
+        return [token_ids[text_hash] for text_hash in text_hashes]
+    
+    def _text_cache_key(self) -> str:
+        """
+        Key of this model's vectors in the text embedding cache. The same model
+        yields fp16, int8 or fp32 vectors depending on the host, so the
+        precision is part of the key.
+        """
+        return (f"{self.model_manager.config.embedding_model_name}"
+                f":{self.model_manager.embedding_precision()}")
+    
+    def _static_sections(self) -> set:
+        """Sections embedded by the static model, when model2vec is installed"""
+        return set(self.config.static_sections) if MODEL2VEC_AVAILABLE else set()
+    
+    def _prepare_model_inputs(self, segments: List[Tuple[int, str, int, str]]) -> ModelInputs:
+        """
+        Look up the transformer-routed segments in the text embedding cache,
+        hashing each text once, and tokenize only the misses
+        """
+        static_sections = self._static_sections()
+        positions = [i for i, segment in enumerate(segments) if segment[1] not in static_sections]
+        inputs = ModelInputs(stored={}, positions=positions)
+        if not positions:
+            return inputs
+        
+        if self.config.cache_text_embeddings:
+            text_hashes = [self._calculate_text_hash(segments[i][3]) for i in positions]
+            try:
+                found = self.embedding_repo.get_text_embeddings(text_hashes, self._text_cache_key())
+            except Exception as e:
+                logger.warning(f"Text embedding cache lookup failed: {e}")
+                found = {}
+            
+            inputs.positions, inputs.text_hashes = [], []
+            for position, text_hash in zip(positions, text_hashes):
+                if text_hash in found:
+                    inputs.stored[position] = found[text_hash]
+                else:
+                    inputs.positions.append(position)
+                    inputs.text_hashes.append(text_hash)
+            
+            self.stats["text_cache_hits"] += len(inputs.stored)
+            logger.debug(f"Text embedding cache: {len(inputs.stored)}/{len(positions)} texts reused")
+        
+        if self.config.cache_token_ids and inputs.positions:
+            try:
+                inputs.token_ids = self._get_token_ids(
+                    [segments[i][3] for i in inputs.positions], inputs.text_hashes
+                )
+            except Exception as e:
+                # The encode stage tokenizes for itself
+                logger.warning(f"Failed to pre-tokenize batch: {e}")
         
-        return True
+        return inputs
+    
+    def _encode_segments(self,
+                         segments: List[Tuple[int, str, int, str]],
+                         inputs: Optional[ModelInputs] = None) -> List[np.ndarray]:
+        """
+        Encode segments in their original order, routing static sections such as
+        full-text chunks to model2vec and the rest to the transformer.
+        
+        inputs, from _prepare_model_inputs, carries the cached vectors and the
+        token ids of the rest; the transformer encodes only the cache misses,
+        which are then stored for later runs.
+        """
+        if inputs is None:
+            inputs = self._prepare_model_inputs(segments)
+        
+        embeddings: List[Optional[np.ndarray]] = [None] * len(segments)
+        for position, embedding in inputs.stored.items():
+            embeddings[position] = embedding
+        
+        if inputs.positions:
+            encoded = self._encode_length_sorted(
+                [segments[i][3] for i in inputs.positions], inputs.token_ids
+            )
+            for position, embedding in zip(inputs.positions, encoded):
+                embeddings[position] = embedding
+            
+            if inputs.text_hashes is not None:
+                new_embeddings = {
+                    text_hash: embedding
+                    for text_hash, embedding in zip(inputs.text_hashes, encoded)
+                    if self._validate_embedding(embedding)
+                }
+                try:
+                    self.embedding_repo.store_text_embeddings(new_embeddings, self._text_cache_key())
+                except Exception as e:
+                    logger.warning(f"Failed to store text embeddings: {e}")
+        
+        static_sections = self._static_sections()
+        static_positions = [i for i, segment in enumerate(segments) if segment[1] in static_sections]
+        if static_positions:
+            encoded = self.model_manager.generate_static_embeddings(
+                [segments[i][3] for i in static_positions]
+            )
+            for position, embedding in zip(static_positions, encoded):
+                embeddings[position] = embedding
+        
+        return embeddings
     
     def generate_paper_embeddings(self, paper: Paper) -> Dict[str, Any]:
         """
         Generate embeddings for a single paper
         """
+        results = self._generate_embeddings([paper], raise_errors=True)
+        return results[0] if results else None
+    
+    def generate_batch_embeddings(self, papers: List[Paper]) -> List[Dict[str, Any]]:
+        """
+        Generate embeddings for multiple papers with optimized batch processing
+        """
+        if not papers:
+            return []
+        
         start_time = time.time()
+        logger.info(f"Generating embeddings for {len(papers)} papers")
+        
+        results = self._generate_pipelined(papers)
+        
+        total_time = time.time() - start_time
+        logger.info(f"Batch embedding generation completed: {len(results)} papers in {total_time:.2f}s "
+                   f"({len(results)/total_time:.1f} papers/sec)")
+        
+        return results
+    
+    def _generate_pipelined(self, papers: List[Paper]) -> List[Dict[str, Any]]:
+        """
+        Embed papers in a three-stage pipeline joined by bounded queues.
+        
+        A worker thread prefetches cached embeddings and text cache hits and
+        tokenizes the remaining texts of each batch, this thread runs the model, and a second worker writes results to the
+        database, so I/O and tokenization overlap the forward pass.
+        """
+        batch_size = self.config.pipeline_batch_papers
+        results: List[Optional[Dict[str, Any]]] = [None] * len(papers)
+        prepared_batches: queue.Queue = queue.Queue(maxsize=self.config.pipeline_queue_size)
+        pending_writes: queue.Queue = queue.Queue(maxsize=self.config.pipeline_queue_size * batch_size)
         
+        def prepare_stage() -> None:
+            try:
+                for batch_start in range(0, len(papers), batch_size):
+                    batch = papers[batch_start:batch_start + batch_size]
+                    try:
+                        existing_embeddings = self.embedding_repo.get_by_paper_ids([paper.id for paper in batch])
+                    except Exception as e:
+                        logger.error(f"Failed to look up existing embeddings: {e}")
+                        existing_embeddings = {}
+                    
+                    cached, pending = self._split_cached(batch, existing_embeddings)
+                    for batch_idx, result in enumerate(cached):
+                        if result:
+                            results[batch_start + batch_idx] = result
+                    
+                    pending_papers = [batch[batch_idx] for batch_idx in pending]
+                    segments, text_counts = self._prepare_segments(pending_papers)
+                    inputs = self._prepare_model_inputs(segments)
+                    
+                    prepared_batches.put((
+                        [batch_start + batch_idx for batch_idx in pending],
+                        pending_papers, segments, text_counts, inputs
+                    ))
+            except Exception as e:
+                logger.error(f"Embedding prefetch stage failed: {e}")
+            finally:
+                prepared_batches.put(None)
+        
+        def write_stage() -> None:
+            while (item := pending_writes.get()) is not None:
+                paper_idx, section_embeddings, text_count, processing_time = item
+                try:
+                    results[paper_idx] = self._store_paper_embeddings(
+                        papers[paper_idx], section_embeddings, text_count, processing_time
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to store embeddings for paper {papers[paper_idx].id}: {e}")
+        
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="embedding-pipeline") as executor:
+            executor.submit(prepare_stage)
+            executor.submit(write_stage)
+            
+            item: Any = ()
+            try:
+                while (item := prepared_batches.get()) is not None:
+                    paper_indices, pending_papers, segments, text_counts, inputs = item
+                    encode_start = time.time()
+                    try:
+                        embedded = self._embed_segments(pending_papers, segments, text_counts, inputs)
+                    except Exception:
+                        continue
+                    
+                    if not embedded:
+                        continue
+                    # Batch time is shared evenly across the papers it embedded
+                    processing_time = (time.time() - encode_start) / len(embedded)
+                    for pending_idx, section_embeddings, text_count in embedded:
+                        pending_writes.put((paper_indices[pending_idx], section_embeddings,
+                                            text_count, processing_time))
+            finally:
+                # Unblock the prefetch stage if encoding stopped early, then stop the writer
+                while item is not None:
+                    item = prepared_batches.get()
+                pending_writes.put(None)
+        
+        if self._index_dirty:
+            self._save_index()
+        
+        return [result for result in results if result]
+    
+    def _generate_embeddings(self, papers: List[Paper], raise_errors: bool) -> List[Dict[str, Any]]:
+        """
+        Embed the segments of all papers in one length-sorted model pass.
+        
+        Texts from every uncached paper are encoded together, so short titles
+        batch with other short titles instead of being padded per paper.
+        """
+        start_time = time.time()
+        
+        # Serve papers whose embeddings are current from the repository, in one query
         try:
-            # Check if embeddings already exist
-            existing_embedding = self.embedding_repo.get_by_paper_id(paper.id)
+            existing_embeddings = self.embedding_repo.get_by_paper_ids([paper.id for paper in papers])
+        except Exception as e:
+            logger.error(f"Failed to look up existing embeddings: {e}")
+            if raise_errors:
+                raise
+            existing_embeddings = {}
+        
+        results, pending = self._split_cached(papers, existing_embeddings)
+        
+        try:
+            embedded = self._embed_papers([papers[paper_idx] for paper_idx in pending])
+        except Exception:
+            if raise_errors:
+                raise
+            return [result for result in results if result]
+        
+        if embedded:
+            # Batch time is shared evenly across the papers it embedded
+            processing_time = (time.time() - start_time) / len(embedded)
+        for pending_idx, section_embeddings, text_count in embedded:
+            paper = papers[pending[pending_idx]]
+            try:
+                results[pending[pending_idx]] = self._store_paper_embeddings(
+                    paper,
+                    section_embeddings,
+                    text_count,
+                    processing_time
+                )
+            except Exception as e:
+                logger.error(f"Failed to store embeddings for paper {paper.id}: {e}")
+                if raise_errors:
+                    raise
+        
+        if self._index_dirty:
+            self._save_index()
+        
+        return [result for result in results if result]
+    
+    async def generate_batch_embeddings_async(self,
+                                              papers: List[Paper],
+                                              papers_per_batch: int = 64) -> List[Dict[str, Any]]:
+        """
+        Generate embeddings for multiple papers, overlapping database I/O with encoding.
+        
+        Existing embeddings are prefetched in one query, then papers are encoded in
+        sub-batches on a worker thread while the previous sub-batch's writes run on
+        the database executor's pooled connections.
+        
+        Args:
+            papers: List of papers to process
+            papers_per_batch: Papers encoded per model pass
+            
+        Returns:
+            List of embedding results
+        """
+        if not papers:
+            return []
+        
+        start_time = time.time()
+        try:
+            existing_embeddings = await self.embedding_repo.get_by_paper_ids_async(
+                [paper.id for paper in papers]
+            )
+        except Exception as e:
+            logger.error(f"Failed to look up existing embeddings: {e}")
+            existing_embeddings = {}
+        
+        results, pending = self._split_cached(papers, existing_embeddings)
+        
+        loop = asyncio.get_running_loop()
+        writes = []
+        for batch_start in range(0, len(pending), papers_per_batch):
+            batch = pending[batch_start:batch_start + papers_per_batch]
+            encode_start = time.time()
+            try:
+                embedded = await loop.run_in_executor(
+                    None, self._embed_papers, [papers[paper_idx] for paper_idx in batch]
+                )
+            except Exception:
+                continue
+            
+            if not embedded:
+                continue
+            processing_time = (time.time() - encode_start) / len(embedded)
+            for pending_idx, section_embeddings, text_count in embedded:
+                paper_idx = batch[pending_idx]
+                # Scheduled now, awaited later: writes overlap the next encode
+                writes.append((paper_idx, asyncio.ensure_future(self._store_paper_embeddings_async(
+                    papers[paper_idx], section_embeddings, text_count, processing_time
+                ))))
+        
+        for paper_idx, write in writes:
+            try:
+                results[paper_idx] = await write
+            except Exception as e:
+                logger.error(f"Failed to store embeddings for paper {papers[paper_idx].id}: {e}")
+        
+        if self._index_dirty:
+            self._save_index()
+        
+        logger.info(f"Completed async batch processing: {sum(1 for r in results if r)}/{len(papers)} "
+                   f"papers in {time.time() - start_time:.2f}s")
+        
+        return [result for result in results if result]
+    
+    def _split_cached(self,
+                      papers: List[Paper],
+                      existing_embeddings: Dict[str, Embedding]
+                      ) -> Tuple[List[Optional[Dict[str, Any]]], List[int]]:
+        """
+        Fill results for papers with current stored embeddings; return the rest's indices
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(papers)
+        pending = []
+        for paper_idx, paper in enumerate(papers):
+            existing_embedding = existing_embeddings.get(paper.id)
             if existing_embedding and existing_embedding.model_version == self.config.model_version:
                 logger.debug(f"Using cached embeddings for paper {paper.id}")
                 self.stats["cache_hits"] += 1
-                return existing_embedding.to_dict()
-            
-            self.stats["cache_misses"] += 1
-            
-            # Prepare texts for embedding
-            section_texts = self._prepare_texts_for_embedding(paper)
-            
-            if not section_texts:
+                results[paper_idx] = self._cached_result(existing_embedding)
+            else:
+                self.stats["cache_misses"] += 1
+                pending.append(paper_idx)
+        return results, pending
+    
+    def _embed_papers(self, papers: List[Paper]) -> List[Tuple[int, Dict[str, List[np.ndarray]], int]]:
+        """
+        Encode the segments of papers in one length-sorted model pass.
+        
+        Returns (paper index, section embeddings, text count) for every paper
+        that had text; raises if the model pass fails.
+        """
+        segments, text_counts = self._prepare_segments(papers)
+        return self._embed_segments(papers, segments, text_counts)
+    
+    def _prepare_segments(self, papers: List[Paper]) -> Tuple[List[Tuple[int, str, int, str]], Dict[int, int]]:
+        """
+        Gather the text segments of papers and count them per paper
+        """
+        segments = list(self._gather_all_segments(papers))
+        
+        text_counts: Dict[int, int] = {}
+        for paper_idx, _, _, _ in segments:
+            text_counts[paper_idx] = text_counts.get(paper_idx, 0) + 1
+        for paper_idx, paper in enumerate(papers):
+            if paper_idx not in text_counts:
                 logger.warning(f"No text content found for paper {paper.id}")
-                return None
-            
-            # Generate embeddings for each section
-            section_embeddings = {}
-            all_texts = []
-            text_to_section = {}
-            
-            # Collect all texts for batch processing
-            for section, texts in section_texts.items():
-                for i, text in enumerate(texts):
-                    all_texts.append(text)
-                    text_to_section[len(all_texts) - 1] = (section, i)
-            
-            if not all_texts:
-                logger.warning(f"No valid texts to embed for paper {paper.id}")
-                return None
-            
-            # Generate embeddings in batch
-            logger.debug(f"Generating embeddings for {len(all_texts)} text segments")
-            embeddings = self.model_manager.generate_embeddings(
-                all_texts, 
-                batch_size=self.config.batch_size
-            )
+        
+        return segments, text_counts
+    
+    def _embed_segments(self,
+                        papers: List[Paper],
+                        segments: List[Tuple[int, str, int, str]],
+                        text_counts: Dict[int, int],
+                        inputs: Optional[ModelInputs] = None
+                        ) -> List[Tuple[int, Dict[str, List[np.ndarray]], int]]:
+        """
+        Encode prepared segments and route the embeddings back to their papers
+        """
+        if not segments:
+            return []
+        
+        try:
+            logger.debug(f"Generating embeddings for {len(segments)} text segments "
+                        f"from {len(text_counts)} papers")
+            embeddings = self._encode_segments(segments, inputs)
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings for {len(text_counts)} papers: {e}")
+            raise
+        
+        # Route embeddings back to their paper and section, kept as float32 arrays
+        paper_sections: Dict[int, Dict[str, List[np.ndarray]]] = {}
+        for (paper_idx, section, _, _), embedding in zip(segments, embeddings):
+            if not self._validate_embedding(embedding):
+                logger.warning(f"Invalid embedding generated for paper "
+                              f"{papers[paper_idx].id} ({section})")
+                continue
+            paper_sections.setdefault(paper_idx, {}).setdefault(section, []).append(embedding)
+        
+        return [
+            (paper_idx, paper_sections.get(paper_idx, {}), text_count)
+            for paper_idx, text_count in text_counts.items()
+        ]
+    
+    def _cached_result(self, embedding: Embedding) -> Dict[str, Any]:
+        """
+        Shape a stored embedding like a freshly generated result
+        """
+        return {
+            "paper_id": embedding.paper_id,
+            "sections": {"document_average": embedding.embedding},
+            "model_version": embedding.model_version,
+            "generation_time": 0.0,
+            "text_count": 0
+        }
+    
+    def _build_embedding_data(self,
+                              paper: Paper,
+                              section_embeddings: Dict[str, Any],
+                              text_count: int,
+                              processing_time: float) -> Dict[str, Any]:
+        """
+        Add the document average to a paper's section embeddings
+        """
+        # Create document-level embedding (average of all embeddings from the main model)
+        if section_embeddings:
+            static_sections = self._static_sections()
             
-            # Organize embeddings by section
-            for idx, embedding in enumerate(embeddings):
-                if not self._validate_embedding(embedding):
-                    logger.warning(f"Invalid embedding generated for text {idx}")
+            # Running sum instead of stacking every section vector into one array
+            sum_vec: Optional[np.ndarray] = None
+            count = 0
+            for section, section_embs in section_embeddings.items():
+                if section in static_sections:
                     continue
-                
-                section, text_idx = text_to_section[idx]
-                
-                if section not in section_embeddings:
-                    section_embeddings[section] = []
-                
-                section_embeddings[section].append(embedding.tolist())
+                for embedding in section_embs:
+                    if sum_vec is None:
+                        sum_vec = np.array(embedding, dtype=np.float32)
+                    else:
+                        sum_vec += embedding
+                    count += 1
             
-            # Create document-level embedding (average of all embeddings)
-            if section_embeddings:
-                all_embeddings = []
-                for section_embs in section_embeddings.values():
-                    all_embeddings.extend(section_embs)
+            if count:
+                document_embedding = sum_vec / count
                 
-                if all_embeddings:
-                    document_embedding = np.mean(all_embeddings, axis=0)
-                    
-                    if self._validate_embedding(document_embedding):
-                        section_embeddings["document_average"] = document_embedding.tolist()
-            
-            # Store embeddings in database
-            embedding_data = {
-                "paper_id": paper.id,
-                "sections": section_embeddings,
-                "model_version": self.config.model_version,
-                "generation_time": time.time() - start_time,
-                "text_count": len(all_texts)
-            }
+                if self._validate_embedding(document_embedding):
+                    # Unit length, so cosine similarity is a plain dot product
+                    document_embedding /= np.linalg.norm(document_embedding) + 1e-12
+                    section_embeddings["document_average"] = document_embedding
+        
+        embedding_data = {
+            "paper_id": paper.id,
+            "sections": section_embeddings,
+            "model_version": self.config.model_version,
+            "generation_time": processing_time,
+            "text_count": text_count
+        }
+        
+        return embedding_data
+    
+    def _store_paper_embeddings(self,
+                                paper: Paper,
+                                section_embeddings: Dict[str, Any],
+                                text_count: int,
+                                processing_time: float) -> Dict[str, Any]:
+        """
+        Add the document average to a paper's section embeddings and save them
+        """
+        embedding_data = self._build_embedding_data(paper, section_embeddings, text_count, processing_time)
+        
+        # Save to database; the repository stores vectors int8-quantized
+        self.embedding_repo.create_or_update(
+            paper_id=paper.id,
+            embedding_data=embedding_data["sections"],
+            model_version=self.config.model_version
+        )
+        self._record_stored(embedding_data)
+        
+        return embedding_data
+    
+    async def _store_paper_embeddings_async(self,
+                                            paper: Paper,
+                                            section_embeddings: Dict[str, Any],
+                                            text_count: int,
+                                            processing_time: float) -> Dict[str, Any]:
+        """
+        Async _store_paper_embeddings; the write runs on the database executor
+        """
+        embedding_data = self._build_embedding_data(paper, section_embeddings, text_count, processing_time)
+        
+        await self.embedding_repo.create_or_update_async(
+            paper_id=paper.id,
+            embedding_data=embedding_data["sections"],
+            model_version=self.config.model_version
+        )
+        self._record_stored(embedding_data)
+        
+        return embedding_data
+    
+    def _record_stored(self, embedding_data: Dict[str, Any]) -> None:
+        """
+        Update the similarity caches and stats after a paper's embeddings are saved
+        """
+        paper_id = embedding_data["paper_id"]
+        self._similarity = None
+        self._add_to_index(paper_id, embedding_data["sections"].get("document_average"))
+        
+        self.stats["embeddings_generated"] += 1
+        self.stats["total_processing_time"] += embedding_data["generation_time"]
+        
+        logger.info(f"Generated embeddings for paper {paper_id} ({embedding_data['text_count']} segments)")
+    
+    def _index_paths(self) -> Tuple[Path, Path]:
+        """Paths of the persisted HNSW index and its paper ID list"""
+        stem = "similarity_" + "".join(
+            c if c.isalnum() or c in "-_." else "_" for c in self.config.model_version
+        )
+        index_dir = Path(self.config.index_dir)
+        return index_dir / f"{stem}.faiss", index_dir / f"{stem}.json"
+    
+    def _get_index(self):
+        """
+        Return the HNSW index, loading it from disk or building it on first use
+        """
+        if not (FAISS_AVAILABLE and self.config.use_ann_index):
+            return None
+        
+        if self._index is None and not self._load_index():
+            matrix, paper_ids, invalid_count = self._get_similarity_matrix()
+            if not len(paper_ids):
+                return None
             
-            # Save to database
-            self.embedding_repo.create_or_update(
-                paper_id=paper.id,
-                embedding_data=section_embeddings,
-                model_version=self.config.model_version
-            )
+            index = faiss.IndexHNSWFlat(matrix.shape[1], self.config.hnsw_m,
+                                        faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.config.hnsw_ef_construction
+            index.add(matrix)
             
-            processing_time = time.time() - start_time
-            self.stats["embeddings_generated"] += 1
-            self.stats["total_processing_time"] += processing_time
+            self._index = index
+            self._index_ids = list(paper_ids)
+            self._index_id_set = set(paper_ids)
+            self._index_invalid = invalid_count
+            self._save_index()
+            logger.info(f"Built HNSW index with {index.ntotal} embeddings")
+        
+        self._index.hnsw.efSearch = self.config.hnsw_ef_search
+        return self._index
+    
+    def _load_index(self) -> bool:
+        """
+        Load the persisted index if it still covers every stored embedding.
+        
+        The index is current when its valid vectors plus the invalid ones it
+        skipped add up to the stored count and no embedding was written since.
+        """
+        index_path, ids_path = self._index_paths()
+        if not index_path.exists() or not ids_path.exists():
+            return False
+        
+        try:
+            index = faiss.read_index(str(index_path))
+            with open(ids_path) as f:
+                saved = json.load(f)
             
-            logger.info(f"Generated embeddings for paper {paper.id} in {processing_time:.2f}s "
-                       f"({len(all_texts)} segments)")
+            stored_count, writes = self.embedding_repo.get_embedding_fingerprint(
+                self.config.model_version
+            )
+            if (index.ntotal != len(saved["paper_ids"])
+                    or index.ntotal + saved["invalid_count"] != stored_count
+                    or saved["writes"] != writes):
+                logger.info("Persisted HNSW index is stale, rebuilding")
+                return False
             
-            return embedding_data
+            self._index = index
+            self._index_ids = saved["paper_ids"]
+            self._index_id_set = set(self._index_ids)
+            self._index_invalid = saved["invalid_count"]
+            logger.debug(f"Loaded HNSW index with {index.ntotal} embeddings")
+            return True
             
         except Exception as e:
-            logger.error(f"Failed to generate embeddings for paper {paper.id}: {e}")
-            raise
+            logger.warning(f"Could not load HNSW index: {e}")
+            return False
     
-    def generate_batch_embeddings(self, papers: List[Paper]) -> List[Dict[str, Any]]:
+    def _save_index(self) -> None:
+        """Persist the index with its paper IDs and the fingerprint of the embeddings it covers"""
+        index_path, ids_path = self._index_paths()
+        try:
+            _, writes = self.embedding_repo.get_embedding_fingerprint(self.config.model_version)
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            faiss.write_index(self._index, str(index_path))
+            with open(ids_path, "w") as f:
+                json.dump({
+                    "paper_ids": self._index_ids,
+                    "invalid_count": self._index_invalid,
+                    "writes": writes
+                }, f)
+            self._index_dirty = False
+        except Exception as e:
+            logger.warning(f"Could not save HNSW index: {e}")
+    
+    def _add_to_index(self, paper_id: str, vector: Optional[List[float]]) -> None:
         """
-        Generate embeddings for multiple papers with optimized batch processing
+        Add a newly stored paper to a loaded index; a re-embedded paper forces a rebuild
         """
-        if not papers:
-            return []
-        
-        start_time = time.time()
-        logger.info(f"Generating embeddings for {len(papers)} papers")
+        if self._index is None:
+            return
         
-        results = []
+        if vector is None or paper_id in self._index_id_set:
+            # HNSW cannot replace vectors in place
+            self._index = None
+            self._index_ids = []
+            self._index_id_set = set()
+            self._index_dirty = False  # Nothing left to save; rebuilt on the next search
+            return
         
-        # Process papers individually but with optimized batching within each paper
-        for i, paper in enumerate(papers):
-            try:
-                result = self.generate_paper_embeddings(paper)
-                if result:
-                    results.append(result)
-                
-                # Log progress for large batches
-                if (i + 1) % 10 == 0:
-                    elapsed = time.time() - start_time
-                    remaining = len(papers) - (i + 1)
-                    eta = (elapsed / (i + 1)) * remaining
-                    logger.info(f"Processed {i + 1}/{len(papers)} papers "
-                               f"(ETA: {eta:.1f}s)")
-                
-            except Exception as e:
-                logger.error(f"Failed to process paper {paper.id}: {e}")
-                continue
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        if not np.isfinite(norm) or not norm:
+            # Dropped from the similarity matrix too; counted so the index stays current
+            self._index_invalid += 1
+        else:
+            self._index.add(vector / norm)
+            self._index_ids.append(paper_id)
+            self._index_id_set.add(paper_id)
+        self._index_dirty = True
+    
+    def _get_similarity_matrix(self) -> Tuple[np.ndarray, List[str], int]:
+        """
+        Load stored vectors once as an L2-normalized float32 matrix, returned
+        with the paper IDs of its rows and the number of invalid rows dropped
+        """
+        similarity = self._similarity
+        if similarity is None:
+            paper_ids, matrix = self.embedding_repo.get_all_vectors(self.config.model_version)
+            stored_count = len(paper_ids)
+            
+            if len(paper_ids):
+                norms = np.linalg.norm(matrix, axis=1)
+                valid = np.isfinite(norms) & (norms > 0)
+                matrix = matrix[valid] / norms[valid, None]
+                paper_ids = [paper_id for paper_id, keep in zip(paper_ids, valid) if keep]
+            
+            # C-contiguous so scoring streams the rows straight into BLAS
+            similarity = (np.ascontiguousarray(matrix, dtype=self.config.similarity_dtype),
+                          paper_ids, stored_count - len(paper_ids))
+            self._similarity = similarity
+            logger.debug(f"Loaded similarity matrix with {len(paper_ids)} embeddings")
         
-        total_time = time.time() - start_time
-        logger.info(f"Batch embedding generation completed: {len(results)} papers in {total_time:.2f}s "
-                   f"({len(results)/total_time:.1f} papers/sec)")
+        return similarity
+    
+    def _score_matrix(self, matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of a unit float32 query against every matrix row
+        """
+        # Per call, so concurrent searches never share a buffer
+        scores = np.empty(len(matrix), dtype=np.float32)
+        if matrix.dtype == np.float32:
+            # One matrix-vector product scores every paper
+            return np.dot(matrix, query, out=scores)
         
-        return results
+        # NumPy has no half-precision BLAS: upcast cache-sized blocks into a
+        # float32 buffer and run sgemv on each
+        rows = self.config.similarity_block_rows
+        block = np.empty((min(rows, len(matrix)), matrix.shape[1]), dtype=np.float32)
+        for start in range(0, len(matrix), rows):
+            half_block = matrix[start:start + rows]
+            np.copyto(block[:len(half_block)], half_block)
+            np.dot(block[:len(half_block)], query, out=scores[start:start + len(half_block)])
+        return scores
     
     def find_similar_papers(self, 
                            query_embedding: np.ndarray, 
@@ -296,62 +1022,70 @@ class EmbeddingGenerator:
         Find papers similar to the query embedding using cosine similarity
         """
         try:
-            # Get all embeddings from database
-            all_embeddings = self.embedding_repo.get_all_embeddings()
+            index = self._get_index()
+            if index is not None:
+                return self._search_index(index, query_embedding, top_k, threshold)
             
-            if not all_embeddings:
+            matrix, paper_ids, _ = self._get_similarity_matrix()
+            
+            if not len(paper_ids):
                 logger.warning("No embeddings found in database")
                 return []
             
-            similarities = []
+            query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+            query_norm = np.linalg.norm(query)
+            if not query_norm:
+                return []
             
-            for embedding_record in all_embeddings:
-                # Use document-level embedding if available, otherwise use average
-                paper_embedding = None
-                
-                if "document_average" in embedding_record.embedding_data:
-                    paper_embedding = np.array(embedding_record.embedding_data["document_average"])
-                elif "document" in embedding_record.embedding_data:
-                    paper_embedding = np.array(embedding_record.embedding_data["document"][0])
-                
-                if paper_embedding is not None and self._validate_embedding(paper_embedding):
-                    # Calculate cosine similarity
-                    similarity = np.dot(query_embedding, paper_embedding) / (
-                        np.linalg.norm(query_embedding) * np.linalg.norm(paper_embedding)
-                    )
-                    
-                    if similarity >= threshold:
-                        similarities.append((embedding_record.paper_id, float(similarity)))
+            similarities = self._score_matrix(matrix, query / query_norm)
+            
+            candidates = np.flatnonzero(similarities >= threshold)
+            if len(candidates) > top_k:
+                top = np.argpartition(-similarities[candidates], top_k - 1)[:top_k]
+                candidates = candidates[top]
+            candidates = candidates[np.argsort(-similarities[candidates], kind="stable")]
             
-            # Sort by similarity and return top k
-            similarities.sort(key=lambda x: x[1], reverse=True)
-            return similarities[:top_k]
+            return [(paper_ids[i], float(similarities[i])) for i in candidates]
             
         except Exception as e:
             logger.error(f"Failed to find similar papers: {e}")
             return []
     
+    def _search_index(self,
+                      index,
+                      query_embedding: np.ndarray,
+                      top_k: int,
+                      threshold: float) -> List[Tuple[str, float]]:
+        """
+        Approximate top-k search; inner products of normalized vectors are cosines
+        """
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+        query_norm = np.linalg.norm(query)
+        if not query_norm:
+            return []
+        
+        scores, positions = index.search(query / query_norm, min(top_k, index.ntotal))
+        return [
+            (self._index_ids[position], float(score))
+            for score, position in zip(scores[0], positions[0])
+            if position >= 0 and score >= threshold
+        ]
+    
     def get_paper_embedding(self, paper_id: str, section: str = "document_average") -> Optional[np.ndarray]:
         """
         Get embedding for a specific paper and section
         """
         try:
-            embedding_record = self.embedding_repo.get_by_paper_id(paper_id)
+            if section == "document_average":
+                embedding_record = self.embedding_repo.get_by_paper(paper_id)
+                return embedding_record.embedding if embedding_record else None
             
-            if not embedding_record:
+            # Single-vector sections come back as a vector, chunked ones as (chunks, dim)
+            vectors = self.embedding_repo.get_section_embeddings(paper_id).get(section)
+            if vectors is None:
                 return None
-            
-            if section in embedding_record.embedding_data:
-                embedding = embedding_record.embedding_data[section]
-                
-                # Handle list of embeddings (return first one)
-                if isinstance(embedding, list) and len(embedding) > 0:
-                    if isinstance(embedding[0], list):
-                        embedding = embedding[0]
-                
-                return np.array(embedding)
-            
-            return None
+            vectors = vectors.astype(np.float32)
+            return vectors[0] if len(vectors) == 1 else vectors
             
         except Exception as e:
             logger.error(f"Failed to get embedding for paper {paper_id}: {e}")
@@ -393,17 +1127,30 @@ class EmbeddingGenerator:
         return stats
 
 
+# Generator reused by the convenience functions, keyed by repository and config
+_generators: Dict[Tuple[int, str], EmbeddingGenerator] = {}
+
+def _get_generator(embedding_repo: EmbeddingRepository,
+                   config: Optional[EmbeddingConfig] = None) -> EmbeddingGenerator:
+    """Get the cached generator so repeated calls keep its similarity index and stats"""
+    config = config or EmbeddingConfig()
+    key = (id(embedding_repo), json.dumps(asdict(config), sort_keys=True))
+    
+    generator = _generators.get(key)
+    if generator is None or generator.embedding_repo is not embedding_repo:
+        _generators.clear()
+        generator = _generators[key] = EmbeddingGenerator(embedding_repo, config)
+    return generator
+
 # Convenience functions
 def generate_paper_embeddings(paper: Paper, 
                             embedding_repo: EmbeddingRepository,
                             config: Optional[EmbeddingConfig] = None) -> Dict[str, Any]:
     """Convenience function to generate embeddings for a single paper"""
-    generator = EmbeddingGenerator(embedding_repo, config)
-    return generator.generate_paper_embeddings(paper)
+    return _get_generator(embedding_repo, config).generate_paper_embeddings(paper)
 
 def generate_batch_embeddings(papers: List[Paper],
                             embedding_repo: EmbeddingRepository, 
                             config: Optional[EmbeddingConfig] = None) -> List[Dict[str, Any]]:
     """Convenience function to generate embeddings for multiple papers"""
-    generator = EmbeddingGenerator(embedding_repo, config)
-    return generator.generate_batch_embeddings(papers)
\ No newline at end of file
+    return _get_generator(embedding_repo, config).generate_batch_embeddings(papers)
@@ -5,19 +5,44 @@ This module handles the extraction of biomedical entities from literature papers
 using spaCy biomedical models optimized for protein design research.
 """
 
+import functools
+import hashlib
 import logging
 import time
-from typing import List, Dict, Any, Optional, Set, Tuple
+from collections import Counter, OrderedDict
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable, Iterable
 from dataclasses import dataclass
 from enum import Enum
 import re
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+from core.config import config as app_config
 from core.models import Paper, Entity
 from core.repository import EntityRepository
-from processing.ml_models import get_model_manager
+from processing.ml_models import EntitySpan, get_model_manager
 
 logger = logging.getLogger(__name__)
 
+# Patterns used per entity, compiled once
+_TRIM_RE = re.compile(r'^[^\w]+|[^\w]+$')
+# ASCII characters outside \w; str.strip with these matches _TRIM_RE on ASCII text
+_ASCII_NON_WORD = ''.join(c for c in map(chr, range(128)) if not (c.isalnum() or c == '_'))
+
+# Protein name patterns (basic patterns for validation)
+PROTEIN_PATTERNS = [
+    r'^[A-Z][a-z]+\d*$',  # Standard protein names like Gfp1, His3
+    r'^[A-Z]{2,}$',       # All caps abbreviations like GFP, ATP
+    r'^p\d+$',            # p53-style names
+    r'^\w+[A-Z]\d+[A-Z]$' # Mutation style like V600E
+]
+# One alternation tests every protein pattern in a single match call
+_PROTEIN_RE = re.compile("|".join(f"(?:{pattern})" for pattern in PROTEIN_PATTERNS))
+
 class EntityType(Enum):
     """Supported entity types for biomedical literature"""
     PROTEIN = "protein"
@@ -37,18 +62,98 @@ class EntityType(Enum):
         """Get entity types most relevant to protein design"""
         return [cls.PROTEIN, cls.GENE, cls.CHEMICAL, cls.METHOD, cls.TECHNOLOGY, cls.COMPANY]
 
+# Entity types kept when focusing on protein design
+PROTEIN_DESIGN_TYPES = frozenset(EntityType.get_protein_design_entities())
+
+# Direct mapping from spaCy biomedical labels
+LABEL_MAPPING = {
+    'PROTEIN': EntityType.PROTEIN,
+    'GENE_OR_GENE_PRODUCT': EntityType.PROTEIN,
+    'GENE': EntityType.GENE,
+    'DISEASE': EntityType.DISEASE,
+    'CHEMICAL': EntityType.CHEMICAL,
+    'ORGANISM': EntityType.ORGANISM,
+    'TISSUE': EntityType.TISSUE,
+    'CELL_TYPE': EntityType.CELL_TYPE,
+    'CELL_LINE': EntityType.CELL_TYPE,
+    'ORG': EntityType.INSTITUTION,  # spaCy organization
+    'PERSON': EntityType.INSTITUTION,  # Sometimes institutions are tagged as PERSON
+}
+
+METHOD_KEYWORDS = frozenset({'method', 'technique', 'assay', 'protocol', 'procedure', 'approach'})
+
+
+def _build_substring_scanner(words: Iterable[str]) -> Callable[[str], bool]:
+    """
+    Build a predicate telling whether any of words occurs in a text, in one pass.
+    
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, otherwise
+    a compiled regex alternation.
+    """
+    if AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for word in words:
+            automaton.add_word(word, word)
+        automaton.make_automaton()
+        return lambda text: next(automaton.iter(text), None) is not None
+    
+    pattern = re.compile("|".join(re.escape(word) for word in sorted(words)))
+    return lambda text: pattern.search(text) is not None
+
+
+# Sentence ends (with optional closing quote/bracket) and paragraph breaks
+_SENTENCE_BREAK_RE = re.compile(r'[.!?]["\')\]]?\s+|\n\s*\n')
+
+
+def _sentence_chunks(text: str, max_chars: int) -> List[str]:
+    """
+    Split text at sentence breaks into contiguous chunks of at most max_chars.
+    
+    Chunks concatenate back to text exactly, so offsets within a chunk map to
+    the text by adding the lengths of the chunks before it. A sentence longer
+    than max_chars is cut at the limit.
+    """
+    if len(text) <= max_chars:
+        return [text]
+    
+    chunks = []
+    start = previous = 0
+    for end in [m.end() for m in _SENTENCE_BREAK_RE.finditer(text)] + [len(text)]:
+        if end - start > max_chars:
+            if previous > start:
+                chunks.append(text[start:previous])
+                start = previous
+            while end - start > max_chars:
+                chunks.append(text[start:start + max_chars])
+                start += max_chars
+        previous = end
+    if start < len(text):
+        chunks.append(text[start:])
+    
+    return chunks
+
 @dataclass
 class EntityExtractionConfig:
     """Configuration for entity extraction"""
     confidence_threshold: float = 0.5
     min_entity_length: int = 2
     max_entity_length: int = 100
-    batch_size: int = 16  # Smaller batches for NER
+    batch_size: int = 50  # Texts per nlp.pipe batch; 25-100 suits NER
+    n_process: int = -1  # spaCy worker processes for batch extraction (-1: all cores, 1: in-process)
+    gpu_batch_size: int = 256  # Larger batches amortize launch overhead when spaCy is on the GPU
+    title_lexicon_path: Optional[str] = None  # Match titles against this lexicon instead of NER
+    max_full_text_chars: Optional[int] = None  # Cap on full-text characters sent to NER (None: whole text)
+    full_text_chunk_chars: int = 2000  # Full text goes to NER in sentence-aligned chunks of this size
+    ner_cache_size: int = 10000  # Texts whose NER results are kept in memory (0 disables)
     include_context: bool = True
     context_window: int = 50  # Characters before/after entity
     filter_common_words: bool = True
     deduplicate_entities: bool = True
     protein_design_focus: bool = True  # Focus on protein design relevant entities
+    
+    def __post_init__(self):
+        if self.title_lexicon_path is None:
+            self.title_lexicon_path = app_config.settings.entity_lexicon_path
 
 
 class EntityNormalizer:
@@ -58,46 +163,49 @@ class EntityNormalizer:
     
     def __init__(self):
         # Common words to filter out (domain-specific stop words)
-        self.common_words = {
+        self.common_words = frozenset({
             'and', 'or', 'the', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
             'by', 'from', 'as', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
             'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'should',
             'could', 'can', 'may', 'might', 'must', 'shall', 'this', 'that', 'these',
             'those', 'we', 'us', 'our', 'ours', 'you', 'your', 'yours', 'he', 'him',
             'his', 'she', 'her', 'hers', 'it', 'its', 'they', 'them', 'their', 'theirs'
-        }
+        })
         
         # Protein name patterns (basic patterns for validation)
-        self.protein_patterns = [
-            r'^[A-Z][a-z]+\d*$',  # Standard protein names like Gfp1, His3
-            r'^[A-Z]{2,}$',       # All caps abbreviations like GFP, ATP
-            r'^p\d+$',            # p53-style names
-            r'^\w+[A-Z]\d+[A-Z]$' # Mutation style like V600E
-        ]
+        self.protein_patterns = PROTEIN_PATTERNS
         
         # Company/institution indicators
-        self.institution_indicators = {
+        self.institution_indicators = frozenset({
             'university', 'college', 'institute', 'laboratory', 'lab', 'research',
             'center', 'centre', 'hospital', 'clinic', 'foundation', 'school',
             'company', 'corporation', 'corp', 'inc', 'ltd', 'llc', 'pharma',
             'pharmaceutical', 'biotech', 'biotechnology'
-        }
+        })
+        
+        # Each scanner checks all of its keywords in a single pass over the text
+        self._institution_scanner = _build_substring_scanner(self.institution_indicators)
+        self._method_scanner = _build_substring_scanner(METHOD_KEYWORDS)
+        
+        # Entity strings recur across a corpus; memoize the keyword heuristic per instance
+        self._classify_text = functools.lru_cache(maxsize=65536)(self._classify_by_keywords)
     
     def normalize_entity_text(self, text: str) -> str:
         """Normalize entity text"""
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text.strip())
-        
-        # Remove special characters at start/end
-        text = re.sub(r'^[^\w]+|[^\w]+$', '', text)
+        # Remove extra whitespace (split/join strips and collapses in one pass)
+        text = ' '.join(text.split())
         
-        return text
+        # Remove special characters at start/end; only non-ASCII text needs the regex
+        if text.isascii():
+            return text.strip(_ASCII_NON_WORD)
+        return _TRIM_RE.sub('', text)
     
     def is_valid_entity(self, text: str, entity_type: str, config: EntityExtractionConfig) -> bool:
         """Validate if an entity should be kept"""
         
         # Basic length checks
-        if len(text) < config.min_entity_length or len(text) > config.max_entity_length:
+        text_length = len(text)
+        if text_length < config.min_entity_length or text_length > config.max_entity_length:
             return False
         
         # Filter common words
@@ -109,15 +217,15 @@ class EntityNormalizer:
             return False
         
         # Filter single characters
-        if len(text) == 1:
+        if text_length == 1:
             return False
         
         # Validate protein names with basic patterns
-        if entity_type.lower() in ['protein', 'gene'] and config.protein_design_focus:
-            if any(re.match(pattern, text) for pattern in self.protein_patterns):
+        if config.protein_design_focus and entity_type.lower() in ('protein', 'gene'):
+            if _PROTEIN_RE.match(text):
                 return True
             # Also allow longer descriptive names
-            if len(text) > 3 and not text.islower():
+            if text_length > 3 and not text.islower():
                 return True
             return False
         
@@ -126,38 +234,30 @@ class EntityNormalizer:
     def classify_entity_type(self, text: str, spacy_label: str) -> EntityType:
         """Map spaCy labels to our entity types"""
         
-        # Direct mapping from spaCy biomedical labels
-        label_mapping = {
-            'PROTEIN': EntityType.PROTEIN,
-            'GENE_OR_GENE_PRODUCT': EntityType.PROTEIN,
-            'GENE': EntityType.GENE,
-            'DISEASE': EntityType.DISEASE,
-            'CHEMICAL': EntityType.CHEMICAL,
-            'ORGANISM': EntityType.ORGANISM,
-            'TISSUE': EntityType.TISSUE,
-            'CELL_TYPE': EntityType.CELL_TYPE,
-            'CELL_LINE': EntityType.CELL_TYPE,
-            'ORG': EntityType.INSTITUTION,  # spaCy organization
-            'PERSON': EntityType.INSTITUTION,  # Sometimes institutions are tagged as PERSON
-        }
-        
-        if spacy_label in label_mapping:
-            return label_mapping[spacy_label]
+        entity_type = LABEL_MAPPING.get(spacy_label)
+        if entity_type is not None:
+            return entity_type
         
         # Heuristic classification based on text content
-        text_lower = text.lower()
-        
+        return self._classify_text(text.lower())
+    
+    def _classify_by_keywords(self, text_lower: str) -> EntityType:
+        """Classify lowercased entity text by keyword heuristics"""
         # Check for institution indicators
-        if any(indicator in text_lower for indicator in self.institution_indicators):
+        if self._institution_scanner(text_lower):
             return EntityType.INSTITUTION
         
         # Check for method/technology keywords
-        method_keywords = {'method', 'technique', 'assay', 'protocol', 'procedure', 'approach'}
-        if any(keyword in text_lower for keyword in method_keywords):
+        if self._method_scanner(text_lower):
             return EntityType.METHOD
         
         # Default to chemical for unknown entities in biomedical context
         return EntityType.CHEMICAL
+    
+    def classification_cache_info(self) -> Dict[str, int]:
+        """Hit and miss counts of the classification cache"""
+        info = self._classify_text.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
 
 
 class EntityExtractor:
@@ -180,13 +280,21 @@ class EntityExtractor:
         self.model_manager = get_model_manager()
         self.normalizer = EntityNormalizer()
         
+        # Surface forms recur across papers; resolve each (text, label) once.
+        # Results depend on the config, which is fixed for the extractor's life.
+        self._resolve_entity = functools.lru_cache(maxsize=65536)(self._resolve_entity_uncached)
+        
+        # Raw NER results by text digest, least recently used first
+        self._ner_cache: "OrderedDict[bytes, List[EntitySpan]]" = OrderedDict()
+        
         # Performance tracking
         self.stats = {
             "papers_processed": 0,
             "entities_extracted": 0,
             "entities_filtered": 0,
             "total_processing_time": 0.0,
-            "entities_by_type": {}
+            "entities_by_type": Counter(),
+            "ner_cache_hits": 0
         }
         
         logger.info("EntityExtractor initialized")
@@ -199,75 +307,261 @@ class EntityExtractor:
         context_start = max(0, start - self.config.context_window)
         context_end = min(len(text), end + self.config.context_window)
         
-        context = text[context_start:context_end]
-        
-        # Clean up context
-        context = re.sub(r'\s+', ' ', context.strip())
-        
-        return context
+        # Clean up context: one slice, then strip and collapse whitespace in one pass
+        return ' '.join(text[context_start:context_end].split())
     
-    def _process_spacy_entities(self, text: str, spacy_entities: List[Dict]) -> List[Dict[str, Any]]:
-        """Process entities extracted by spaCy"""
+    def _process_spacy_entities(self,
+                                text: str,
+                                spacy_entities: List[EntitySpan],
+                                seen_by_type: Optional[Dict[EntityType, Set[str]]] = None
+                                ) -> List[Dict[str, Any]]:
+        """
+        Process entities extracted by spaCy
         
-        processed_entities = []
-        seen_entities = set()  # For deduplication
+        Pass the same seen_by_type for every chunk of a section so an entity
+        is kept once per section rather than once per chunk.
+        """
         
-        for ent_data in spacy_entities:
-            entity_text = self.normalizer.normalize_entity_text(ent_data['text'])
+        processed_entities = []
+        # For deduplication: lowercased texts per entity type, so no key tuples are built
+        if seen_by_type is None:
+            seen_by_type = {}
+        
+        # Loop invariants hoisted; this runs for every spaCy entity
+        deduplicate = self.config.deduplicate_entities
+        resolve = self._resolve_entity
+        extract_context = self._extract_context
+        filtered = 0
+        
+        for raw_text, label, start, end, confidence in spacy_entities:
+            entity_text, entity_type, valid = resolve(raw_text, label)
             
-            # Skip if empty after normalization
-            if not entity_text:
+            if not valid:
+                filtered += 1
                 continue
             
-            # Validate entity
-            if not self.normalizer.is_valid_entity(
-                entity_text, 
-                ent_data['label'], 
-                self.config
-            ):
-                self.stats["entities_filtered"] += 1
-                continue
-            
-            # Classify entity type
-            entity_type = self.normalizer.classify_entity_type(
-                entity_text, 
-                ent_data['label']
-            )
-            
-            # Focus on protein design relevant entities if configured
-            if (self.config.protein_design_focus and 
-                entity_type not in EntityType.get_protein_design_entities()):
+            # Skip if empty after normalization or outside the protein design focus
+            if entity_type is None:
                 continue
             
             # Deduplication
-            if self.config.deduplicate_entities:
-                entity_key = (entity_text.lower(), entity_type.value)
-                if entity_key in seen_entities:
+            if deduplicate:
+                seen = seen_by_type.get(entity_type)
+                if seen is None:
+                    seen = seen_by_type[entity_type] = set()
+                text_lower = entity_text.lower()
+                if text_lower in seen:
                     continue
-                seen_entities.add(entity_key)
+                seen.add(text_lower)
             
             # Extract context
-            context = self._extract_context(text, ent_data['start'], ent_data['end'])
+            context = extract_context(text, start, end)
             
-            processed_entity = {
+            processed_entities.append({
                 'text': entity_text,
                 'type': entity_type.value,
-                'start_position': ent_data['start'],
-                'end_position': ent_data['end'],
-                'confidence': ent_data.get('confidence', 1.0),
+                'start_position': start,
+                'end_position': end,
+                'confidence': confidence,
                 'context': context,
-                'original_label': ent_data['label']
-            }
+                'original_label': label
+            })
+        
+        # Track by type, aggregated once per text
+        self.stats["entities_by_type"].update(entity['type'] for entity in processed_entities)
+        self.stats["entities_filtered"] += filtered
+        self.stats["entities_extracted"] += len(processed_entities)
+        
+        return processed_entities
+    
+    def _resolve_entity_uncached(self, raw_text: str, label: str) -> Tuple[str, Optional[EntityType], bool]:
+        """
+        Normalize, validate and classify one spaCy entity
+        
+        Returns (entity_text, entity_type, valid); entity_type is None for
+        entities that are dropped without counting as filtered.
+        """
+        normalizer = self.normalizer
+        entity_text = normalizer.normalize_entity_text(raw_text)
+        if not entity_text:
+            return entity_text, None, True
+        
+        if not normalizer.is_valid_entity(entity_text, label, self.config):
+            return entity_text, None, False
+        
+        entity_type = normalizer.classify_entity_type(entity_text, label)
+        
+        # Focus on protein design relevant entities if configured
+        if self.config.protein_design_focus and entity_type not in PROTEIN_DESIGN_TYPES:
+            return entity_text, None, True
+        
+        return entity_text, entity_type, True
+    
+    def _prepare_texts(self, paper: Paper) -> List[Tuple[str, str]]:
+        """
+        Collect (section, text) pairs of a paper for entity extraction
+        
+        Full text yields one pair per chunk, in order.
+        """
+        texts = []
+        
+        if paper.title:
+            texts.append(("title", paper.title))
+        
+        if paper.abstract:
+            texts.append(("abstract", paper.abstract))
+        
+        full_text = paper.full_text
+        if full_text:
+            # Sentence-aligned chunks keep NER docs small and batch across papers
+            limit = self.config.max_full_text_chars
+            if limit is not None and len(full_text) > limit:
+                full_text = full_text[:limit]
+            texts.extend(("full_text", chunk)
+                         for chunk in _sentence_chunks(full_text, self.config.full_text_chunk_chars))
+        
+        return texts
+    
+    def _extract_spacy_entities(self,
+                                texts: List[Tuple[str, str]],
+                                batch_size: int,
+                                n_process: int = 1) -> List[List[EntitySpan]]:
+        """
+        Run NER over (section, text) pairs, in order.
+        
+        Texts seen recently (shared boilerplate, re-posted abstracts) are
+        answered from the in-memory result cache; only misses reach the model.
+        """
+        if self.config.ner_cache_size <= 0:
+            return self._run_ner(texts, batch_size, n_process)
+        
+        cache = self._ner_cache
+        keys = [self._ner_cache_key(section, text) for section, text in texts]
+        results: List[Optional[List[EntitySpan]]] = [cache.get(key) for key in keys]
+        
+        miss_positions = []
+        first_miss: Dict[bytes, int] = {}
+        for i, key in enumerate(keys):
+            if results[i] is not None:
+                cache.move_to_end(key)
+            elif key not in first_miss:
+                first_miss[key] = i
+                miss_positions.append(i)
+        self.stats["ner_cache_hits"] += len(texts) - len(miss_positions)
+        
+        if miss_positions:
+            extracted = self._run_ner([texts[i] for i in miss_positions], batch_size, n_process)
+            for position, entities in zip(miss_positions, extracted):
+                results[position] = entities
+                cache[keys[position]] = entities
+            while len(cache) > self.config.ner_cache_size:
+                cache.popitem(last=False)
+        
+        # Repeats of a text missed earlier in this call share its result
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                results[i] = results[first_miss[key]]
+        
+        return results
+    
+    def _ner_cache_key(self, section: str, text: str) -> bytes:
+        """Digest a text, keeping lexicon-matched titles apart from NER results."""
+        routed = "title" if section == "title" and self.config.title_lexicon_path else ""
+        return hashlib.blake2b(f"{routed}\0{text}".encode('utf-8'), digest_size=16).digest()
+    
+    def _run_ner(self,
+                 texts: List[Tuple[str, str]],
+                 batch_size: int,
+                 n_process: int = 1) -> List[List[EntitySpan]]:
+        """
+        Run the NER model over (section, text) pairs, in order.
+        
+        With a title lexicon configured, titles are answered by the phrase
+        matcher and only the longer sections go through the NER model.
+        """
+        lexicon_path = self.config.title_lexicon_path
+        if not lexicon_path:
+            return self.model_manager.extract_entity_spans(
+                [text for _, text in texts],
+                batch_size=batch_size,
+                n_process=n_process
+            )
+        
+        # Route each pair in one pass, remembering where its result goes
+        title_positions: List[int] = []
+        title_texts: List[str] = []
+        ner_positions: List[int] = []
+        ner_texts: List[str] = []
+        for position, (section, text) in enumerate(texts):
+            if section == "title":
+                title_positions.append(position)
+                title_texts.append(text)
+            else:
+                ner_positions.append(position)
+                ner_texts.append(text)
+        
+        results: List[List[EntitySpan]] = [[] for _ in texts]
+        matched = self.model_manager.match_phrases(title_texts, lexicon_path)
+        for position, entities in zip(title_positions, matched):
+            results[position] = entities
+        
+        if ner_texts:
+            extracted = self.model_manager.extract_entity_spans(
+                ner_texts,
+                batch_size=batch_size,
+                n_process=n_process
+            )
+            for position, entities in zip(ner_positions, extracted):
+                results[position] = entities
+        
+        return results
+    
+    def _build_entities(self,
+                        paper: Paper,
+                        texts: List[Tuple[str, str]],
+                        all_spacy_entities: List[List[EntitySpan]]) -> List[Entity]:
+        """
+        Process and combine entities from all sections of a paper
+        """
+        all_entities = []
+        append = all_entities.append
+        process = self._process_spacy_entities
+        paper_id = paper.id
+        char_offset = 0
+        previous_source = None
+        seen_by_type: Dict[EntityType, Set[str]] = {}
+        
+        for (source, text), spacy_entities in zip(texts, all_spacy_entities):
+            # Sections are joined with a separator; chunks of one section abut
+            # and are deduplicated together
+            if source != previous_source:
+                if previous_source is not None:
+                    char_offset += 1
+                seen_by_type = {}
+            previous_source = source
             
-            processed_entities.append(processed_entity)
-            self.stats["entities_extracted"] += 1
+            processed_entities = process(text, spacy_entities, seen_by_type)
             
-            # Track by type
-            if entity_type.value not in self.stats["entities_by_type"]:
-                self.stats["entities_by_type"][entity_type.value] = 0
-            self.stats["entities_by_type"][entity_type.value] += 1
+            # Adjust positions for combined text and add source info
+            for entity_data in processed_entities:
+                entity_data['start_position'] += char_offset
+                entity_data['end_position'] += char_offset
+                entity_data['source_section'] = source
+                
+                # Create Entity object
+                append(Entity(
+                    paper_id=paper_id,
+                    entity_text=entity_data['text'],
+                    entity_type=entity_data['type'],
+                    confidence=entity_data['confidence'],
+                    start_position=entity_data['start_position'],
+                    end_position=entity_data['end_position'],
+                    context=entity_data['context']
+                ))
+            
+            char_offset += len(text)
         
-        return processed_entities
+        return all_entities
     
     def extract_paper_entities(self, paper: Paper) -> List[Entity]:
         """
@@ -277,73 +571,28 @@ class EntityExtractor:
         
         try:
             # Check if entities already exist
-            existing_entities = self.entity_repo.get_by_paper_id(paper.id)
+            existing_entities = self.entity_repo.get_by_paper(paper.id)
             if existing_entities:
                 logger.debug(f"Using cached entities for paper {paper.id}")
                 return existing_entities
             
             # Prepare text for entity extraction
-            texts_to_process = []
-            text_sources = []
-            
-            if paper.title:
-                texts_to_process.append(paper.title)
-                text_sources.append("title")
-            
-            if paper.abstract:
-                texts_to_process.append(paper.abstract)
-                text_sources.append("abstract")
+            texts = self._prepare_texts(paper)
             
-            if paper.full_text:
-                # For full text, we might want to process in chunks
-                # For now, process the full text as one unit
-                texts_to_process.append(paper.full_text[:10000])  # Limit to first 10k chars
-                text_sources.append("full_text")
-            
-            if not texts_to_process:
+            if not texts:
                 logger.warning(f"No text content found for paper {paper.id}")
                 return []
             
             # Extract entities using spaCy
-            logger.debug(f"Extracting entities from {len(texts_to_process)} text sections")
+            logger.debug(f"Extracting entities from {len(texts)} text sections")
             
-            all_spacy_entities = self.model_manager.extract_entities(
-                texts_to_process,
-                batch_size=self.config.batch_size
-            )
+            all_spacy_entities = self._extract_spacy_entities(texts, self.config.batch_size)
             
-            # Process and combine entities from all sections
-            all_entities = []
-            char_offset = 0
-            
-            for text, source, spacy_entities in zip(texts_to_process, text_sources, all_spacy_entities):
-                processed_entities = self._process_spacy_entities(text, spacy_entities)
-                
-                # Adjust positions for combined text and add source info
-                for entity_data in processed_entities:
-                    entity_data['start_position'] += char_offset
-                    entity_data['end_position'] += char_offset
-                    entity_data['source_section'] = source
-                    
-                    # Create Entity object
-                    entity = Entity(
-                        paper_id=paper.id,
-                        entity_text=entity_data['text'],
-                        entity_type=entity_data['type'],
-                        confidence=entity_data['confidence'],
-                        start_position=entity_data['start_position'],
-                        end_position=entity_data['end_position'],
-                        context=entity_data['context']
-                    )
-                    
-                    all_entities.append(entity)
-                
-                char_offset += len(text) + 1  # +1 for separator
+            all_entities = self._build_entities(paper, texts, all_spacy_entities)
             
             # Store entities in database
             if all_entities:
-                for entity in all_entities:
-                    self.entity_repo.create(entity)
+                self.entity_repo.create_entities(all_entities, assign_ids=False)
                 
                 logger.info(f"Extracted {len(all_entities)} entities from paper {paper.id}")
             
@@ -359,9 +608,21 @@ class EntityExtractor:
             logger.error(f"Failed to extract entities from paper {paper.id}: {e}")
             raise
     
+    def _batch_size(self) -> int:
+        """NER batch size, raised once spaCy runs on the GPU"""
+        # Loading decides the device, so do it before checking
+        self.model_manager.load_spacy_model()
+        if self.model_manager.spacy_uses_gpu():
+            return max(self.config.batch_size, self.config.gpu_batch_size)
+        return self.config.batch_size
+    
     def extract_batch_entities(self, papers: List[Paper]) -> Dict[str, List[Entity]]:
         """
-        Extract entities from multiple papers
+        Extract entities from multiple papers in one spaCy stream.
+        
+        Texts of every unprocessed paper go through a single nlp.pipe() call,
+        so NER batches span papers instead of restarting per paper. Papers
+        whose entities could not be extracted or stored are left out.
         """
         if not papers:
             return {}
@@ -369,27 +630,76 @@ class EntityExtractor:
         start_time = time.time()
         logger.info(f"Extracting entities from {len(papers)} papers")
         
+        # One query serves papers whose entities were already extracted
+        try:
+            existing_entities = self.entity_repo.get_by_paper_ids([paper.id for paper in papers])
+        except Exception as e:
+            logger.error(f"Failed to look up existing entities: {e}")
+            existing_entities = {}
+        
         results = {}
+        pending = []
+        for paper in papers:
+            if paper.id in existing_entities:
+                logger.debug(f"Using cached entities for paper {paper.id}")
+                results[paper.id] = existing_entities[paper.id]
+                continue
+            
+            texts = self._prepare_texts(paper)
+            results[paper.id] = []  # Keeps results in input order
+            if not texts:
+                logger.warning(f"No text content found for paper {paper.id}")
+                continue
+            pending.append((paper, texts))
         
-        for i, paper in enumerate(papers):
+        # Flatten every section of every pending paper into one stream
+        all_texts = [section_text for _, texts in pending for section_text in texts]
+        try:
+            all_spacy_entities = self._extract_spacy_entities(
+                all_texts,
+                batch_size=self._batch_size(),
+                n_process=self.config.n_process
+            ) if all_texts else []
+        except Exception as e:
+            logger.error(f"Failed to extract entities from {len(pending)} papers: {e}")
+            all_spacy_entities = None
+            for paper, _ in pending:
+                del results[paper.id]
+        
+        new_entities = []
+        extracted = []
+        offset = 0
+        for paper, texts in pending:
+            if all_spacy_entities is None:
+                break
+            
+            paper_spacy_entities = all_spacy_entities[offset:offset + len(texts)]
+            offset += len(texts)
             try:
-                entities = self.extract_paper_entities(paper)
-                results[paper.id] = entities
-                
-                # Log progress for large batches
-                if (i + 1) % 10 == 0:
-                    elapsed = time.time() - start_time
-                    remaining = len(papers) - (i + 1)
-                    eta = (elapsed / (i + 1)) * remaining
-                    logger.info(f"Processed {i + 1}/{len(papers)} papers "
-                               f"(ETA: {eta:.1f}s)")
-                
+                entities = self._build_entities(paper, texts, paper_spacy_entities)
             except Exception as e:
                 logger.error(f"Failed to process paper {paper.id}: {e}")
-                results[paper.id] = []
+                del results[paper.id]
                 continue
+            
+            results[paper.id] = entities
+            extracted.append(paper)
+            new_entities.extend(entities)
+        
+        # Store all new entities in one executemany transaction; IDs are not needed here
+        if new_entities:
+            try:
+                self.entity_repo.create_entities(new_entities, assign_ids=False)
+            except Exception as e:
+                logger.error(f"Failed to store entities for {len(pending)} papers: {e}")
+                for paper in extracted:
+                    del results[paper.id]
         
         total_time = time.time() - start_time
+        if all_spacy_entities is not None and pending:
+            self.stats["papers_processed"] += len(pending)
+            self.stats["total_processing_time"] += total_time
+        
         total_entities = sum(len(entities) for entities in results.values())
         
         logger.info(f"Batch entity extraction completed: {total_entities} entities "
@@ -403,43 +713,22 @@ class EntityExtractor:
     
     def get_entity_statistics(self, paper_id: Optional[str] = None) -> Dict[str, Any]:
         """Get entity statistics for a paper or all papers"""
-        if paper_id:
-            entities = self.entity_repo.get_by_paper_id(paper_id)
-        else:
-            entities = self.entity_repo.get_all()
-        
-        stats = {
-            "total_entities": len(entities),
-            "entities_by_type": {},
-            "avg_confidence": 0.0,
-            "unique_entities": set()
-        }
-        
-        if entities:
-            confidences = []
-            for entity in entities:
-                entity_type = entity.entity_type
-                if entity_type not in stats["entities_by_type"]:
-                    stats["entities_by_type"][entity_type] = 0
-                stats["entities_by_type"][entity_type] += 1
-                
-                confidences.append(entity.confidence)
-                stats["unique_entities"].add(entity.entity_text.lower())
-            
-            stats["avg_confidence"] = sum(confidences) / len(confidences)
-            stats["unique_entity_count"] = len(stats["unique_entities"])
-            del stats["unique_entities"]  # Remove set for JSON serialization
-        
-        return stats
+        return self.entity_repo.get_statistics(paper_id)
     
     def get_processing_statistics(self) -> Dict[str, Any]:
         """Get processing statistics"""
         stats = self.stats.copy()
+        stats["entities_by_type"] = dict(stats["entities_by_type"])
         
         if stats["papers_processed"] > 0:
             stats["avg_processing_time"] = stats["total_processing_time"] / stats["papers_processed"]
             stats["avg_entities_per_paper"] = stats["entities_extracted"] / stats["papers_processed"]
         
+        stats["classification_cache"] = self.normalizer.classification_cache_info()
+        resolve_info = self._resolve_entity.cache_info()
+        stats["resolution_cache"] = {"hits": resolve_info.hits, "misses": resolve_info.misses,
+                                     "size": resolve_info.currsize}
+        
         # Add model manager stats
         stats["model_performance"] = self.model_manager.get_performance_stats()
         
@@ -5,33 +5,255 @@ This module sets up and manages machine learning models optimized for Apple M2 h
 with MPS acceleration.
 """
 
+import asyncio
+import contextlib
+import hashlib
+import itertools
 import logging
+import multiprocessing
 import os
+import queue
+import shutil
+import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Callable, Iterable, Iterator
 import torch
 import torch.nn as nn
 from sentence_transformers import SentenceTransformer
 import spacy
-from spacy.tokens import Doc
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Doc, Span
 import numpy as np
 from dataclasses import dataclass
 
+try:
+    from model2vec import StaticModel
+    MODEL2VEC_AVAILABLE = True
+except ImportError:
+    MODEL2VEC_AVAILABLE = False
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
 from core.config import config
 
 logger = logging.getLogger(__name__)
 
+# Available system memory, re-read at most once per _MEMORY_SAMPLE_TTL seconds
+_MEMORY_SAMPLE_TTL = 1.0
+_memory_sample = {"time": float("-inf"), "available": 0}
+
+# spaCy pipeline of an NER worker process, set by _init_ner_worker
+_worker_nlp = None
+
+# Distinct texts above which extract_entities parallelizes by default
+AUTO_PARALLEL_MIN_TEXTS = 64
+
+# Components entity extraction needs: NER, rule-based entities and the shared
+# embedding layers NER listens to. Everything else only produces unused attributes.
+NER_COMPONENTS = frozenset({"tok2vec", "transformer", "ner", "entity_ruler"})
+
+
+def _configure_spacy_pipeline(nlp: "spacy.Language") -> "spacy.Language":
+    """Prepare a loaded spaCy pipeline for batched NER"""
+    # Optimize for batch processing
+    nlp.max_length = 1000000  # Increase max length for long documents
+    
+    # Remove (rather than disable) the rest so a saved copy does not carry their weights
+    if "ner" in nlp.pipe_names:
+        for component in [name for name in nlp.pipe_names if name not in NER_COMPONENTS]:
+            nlp.remove_pipe(component)
+            logger.debug(f"Removed spaCy component: {component}")
+    
+    return nlp
+
+
+# (text, label, start_char, end_char, confidence) of one entity; a fraction of
+# the memory and pickle size of the equivalent dict
+EntitySpan = Tuple[str, str, int, int, float]
+
+
+@dataclass
+class EntityBatch:
+    """
+    Entities of a batch of texts as parallel columns, one row per entity
+    
+    doc_ids gives the position of each entity's source text. Columns avoid a
+    dict per entity and let filtering and inserts work on whole arrays.
+    """
+    texts: np.ndarray  # object
+    labels: np.ndarray  # object
+    starts: np.ndarray  # int32
+    ends: np.ndarray  # int32
+    confidences: np.ndarray  # float64
+    doc_ids: np.ndarray  # int32
+    num_docs: int
+    
+    @classmethod
+    def from_spans(cls, spans_per_text: List[List[EntitySpan]]) -> "EntityBatch":
+        """Build the columns from per-text entity spans"""
+        count = sum(map(len, spans_per_text))
+        texts, labels, starts, ends, confidences = (
+            zip(*itertools.chain.from_iterable(spans_per_text)) if count else ((),) * 5
+        )
+        return cls(
+            texts=np.array(texts, dtype=object),
+            labels=np.array(labels, dtype=object),
+            starts=np.fromiter(starts, dtype=np.int32, count=count),
+            ends=np.fromiter(ends, dtype=np.int32, count=count),
+            confidences=np.fromiter(confidences, dtype=np.float64, count=count),
+            doc_ids=np.repeat(np.arange(len(spans_per_text), dtype=np.int32),
+                              [len(spans) for spans in spans_per_text]),
+            num_docs=len(spans_per_text),
+        )
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    def to_legacy(self) -> List[List[Dict[str, Any]]]:
+        """The per-text entity dicts returned by extract_entities"""
+        legacy: List[List[Dict[str, Any]]] = [[] for _ in range(self.num_docs)]
+        for text, label, start, end, confidence, doc_id in zip(
+            self.texts, self.labels, self.starts.tolist(), self.ends.tolist(),
+            self.confidences.tolist(), self.doc_ids.tolist()
+        ):
+            legacy[doc_id].append(
+                {"text": text, "label": label, "start": start, "end": end, "confidence": confidence}
+            )
+        return legacy
+
+
+def _doc_entity_spans(doc: Doc) -> List[EntitySpan]:
+    """Entity spans of a parsed doc"""
+    ents = doc.ents
+    if not ents:
+        return []
+    
+    # Slicing the doc text avoids rebuilding each span's text from its tokens
+    text = doc.text
+    if Span.has_extension("confidence"):
+        return [
+            (text[ent.start_char:ent.end_char], ent.label_, ent.start_char, ent.end_char,
+             1.0 if (confidence := ent._.confidence) is None else confidence)
+            for ent in ents
+        ]
+    
+    # Default confidence when the model scores no spans
+    return [(text[ent.start_char:ent.end_char], ent.label_, ent.start_char, ent.end_char, 1.0)
+            for ent in ents]
+
+
+def _available_memory() -> int:
+    """Available system memory in bytes, from a sample at most a second old"""
+    now = time.monotonic()
+    if now - _memory_sample["time"] > _MEMORY_SAMPLE_TTL:
+        _memory_sample.update(time=now, available=psutil.virtual_memory().available)
+    return _memory_sample["available"]
+
+
+def _init_ner_worker(model_source: str, nlp: Optional["spacy.Language"] = None) -> None:
+    """Give an NER worker its pipeline: inherited when forked, loaded otherwise"""
+    global _worker_nlp
+    _worker_nlp = nlp if nlp is not None else _configure_spacy_pipeline(spacy.load(model_source))
+
+
+def _ner_worker_batch(texts: List[str], batch_size: int) -> List[List[EntitySpan]]:
+    """Run NER over one batch in a worker process"""
+    return [_doc_entity_spans(doc) for doc in _worker_nlp.pipe(texts, batch_size=batch_size)]
+
+
+_PREFETCH_DONE = object()
+
+
+def _prefetched(items: List[Any], prepare: Callable[[Any, int], Any], slots: int = 2):
+    """
+    Yield prepare(item, slot) for each item, with the next item prepared on a
+    background thread while the caller works on the current one.
+    
+    slot (0..slots-1) names the buffer set prepare may write into; a slot is
+    handed out again only after the caller has asked for the following item.
+    Close the generator when stopping early so the thread exits.
+    """
+    free_slots: "queue.Queue[Optional[int]]" = queue.Queue()
+    for slot in range(slots):
+        free_slots.put(slot)
+    ready: "queue.Queue[Any]" = queue.Queue()
+    stopped = threading.Event()
+    
+    def produce():
+        try:
+            for item in items:
+                slot = free_slots.get()
+                if stopped.is_set():
+                    return
+                ready.put((slot, prepare(item, slot)))
+            ready.put(_PREFETCH_DONE)
+        except BaseException as e:
+            ready.put(e)
+    
+    thread = threading.Thread(target=produce, name="embedding-prefetch", daemon=True)
+    thread.start()
+    held_slot = None
+    try:
+        while True:
+            if held_slot is not None:
+                free_slots.put(held_slot)
+            message = ready.get()
+            if message is _PREFETCH_DONE:
+                return
+            if isinstance(message, BaseException):
+                raise message
+            held_slot, value = message
+            yield value
+    finally:
+        stopped.set()
+        free_slots.put(None)
+        thread.join()
+
+
 @dataclass
 class ModelConfig:
     """Configuration for ML models"""
     embedding_model_name: str = "all-MiniLM-L6-v2"
+    static_model_name: str = "minishlab/M2V_base_output"  # model2vec model for bulk chunks
     spacy_model_name: str = "en_core_web_sm"
     max_sequence_length: int = 512
     batch_size: int = 32
     cache_dir: str = "models"
     use_mps: bool = True
-    quantize_models: bool = True
+    quantize_models: bool = True  # fp16 weights on MPS, int8 dynamic quantization on CPU
+    compile_model: bool = False  # torch.compile the transformer forward pass
+    compile_backend: Optional[str] = None  # None: aot_eager on MPS (no inductor support), inductor elsewhere
+    spacy_use_gpu: bool = True  # Run spaCy on the GPU (CUDA or MPS) when thinc finds one; NER then stays in-process
+    embedding_cache_size: int = 20000  # Embeddings kept in memory by input digest (0 disables)
+    mps_target_util: float = 0.85  # Share of MPS memory adaptive embedding batches aim to fill
+    mps_cache_limit_gb: float = 6.0  # Allocated MPS memory above which a pass releases cached blocks
+    min_batch_size: int = 8  # Floor for adaptive and out-of-memory batch sizes
+    max_batch_size: int = 1024  # Ceiling for adaptive embedding batch sizes
+    max_batch_tokens: int = 16384  # Padded tokens per forward batch of length-sorted inputs
+    coalesce_window_ms: float = 10.0  # How long aembed waits to merge concurrent requests
+
+
+@dataclass
+class RunningStat:
+    """Count, mean, min and max of a series, updated in O(1) per value"""
+    n: int = 0
+    mean: float = 0.0
+    mn: float = float("inf")
+    mx: float = float("-inf")
+    
+    def add(self, x: float):
+        self.n += 1
+        self.mean += (x - self.mean) / self.n
+        self.mn = min(self.mn, x)
+        self.mx = max(self.mx, x)
 
 
 class M2ModelManager:
@@ -59,14 +281,37 @@ class M2ModelManager:
         
         # Model storage
         self._embedding_model: Optional[SentenceTransformer] = None
+        self._embedding_precision = "fp32"  # fp16, int8 or fp32, set when the model loads
         self._spacy_model: Optional[spacy.Language] = None
+        self._spacy_model_source = self.config.spacy_model_name  # Package name or pruned copy path
+        self._static_model = None
+        self._phrase_matchers: Dict[str, PhraseMatcher] = {}
+        
+        # Embedding batch size learned from MPS memory feedback
+        self._adaptive_batch_size: Optional[int] = None
+        
+        # Embeddings by input digest, least recently used first
+        self._embedding_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()  # Shared by every embedding caller
+        
+        # Set by warmup_models, cleared by cleanup once the models are released
+        self._warm = False
+        
+        # NER worker processes, kept warm across extract_entities calls
+        self._ner_pool: Optional[ProcessPoolExecutor] = None
+        self._ner_pool_workers = 0
+        
+        # aembed request queue and the task merging it, bound to one event loop
+        self._embed_queue: Optional[asyncio.Queue] = None
+        self._embed_task: Optional[asyncio.Task] = None
         
         # Performance tracking
         self.performance_stats = {
-            "embedding_inference_times": [],
-            "ner_inference_times": [],
+            "embedding_inference_times": RunningStat(),
+            "ner_inference_times": RunningStat(),
             "memory_usage": [],
-            "batch_sizes_used": []
+            "batch_sizes_used": RunningStat(),
+            "embedding_cache_hits": 0
         }
         
         # Set up model directories
@@ -90,11 +335,12 @@ class M2ModelManager:
         """
         Dynamically optimize batch size based on available memory
         """
+        if not PSUTIL_AVAILABLE:
+            return base_batch_size
+        
         try:
             # Get system memory info
-            import psutil
-            memory = psutil.virtual_memory()
-            available_gb = memory.available / (1024**3)
+            available_gb = _available_memory() / (1024**3)
             
             # Adjust batch size based on available memory
             if available_gb > 16:
@@ -113,10 +359,82 @@ class M2ModelManager:
             logger.warning(f"Could not optimize batch size: {e}")
             return base_batch_size
     
-    def _clear_mps_cache(self):
-        """Clear MPS cache to free up memory"""
+    def _embedding_batch_size(self, batch_size: Optional[int]) -> int:
+        """
+        Batch size for an embedding pass
+        
+        On MPS the size learned from memory feedback applies, capped by an
+        explicitly requested size; elsewhere the memory heuristic decides.
+        """
+        adaptive = self._adaptive_batch_size if self.device.type == "mps" else None
+        if batch_size is None:
+            return adaptive or self._optimize_batch_size(self.config.batch_size)
+        return min(batch_size, adaptive) if adaptive else batch_size
+    
+    def _with_oom_backoff(self, run: Callable[[int], np.ndarray], batch_size: int) -> np.ndarray:
+        """
+        Run an embedding pass, halving the batch size on MPS out-of-memory
+        errors, and size the next pass from the memory this one used
+        """
+        while True:
+            try:
+                result = run(batch_size)
+            except RuntimeError as e:
+                if (self.device.type != "mps" or "out of memory" not in str(e).lower()
+                        or batch_size <= self.config.min_batch_size):
+                    raise
+                batch_size = max(self.config.min_batch_size, batch_size // 2)
+                self._adaptive_batch_size = batch_size
+                self._clear_mps_cache(force=True)
+                logger.warning(f"MPS out of memory, retrying with batch size {batch_size}")
+                continue
+            
+            self._adapt_batch_size(batch_size)
+            return result
+    
+    def _adapt_batch_size(self, batch_size: int) -> None:
+        """
+        Scale the next embedding batch size toward the MPS memory target
+        
+        The allocator is sampled before the cache is cleared, so it still
+        holds the pass's working set; growth is limited to 1.5x per pass.
+        """
+        if self.device.type != "mps":
+            return
+        
+        try:
+            used = torch.mps.driver_allocated_memory()
+            recommended = getattr(torch.mps, "recommended_max_memory", None)
+            if recommended is not None:
+                available = recommended()
+            elif PSUTIL_AVAILABLE:
+                available = psutil.virtual_memory().total  # Unified memory on Apple silicon
+            else:
+                return
+        except Exception as e:
+            logger.debug(f"Could not sample MPS memory: {e}")
+            return
+        
+        if used <= 0:
+            return
+        
+        ratio = self.config.mps_target_util * available / used
+        next_size = int(batch_size * min(ratio, 1.5))
+        self._adaptive_batch_size = max(self.config.min_batch_size,
+                                        min(self.config.max_batch_size, next_size))
+    
+    def _clear_mps_cache(self, force: bool = False):
+        """
+        Clear MPS cache to free up memory
+        
+        Unless forced, only under memory pressure: released blocks have to be
+        reallocated by the next pass, so emptying the cache after every pass
+        costs more than it saves.
+        """
         if self.device.type == "mps":
             try:
+                if not force and torch.mps.driver_allocated_memory() <= self.config.mps_cache_limit_gb * 1024**3:
+                    return
                 torch.mps.empty_cache()
                 logger.debug("Cleared MPS cache")
             except Exception as e:
@@ -151,10 +469,44 @@ class M2ModelManager:
             # Quantize model if requested (for faster inference)
             if self.config.quantize_models and self.device.type == "mps":
                 try:
-                    # Note: Quantization may not be available for all models on MPS
-                    logger.info("Model quantization enabled for faster inference")
+                    # fp16 halves weight and activation traffic on MPS; CPU stays fp32
+                    model = model.half()
+                    self._check_forward(model)
+                    self._embedding_precision = "fp16"
+                    logger.info("Converted embedding model to fp16 for faster inference")
                 except Exception as e:
-                    logger.warning(f"Could not quantize model: {e}")
+                    model = model.float()
+                    logger.warning(f"Could not quantize model, keeping fp32: {e}")
+            elif self.config.quantize_models and self.device.type == "cpu":
+                # MPS has no int8 kernels; on CPU, int8 Linear layers shrink the
+                # weights ~4x and run on the quantized GEMM backend
+                transformer = model._first_module()
+                fp32_model = transformer.auto_model
+                try:
+                    size_before = self._state_dict_bytes(fp32_model)
+                    transformer.auto_model = torch.quantization.quantize_dynamic(
+                        fp32_model, {nn.Linear}, dtype=torch.qint8
+                    )
+                    self._check_forward(model)
+                    self._embedding_precision = "int8"
+                    logger.info(f"Quantized embedding model to int8 "
+                               f"({size_before / 1e6:.1f}MB -> "
+                               f"{self._state_dict_bytes(transformer.auto_model) / 1e6:.1f}MB)")
+                except Exception as e:
+                    transformer.auto_model = fp32_model
+                    logger.warning(f"Could not quantize model, keeping fp32: {e}")
+            
+            if self.config.compile_model:
+                try:
+                    backend = self.config.compile_backend or (
+                        "aot_eager" if self.device.type == "mps" else "inductor"
+                    )
+                    # Length-bucketed batches vary in shape; dynamic avoids a recompile per shape
+                    transformer = model._first_module()
+                    transformer.auto_model = torch.compile(transformer.auto_model, backend=backend, dynamic=True)
+                    logger.info(f"Compiled embedding model forward pass ({backend} backend)")
+                except Exception as e:
+                    logger.warning(f"Could not compile model: {e}")
             
             self._embedding_model = model
             
@@ -167,6 +519,39 @@ class M2ModelManager:
             logger.error(f"Failed to load embedding model: {e}")
             raise
     
+    def embedding_precision(self) -> str:
+        """
+        Precision the embedding model runs at (fp16, int8 or fp32), loading it
+        if needed, since quantization depends on the host device
+        """
+        self.load_embedding_model()
+        return self._embedding_precision
+    
+    def load_static_model(self):
+        """
+        Load the model2vec static embedding model used for bulk full-text chunks
+        """
+        if self._static_model is not None:
+            return self._static_model
+        
+        if not MODEL2VEC_AVAILABLE:
+            raise RuntimeError("model2vec is not installed")
+        
+        start_time = time.time()
+        
+        try:
+            logger.info(f"Loading static embedding model: {self.config.static_model_name}")
+            self._static_model = StaticModel.from_pretrained(self.config.static_model_name)
+            
+            load_time = time.time() - start_time
+            logger.info(f"Static embedding model loaded successfully in {load_time:.2f}s")
+            
+            return self._static_model
+            
+        except Exception as e:
+            logger.error(f"Failed to load static embedding model: {e}")
+            raise
+    
     def load_spacy_model(self) -> spacy.Language:
         """
         Load and configure spaCy biomedical model for NER
@@ -179,24 +564,24 @@ class M2ModelManager:
         try:
             logger.info(f"Loading spaCy model: {self.config.spacy_model_name}")
             
+            # Must happen before loading so the model is allocated on the GPU
+            if self.config.spacy_use_gpu:
+                self._prefer_spacy_gpu()
+            
             # Check if model is installed
             if not spacy.util.is_package(self.config.spacy_model_name):
                 logger.error(f"spaCy model {self.config.spacy_model_name} not installed")
                 logger.info("Install with: python -m spacy download en_core_sci_lg")
                 raise ValueError(f"Model {self.config.spacy_model_name} not found")
             
-            # Load model
-            nlp = spacy.load(self.config.spacy_model_name)
-            
-            # Optimize for batch processing
-            nlp.max_length = 1000000  # Increase max length for long documents
-            
-            # Disable unnecessary components for better performance
-            disable = ["tagger", "parser", "lemmatizer"] if "ner" in nlp.pipe_names else []
-            for component in disable:
-                if component in nlp.pipe_names:
-                    nlp.disable_pipes(component)
-                    logger.debug(f"Disabled spaCy component: {component}")
+            # Load the NER-only copy when one was saved for this model version
+            pruned_path = self._pruned_spacy_path()
+            if pruned_path.exists():
+                nlp = _configure_spacy_pipeline(spacy.load(pruned_path))
+                self._spacy_model_source = str(pruned_path)
+            else:
+                nlp = _configure_spacy_pipeline(spacy.load(self.config.spacy_model_name))
+                self._save_pruned_spacy_model(nlp, pruned_path)
             
             self._spacy_model = nlp
             
@@ -209,56 +594,518 @@ class M2ModelManager:
             logger.error(f"Failed to load spaCy model: {e}")
             raise
     
-    def generate_embeddings(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+    @staticmethod
+    def _prefer_spacy_gpu() -> None:
         """
-        Generate semantic embeddings for texts using optimized batching
+        Switch thinc to the GPU if one is available: CUDA through cupy, or
+        Apple silicon through PyTorch's MPS backend
         """
-        if not texts:
+        try:
+            from thinc.api import prefer_gpu, set_gpu_allocator
+            from thinc.util import has_cupy_gpu
+            
+            # Transformer pipelines run through PyTorch; routing cupy through
+            # PyTorch's allocator keeps both in one memory pool
+            if has_cupy_gpu:
+                set_gpu_allocator("pytorch")
+            if prefer_gpu():
+                logger.info(f"spaCy will run on the GPU ({'CUDA' if has_cupy_gpu else 'MPS'})")
+        except Exception as e:
+            logger.warning(f"Could not enable GPU for spaCy, using CPU: {e}")
+    
+    def _pruned_spacy_path(self) -> Path:
+        """Cache location of the NER-only copy of the installed spaCy model"""
+        name = self.config.spacy_model_name
+        version = spacy.util.get_package_version(name) or "unknown"
+        return self.cache_dir / "spacy" / f"{name}-{version}-ner"
+    
+    def _save_pruned_spacy_model(self, nlp: spacy.Language, pruned_path: Path) -> None:
+        """Save an NER-only pipeline so later loads skip the removed weights"""
+        staging_path = pruned_path.with_name(pruned_path.name + ".tmp")
+        try:
+            pruned_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.rmtree(staging_path, ignore_errors=True)
+            nlp.to_disk(staging_path)
+            staging_path.rename(pruned_path)
+            self._spacy_model_source = str(pruned_path)
+            logger.info(f"Saved NER-only spaCy pipeline to {pruned_path}")
+        except Exception as e:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            logger.warning(f"Could not save NER-only spaCy pipeline: {e}")
+    
+    def get_token_lengths(self, texts: List[str]) -> List[int]:
+        """
+        Count embedding-model tokens per text, truncated to the max sequence length
+        """
+        model = self.load_embedding_model()
+        encoded = model.tokenizer(
+            texts,
+            truncation=True,
+            max_length=self.config.max_sequence_length
+        )
+        return [len(input_ids) for input_ids in encoded["input_ids"]]
+    
+    def tokenize(self, texts: List[str]) -> List[List[int]]:
+        """
+        Tokenize texts for the embedding model, truncated and with special tokens,
+        ready for generate_embeddings_from_ids
+        """
+        model = self.load_embedding_model()
+        encoded = model.tokenizer(
+            texts,
+            truncation=True,
+            max_length=self.config.max_sequence_length
+        )
+        return encoded["input_ids"]
+    
+    def generate_embeddings_from_ids(self,
+                                     token_ids: List[np.ndarray],
+                                     batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Generate embeddings from pre-tokenized texts, skipping the tokenizer.
+        
+        Runs the same module pipeline as model.encode (transformer, pooling)
+        and L2-normalizes like generate_embeddings. Inputs are ordered by
+        length and batched under a padded-token budget, so short texts share
+        large batches and long ones small ones. Sequences embedded recently
+        come from the embedding cache.
+        """
+        if not token_ids:
             return np.array([])
         
+        if self.config.embedding_cache_size <= 0:
+            return self._encode_unique(
+                [np.asarray(ids, dtype=np.int32).tobytes() for ids in token_ids],
+                lambda positions: self._encode_token_ids([token_ids[i] for i in positions], batch_size)
+            )
+        
+        keys = [
+            b"i" + hashlib.blake2b(np.ascontiguousarray(ids, dtype=np.int32), digest_size=16).digest()
+            for ids in token_ids
+        ]
+        return self._through_embedding_cache(
+            keys, lambda positions: self._encode_token_ids([token_ids[i] for i in positions], batch_size)
+        )
+    
+    def _encode_token_ids(self,
+                          token_ids: List[np.ndarray],
+                          batch_size: Optional[int] = None) -> np.ndarray:
+        """Run the embedding model over pre-tokenized texts"""
         start_time = time.time()
         
         try:
             model = self.load_embedding_model()
+            tokenizer = model.tokenizer
+            pad_id = tokenizer.pad_token_id or 0
+            with_type_ids = "token_type_ids" in tokenizer.model_input_names
+            device = model.device
             
-            # Optimize batch size
-            if batch_size is None:
-                batch_size = self._optimize_batch_size(self.config.batch_size)
-            
-            self.performance_stats["batch_sizes_used"].append(batch_size)
+            batch_size = self._embedding_batch_size(batch_size)
+            self.performance_stats["batch_sizes_used"].add(batch_size)
             
-            # Clear cache before processing
-            self._clear_mps_cache()
+            # An out-of-memory retry shrinks the token budget with the batch size
+            requested_size = batch_size
             
-            # Generate embeddings in batches
-            logger.debug(f"Generating embeddings for {len(texts)} texts (batch_size: {batch_size})")
+            def run(size: int) -> np.ndarray:
+                return self._forward_token_ids(
+                    model, token_ids, size,
+                    max(1, self.config.max_batch_tokens * size // requested_size),
+                    pad_id, with_type_ids, device
+                )
             
-            embeddings = model.encode(
-                texts,
-                batch_size=batch_size,
-                show_progress_bar=len(texts) > 100,
-                convert_to_numpy=True,
-                device=str(self.device) if self.device.type == "mps" else None
-            )
+            try:
+                embeddings = self._with_oom_backoff(run, batch_size)
+            except RuntimeError as e:
+                # Some ops lack fp16 kernels on MPS; continue in fp32 from here on
+                if "out of memory" in str(e).lower() or not self._is_half(model):
+                    raise
+                logger.warning(f"fp16 forward pass failed, falling back to fp32: {e}")
+                model = self._embedding_model = model.float()
+                self._embedding_precision = "fp32"
+                embeddings = self._with_oom_backoff(run, batch_size)
             
-            # Clear cache after processing
             self._clear_mps_cache()
             
             inference_time = time.time() - start_time
-            self.performance_stats["embedding_inference_times"].append(inference_time)
+            self.performance_stats["embedding_inference_times"].add(inference_time)
             
-            logger.info(f"Generated {len(embeddings)} embeddings in {inference_time:.2f}s "
-                       f"({len(texts)/inference_time:.1f} texts/sec)")
+            logger.info(f"Generated {len(embeddings)} embeddings from token ids in {inference_time:.2f}s "
+                       f"({len(token_ids)/inference_time:.1f} texts/sec)")
             
             return embeddings
             
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings from token ids: {e}")
+            raise
+    
+    @staticmethod
+    def _state_dict_bytes(module: nn.Module) -> int:
+        """Bytes held by a module's state dict, including packed quantized weights"""
+        def tensor_bytes(value) -> int:
+            if isinstance(value, torch.Tensor):
+                return value.numel() * value.element_size()
+            if isinstance(value, (tuple, list)):
+                return sum(map(tensor_bytes, value))
+            return 0
+        return sum(map(tensor_bytes, module.state_dict().values()))
+    
+    @staticmethod
+    def _is_half(model: SentenceTransformer) -> bool:
+        """Whether the model's weights are fp16"""
+        return next(model.parameters()).dtype == torch.float16
+    
+    def _check_forward(self, model: SentenceTransformer) -> None:
+        """Run one short input through the model, raising unless the embedding is finite"""
+        tokenizer = model.tokenizer
+        token_ids = tokenizer(["protein design"], truncation=True,
+                              max_length=self.config.max_sequence_length)["input_ids"]
+        embedding = self._forward_token_ids(
+            model, token_ids, 1, self.config.max_batch_tokens, tokenizer.pad_token_id or 0,
+            "token_type_ids" in tokenizer.model_input_names, model.device
+        )
+        if not np.isfinite(embedding).all():
+            raise ValueError("non-finite embedding from test input")
+    
+    @staticmethod
+    def _length_batches(lengths: np.ndarray, batch_size: int, max_tokens: int) -> List[Tuple[int, int]]:
+        """
+        Split ascending lengths into [start, end) batches of at most batch_size
+        items whose padded size (items x longest) stays within max_tokens
+        """
+        batches = []
+        start, count = 0, len(lengths)
+        while start < count:
+            end = start + 1
+            while (end < count and end - start < batch_size
+                   and (end - start + 1) * lengths[end] <= max_tokens):
+                end += 1
+            batches.append((start, end))
+            start = end
+        return batches
+    
+    @staticmethod
+    def _mean_pooled_model(model: SentenceTransformer) -> Optional[nn.Module]:
+        """
+        The HF model behind a Transformer -> mean Pooling (-> Normalize)
+        SentenceTransformer, which can be called directly; None for other layouts
+        """
+        modules = list(model._modules.values())
+        if len(modules) < 2 or not hasattr(modules[0], "auto_model"):
+            return None
+        
+        pooling_config = getattr(modules[1], "get_config_dict", dict)()
+        pooling_modes = {key: value for key, value in pooling_config.items()
+                         if key.startswith("pooling_mode_")}
+        if not pooling_modes.get("pooling_mode_mean_tokens") or sum(map(bool, pooling_modes.values())) != 1:
+            return None
+        
+        # Normalize is applied afterwards anyway; anything else changes the output
+        if any(type(module).__name__ != "Normalize" for module in modules[2:]):
+            return None
+        
+        return modules[0].auto_model
+    
+    @classmethod
+    def _forward_token_ids(cls,
+                           model: SentenceTransformer,
+                           token_ids: List[np.ndarray],
+                           batch_size: int,
+                           max_tokens: int,
+                           pad_id: int,
+                           with_type_ids: bool,
+                           device: torch.device) -> np.ndarray:
+        """
+        Run the model's forward pass over length-sorted, token-budgeted
+        batches, returning embeddings in input order
+        """
+        lengths = np.fromiter(map(len, token_ids), dtype=np.int64, count=len(token_ids))
+        order = np.argsort(lengths, kind="stable")
+        sorted_lengths = lengths[order]
+        mean_pooled_model = cls._mean_pooled_model(model)
+        
+        batches = cls._length_batches(sorted_lengths, batch_size, max_tokens)
+        
+        # Two padding buffers sized for the largest batch: one feeds the
+        # running forward pass while the other is filled for the next batch
+        max_cells = max((end - start) * int(sorted_lengths[end - 1]) for start, end in batches)
+        input_buffers = np.empty((2, max_cells), dtype=np.int64)
+        mask_buffers = np.empty((2, max_cells), dtype=np.int64)
+        
+        # Grad mode is per thread: the prefetch thread enters inference mode itself
+        @torch.inference_mode()
+        def prepare(batch: Tuple[int, int], slot: int) -> Tuple[np.ndarray, Dict[str, torch.Tensor]]:
+            batch_start, batch_end = batch
+            batch_order = order[batch_start:batch_end]
+            max_length = int(sorted_lengths[batch_end - 1])
+            cells = len(batch_order) * max_length
+            
+            input_ids = input_buffers[slot, :cells].reshape(len(batch_order), max_length)
+            attention_mask = mask_buffers[slot, :cells].reshape(len(batch_order), max_length)
+            input_ids.fill(pad_id)
+            attention_mask.fill(0)
+            for row, i in enumerate(batch_order):
+                ids = token_ids[i]
+                input_ids[row, :len(ids)] = ids
+                attention_mask[row, :len(ids)] = 1
+            
+            features = {
+                "input_ids": torch.from_numpy(input_ids).to(device, non_blocking=True),
+                "attention_mask": torch.from_numpy(attention_mask).to(device, non_blocking=True),
+            }
+            if with_type_ids:
+                features["token_type_ids"] = torch.zeros_like(features["input_ids"])
+            return batch_order, features
+        
+        embeddings: Optional[np.ndarray] = None
+        with torch.inference_mode(), contextlib.closing(_prefetched(batches, prepare)) as prepared:
+            for batch_order, features in prepared:
+                if mean_pooled_model is not None:
+                    # Masked mean over tokens, as the Pooling module computes it
+                    hidden = mean_pooled_model(**features)[0].float()
+                    mask = features["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                    output = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+                else:
+                    output = model(features)["sentence_embedding"].float()
+                output = torch.nn.functional.normalize(output, dim=1).cpu().numpy()
+                
+                # Copying the output back waits for this batch, after which its
+                # buffer slot is free for the prefetch thread; scatter each batch
+                # straight to its input positions
+                if embeddings is None:
+                    embeddings = np.empty((len(token_ids), output.shape[1]), dtype=np.float32)
+                embeddings[batch_order] = output
+        
+        return embeddings
+    
+    def generate_embeddings(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Generate semantic embeddings for texts using optimized batching
+        
+        Texts embedded recently (repeated titles, boilerplate) come from the
+        embedding cache; only the rest reach the model.
+        """
+        if not texts:
+            return np.array([])
+        
+        if self.config.embedding_cache_size <= 0:
+            return self._encode_unique(texts, lambda positions: self._encode_texts(
+                [texts[i] for i in positions], batch_size
+            ))
+        
+        keys = [b"t" + hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest() for text in texts]
+        return self._through_embedding_cache(
+            keys, lambda positions: self._encode_texts([texts[i] for i in positions], batch_size)
+        )
+    
+    def iter_embeddings(self,
+                        texts: Iterable[str],
+                        chunk_size: int = 4096,
+                        batch_size: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        Generate embeddings for a large or streamed corpus, yielding one
+        (<= chunk_size, dim) array per chunk of consecutive texts
+        
+        Peak memory is bounded by the chunk rather than the corpus (1M
+        MiniLM embeddings alone are ~1.5GB), so callers writing to a store
+        or index never hold every vector at once. Length sorting happens
+        within each chunk, so larger chunks pad less.
+        """
+        texts = iter(texts)
+        while chunk := list(itertools.islice(texts, chunk_size)):
+            yield self.generate_embeddings(chunk, batch_size)
+    
+    async def aembed(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings from async code, merging requests that arrive
+        within coalesce_window_ms of each other into one model pass
+        
+        Many tasks embedding a few texts each then share large batches
+        instead of launching one small pass apiece. Encoding runs on a worker
+        thread, so the event loop stays responsive.
+        """
+        if not texts:
+            return np.array([])
+        
+        loop = asyncio.get_running_loop()
+        if self._embed_task is None or self._embed_task.done() or self._embed_task.get_loop() is not loop:
+            self._embed_queue = asyncio.Queue()
+            self._embed_task = loop.create_task(self._batching_loop(self._embed_queue))
+        
+        future = loop.create_future()
+        self._embed_queue.put_nowait((texts, future))
+        return await future
+    
+    async def _batching_loop(self, requests: asyncio.Queue):
+        """Serve aembed requests, one merged generate_embeddings call per window"""
+        loop = asyncio.get_running_loop()
+        window = self.config.coalesce_window_ms / 1000
+        
+        while True:
+            pending = [await requests.get()]
+            total = len(pending[0][0])
+            deadline = loop.time() + window
+            while total < self.config.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(requests.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(request)
+                total += len(request[0])
+            
+            merged = [text for texts, _ in pending for text in texts]
+            try:
+                embeddings = await loop.run_in_executor(None, self.generate_embeddings, merged)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            offset = 0
+            for texts, future in pending:
+                if not future.done():
+                    future.set_result(embeddings[offset:offset + len(texts)])
+                offset += len(texts)
+    
+    @staticmethod
+    def _encode_unique(keys: List[Any], encode: Callable[[List[int]], np.ndarray]) -> np.ndarray:
+        """
+        Encode each distinct key once via encode(positions of first
+        occurrences), repeating rows for duplicate inputs
+        """
+        first_position: Dict[Any, int] = {}
+        for position, key in enumerate(keys):
+            first_position.setdefault(key, position)
+        if len(first_position) == len(keys):
+            return encode(list(range(len(keys))))
+        
+        unique_embeddings = encode(list(first_position.values()))
+        unique_index = {key: index for index, key in enumerate(first_position)}
+        return unique_embeddings[[unique_index[key] for key in keys]]
+    
+    def _through_embedding_cache(self,
+                                 keys: List[bytes],
+                                 encode: Callable[[List[int]], np.ndarray]) -> np.ndarray:
+        """
+        Assemble embeddings for keyed inputs from the cache, encoding each
+        missing key once via encode(positions of first occurrences)
+        """
+        cache = self._embedding_cache
+        rows: List[Optional[np.ndarray]] = []
+        miss_positions: List[int] = []
+        first_miss: Dict[bytes, int] = {}
+        with self._embedding_cache_lock:
+            for position, key in enumerate(keys):
+                row = cache.get(key)
+                if row is not None:
+                    cache.move_to_end(key)
+                elif key not in first_miss:
+                    first_miss[key] = position
+                    miss_positions.append(position)
+                rows.append(row)
+            self.performance_stats["embedding_cache_hits"] += len(keys) - len(miss_positions)
+        
+        if miss_positions:
+            # Encoded outside the lock so other callers keep hitting the cache meanwhile
+            encoded = encode(miss_positions)
+            with self._embedding_cache_lock:
+                for position, embedding in zip(miss_positions, encoded):
+                    # Own copy, so a cached row does not pin its whole batch array
+                    rows[position] = cache[keys[position]] = embedding.copy()
+                while len(cache) > self.config.embedding_cache_size:
+                    cache.popitem(last=False)
+        
+        for position, key in enumerate(keys):
+            if rows[position] is None:
+                rows[position] = rows[first_miss[key]]
+        
+        return np.stack(rows)
+    
+    def _encode_texts(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Run the embedding model over texts
+        
+        Texts are tokenized once up front so the forward pass can batch them
+        by token length instead of model.encode's fixed batch size.
+        """
+        try:
+            token_ids = self.tokenize(texts)
         except Exception as e:
             logger.error(f"Failed to generate embeddings: {e}")
             raise
+        
+        return self._encode_token_ids(token_ids, batch_size)
+    
+    def generate_static_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings with the static model: token lookups and a mean,
+        no transformer forward pass
+        """
+        if not texts:
+            return np.array([])
+        
+        start_time = time.time()
+        
+        try:
+            embeddings = np.asarray(self.load_static_model().encode(texts), dtype=np.float32)
+            
+            inference_time = time.time() - start_time
+            self.performance_stats["embedding_inference_times"].add(inference_time)
+            
+            logger.info(f"Generated {len(embeddings)} static embeddings in {inference_time:.2f}s")
+            
+            return embeddings
+            
+        except Exception as e:
+            logger.error(f"Failed to generate static embeddings: {e}")
+            raise
     
-    def extract_entities(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+    def extract_entities(self,
+                         texts: List[str],
+                         batch_size: Optional[int] = None,
+                         n_process: Optional[int] = None) -> List[List[Dict[str, Any]]]:
         """
         Extract named entities from texts using spaCy biomedical model
+        
+        Returns one list of entity dicts per text; see extract_entity_spans.
+        """
+        return [
+            [
+                {"text": text, "label": label, "start": start, "end": end, "confidence": confidence}
+                for text, label, start, end, confidence in spans
+            ]
+            for spans in self.extract_entity_spans(texts, batch_size, n_process)
+        ]
+    
+    def extract_entity_batch(self,
+                             texts: List[str],
+                             batch_size: Optional[int] = None,
+                             n_process: Optional[int] = None) -> EntityBatch:
+        """
+        Extract named entities from texts as one columnar EntityBatch; see
+        extract_entity_spans
+        """
+        return EntityBatch.from_spans(self.extract_entity_spans(texts, batch_size, n_process))
+    
+    def extract_entity_spans(self,
+                             texts: List[str],
+                             batch_size: Optional[int] = None,
+                             n_process: Optional[int] = None) -> List[List[EntitySpan]]:
+        """
+        Extract named entities from texts as (text, label, start, end, confidence) spans
+        
+        n_process > 1 (or -1 for every core) parses in a pool of worker
+        processes that stays alive across calls; None uses half the cores
+        for more than AUTO_PARALLEL_MIN_TEXTS distinct texts. On Linux the workers are
+        forked and share the loaded model copy-on-write; elsewhere they are
+        spawned, load the model once each, and the calling script must guard
+        its entry point with ``if __name__ == "__main__":``. Falls back to one
+        process on GPU and for inputs too small to fill a batch per worker.
+        
+        Identical texts are parsed once; their positions share one result list.
         """
         if not texts:
             return []
@@ -272,25 +1119,40 @@ class M2ModelManager:
             if batch_size is None:
                 batch_size = self._optimize_batch_size(self.config.batch_size // 2)
             
-            logger.debug(f"Extracting entities from {len(texts)} texts (batch_size: {batch_size})")
+            # First-occurrence order keeps the pipe input stable for a given batch
+            position_by_text: Dict[str, int] = {}
+            for text in texts:
+                position_by_text.setdefault(text, len(position_by_text))
+            unique_texts = list(position_by_text)
             
-            all_entities = []
+            if n_process is None:
+                n_process = (max(1, (os.cpu_count() or 1) // 2)
+                             if len(unique_texts) > AUTO_PARALLEL_MIN_TEXTS else 1)
+            
+            # Worker processes only pay off on CPU with at least two batches to share
+            if n_process != 1 and (len(unique_texts) < 2 * batch_size or self.spacy_uses_gpu()):
+                n_process = 1
+            
+            logger.debug(f"Extracting entities from {len(unique_texts)} unique of {len(texts)} texts "
+                        f"(batch_size: {batch_size}, n_process: {n_process})")
+            
+            if n_process == 1:
+                # Process in batches using spaCy's pipe for efficiency
+                unique_entities = [_doc_entity_spans(doc)
+                                   for doc in nlp.pipe(unique_texts, batch_size=batch_size)]
+            else:
+                pool = self._get_ner_pool(n_process)
+                batches = [unique_texts[i:i + batch_size]
+                           for i in range(0, len(unique_texts), batch_size)]
+                unique_entities = [entities
+                                   for batch in pool.map(_ner_worker_batch, batches,
+                                                         [batch_size] * len(batches))
+                                   for entities in batch]
             
-            # Process in batches using spaCy's pipe for efficiency
-            for doc in nlp.pipe(texts, batch_size=batch_size):
-                entities = []
-                for ent in doc.ents:
-                    entities.append({
-                        "text": ent.text,
-                        "label": ent.label_,
-                        "start": ent.start_char,
-                        "end": ent.end_char,
-                        "confidence": getattr(ent, "_.confidence", 1.0)  # Default confidence
-                    })
-                all_entities.append(entities)
+            all_entities = [unique_entities[position_by_text[text]] for text in texts]
             
             inference_time = time.time() - start_time
-            self.performance_stats["ner_inference_times"].append(inference_time)
+            self.performance_stats["ner_inference_times"].add(inference_time)
             
             total_entities = sum(len(entities) for entities in all_entities)
             logger.info(f"Extracted {total_entities} entities from {len(texts)} texts in {inference_time:.2f}s")
@@ -301,34 +1163,134 @@ class M2ModelManager:
             logger.error(f"Failed to extract entities: {e}")
             raise
     
+    def _get_ner_pool(self, n_process: int) -> ProcessPoolExecutor:
+        """
+        Get the NER worker pool, (re)starting it for a new worker count
+        """
+        workers = (os.cpu_count() or 1) if n_process < 0 else n_process
+        if self._ner_pool is not None and self._ner_pool_workers == workers:
+            return self._ner_pool
+        
+        self._shutdown_ner_pool()
+        
+        # Forked workers inherit the already-loaded pipeline instead of reloading it
+        nlp = self.load_spacy_model()
+        if sys.platform.startswith("linux"):
+            context, inherited = multiprocessing.get_context("fork"), nlp
+        else:
+            context, inherited = multiprocessing.get_context("spawn"), None
+        
+        self._ner_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_ner_worker,
+            initargs=(self._spacy_model_source, inherited)
+        )
+        self._ner_pool_workers = workers
+        logger.info(f"Started {workers} NER worker processes ({context.get_start_method()})")
+        
+        return self._ner_pool
+    
+    def _shutdown_ner_pool(self) -> None:
+        """Stop the NER worker processes, if running"""
+        if self._ner_pool is not None:
+            self._ner_pool.shutdown()
+            self._ner_pool = None
+            self._ner_pool_workers = 0
+    
+    def load_phrase_matcher(self, lexicon_path: str) -> PhraseMatcher:
+        """
+        Load a case-insensitive PhraseMatcher from a lexicon file with one
+        ``term<TAB>label`` per line; the label defaults to PROTEIN
+        """
+        if lexicon_path in self._phrase_matchers:
+            return self._phrase_matchers[lexicon_path]
+        
+        nlp = self.load_spacy_model()
+        terms_by_label: Dict[str, List[str]] = {}
+        with open(lexicon_path, encoding="utf-8") as lexicon:
+            for line in lexicon:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                term, _, label = line.partition("\t")
+                terms_by_label.setdefault(label.strip() or "PROTEIN", []).append(term.strip())
+        
+        matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+        for label, terms in terms_by_label.items():
+            # Tokenizer only: patterns need no tagging or parsing
+            matcher.add(label, list(nlp.tokenizer.pipe(terms)))
+        
+        logger.info(f"Loaded phrase matcher with {sum(map(len, terms_by_label.values()))} terms "
+                   f"from {lexicon_path}")
+        self._phrase_matchers[lexicon_path] = matcher
+        return matcher
+    
+    def match_phrases(self, texts: List[str], lexicon_path: str) -> List[List[EntitySpan]]:
+        """
+        Find lexicon terms in texts, returning spans shaped like extract_entity_spans.
+        
+        Only the tokenizer runs, so this is far cheaper than NER on short texts.
+        """
+        if not texts:
+            return []
+        
+        matcher = self.load_phrase_matcher(lexicon_path)
+        nlp = self.load_spacy_model()
+        
+        all_entities = []
+        for doc in nlp.tokenizer.pipe(texts):
+            # Overlapping hits keep the longest span
+            spans = spacy.util.filter_spans(matcher(doc, as_spans=True))
+            all_entities.append([
+                (span.text, span.label_, span.start_char, span.end_char, 1.0)
+                for span in spans
+            ])
+        
+        return all_entities
+    
+    @staticmethod
+    def spacy_uses_gpu() -> bool:
+        """Whether spaCy models run on the GPU (after spacy.prefer_gpu())"""
+        try:
+            from thinc.api import get_current_ops
+            return get_current_ops().device_type != "cpu"
+        except Exception:
+            return False
+    
     def get_performance_stats(self) -> Dict[str, Any]:
         """Get performance statistics for monitoring and optimization"""
         stats = {}
         
-        if self.performance_stats["embedding_inference_times"]:
-            embedding_times = self.performance_stats["embedding_inference_times"]
+        embedding_times = self.performance_stats["embedding_inference_times"]
+        if embedding_times.n:
             stats["embedding"] = {
-                "avg_inference_time": np.mean(embedding_times),
-                "min_inference_time": np.min(embedding_times),
-                "max_inference_time": np.max(embedding_times),
-                "total_inferences": len(embedding_times)
+                "avg_inference_time": embedding_times.mean,
+                "min_inference_time": embedding_times.mn,
+                "max_inference_time": embedding_times.mx,
+                "total_inferences": embedding_times.n
             }
         
-        if self.performance_stats["ner_inference_times"]:
-            ner_times = self.performance_stats["ner_inference_times"]
+        ner_times = self.performance_stats["ner_inference_times"]
+        if ner_times.n:
             stats["ner"] = {
-                "avg_inference_time": np.mean(ner_times),
-                "min_inference_time": np.min(ner_times),
-                "max_inference_time": np.max(ner_times),
-                "total_inferences": len(ner_times)
+                "avg_inference_time": ner_times.mean,
+                "min_inference_time": ner_times.mn,
+                "max_inference_time": ner_times.mx,
+                "total_inferences": ner_times.n
             }
         
-        if self.performance_stats["batch_sizes_used"]:
-            batch_sizes = self.performance_stats["batch_sizes_used"]
+        stats["embedding_cache"] = {
+            "hits": self.performance_stats["embedding_cache_hits"],
+            "size": len(self._embedding_cache)
+        }
+        
+        batch_sizes = self.performance_stats["batch_sizes_used"]
+        if batch_sizes.n:
             stats["batch_processing"] = {
-                "avg_batch_size": np.mean(batch_sizes),
-                "min_batch_size": np.min(batch_sizes),
-                "max_batch_size": np.max(batch_sizes)
+                "avg_batch_size": batch_sizes.mean,
+                "min_batch_size": batch_sizes.mn,
+                "max_batch_size": batch_sizes.mx
             }
         
         # System info
@@ -345,48 +1307,82 @@ class M2ModelManager:
         logger.info("Warming up ML models...")
         
         # Warm up embedding model
+        sample_texts = [
+            "Protein folding is a fundamental biological process.",
+            "Machine learning accelerates drug discovery research."
+        ]
         try:
-            sample_texts = [
-                "Protein folding is a fundamental biological process.",
-                "Machine learning accelerates drug discovery research."
-            ]
-            self.generate_embeddings(sample_texts)
-            logger.debug("Embedding model warmed up successfully")
+            # Short and full-length batches, so a compiled forward pass traces both
+            # extremes up front; bypasses the embedding cache
+            start_time = time.time()
+            self._encode_texts(sample_texts)
+            self._encode_texts([" ".join(sample_texts * self.config.max_sequence_length)])
+            if self.config.compile_model:
+                # The second shape recompiles as a dynamic graph; run it once more
+                # so no real request pays for a guard miss
+                self._encode_texts(sample_texts)
+            logger.debug(f"Embedding model warmed up in {time.time() - start_time:.2f}s")
         except Exception as e:
             logger.warning(f"Could not warm up embedding model: {e}")
         
         # Warm up spaCy model
         try:
-            self.extract_entities(sample_texts)
-            logger.debug("spaCy model warmed up successfully")
+            start_time = time.time()
+            self.extract_entity_spans(sample_texts, n_process=1)
+            logger.debug(f"spaCy model warmed up in {time.time() - start_time:.2f}s")
         except Exception as e:
             logger.warning(f"Could not warm up spaCy model: {e}")
         
+        self._warm = True
         logger.info("Model warmup completed")
     
+    def is_warm(self) -> bool:
+        """Whether warmup_models has run since the models were last released"""
+        return self._warm
+    
     def cleanup(self):
         """Clean up resources and clear caches"""
         logger.info("Cleaning up ML models...")
         
         # Clear MPS cache
-        self._clear_mps_cache()
+        self._clear_mps_cache(force=True)
+        
+        self._shutdown_ner_pool()
+        
+        if self._embed_task is not None and not self._embed_task.done():
+            try:
+                self._embed_task.get_loop().call_soon_threadsafe(self._embed_task.cancel)
+            except RuntimeError:
+                pass  # Loop already closed
+        self._embed_queue = self._embed_task = None
         
         # Clear model references
         self._embedding_model = None
+        self._embedding_precision = "fp32"
         self._spacy_model = None
+        self._static_model = None
+        self._phrase_matchers.clear()
+        with self._embedding_cache_lock:
+            self._embedding_cache.clear()
+        self._warm = False
         
         logger.info("Model cleanup completed")
 
 
 # Convenience functions for easy access
 _model_manager: Optional[M2ModelManager] = None
+_model_manager_lock = threading.Lock()
 
 def get_model_manager() -> M2ModelManager:
-    """Get singleton model manager instance"""
+    """Get singleton model manager instance, created once across threads"""
     global _model_manager
-    if _model_manager is None:
-        _model_manager = M2ModelManager()
-    return _model_manager
+    manager = _model_manager
+    if manager is None:
+        with _model_manager_lock:
+            if _model_manager is None:
+                _model_manager = M2ModelManager()
+            manager = _model_manager
+    return manager
 
 def generate_embeddings(texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
     """Convenience function to generate embeddings"""
@@ -399,6 +1395,7 @@ def extract_entities(texts: List[str], batch_size: Optional[int] = None) -> List
 def cleanup_models():
     """Convenience function to cleanup models"""
     global _model_manager
-    if _model_manager:
-        _model_manager.cleanup()
-        _model_manager = None
\ No newline at end of file
+    with _model_manager_lock:
+        if _model_manager:
+            _model_manager.cleanup()
+            _model_manager = None
\ No newline at end of file
@@ -5,13 +5,30 @@ This module coordinates the complete NLP processing pipeline, integrating
 embedding generation, entity extraction, and other text processing tasks.
 """
 
+import hashlib
 import logging
 import time
 import asyncio
-from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable, Iterable
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
+import re
+import threading
+import numpy as np
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 from core.models import Paper, Entity
 from core.repository import PaperRepository, EmbeddingRepository, EntityRepository
@@ -22,6 +39,126 @@ from processing.pdf_processor import PDFProcessor
 
 logger = logging.getLogger(__name__)
 
+# Keyword-based scoring for protein design relevance
+PROTEIN_KEYWORDS = (
+    'protein', 'peptide', 'enzyme', 'antibody', 'antigen',
+    'folding', 'structure', 'design', 'engineering', 'modeling',
+    'binding', 'interaction', 'crystal', 'nmr', 'cryo-em',
+    'mutation', 'variant', 'evolution', 'directed evolution'
+)
+
+HIGH_IMPACT_JOURNALS = (
+    'nature', 'science', 'cell', 'pnas', 'nature biotechnology',
+    'nature structural', 'protein science', 'journal of molecular biology'
+)
+
+_HIGH_IMPACT_JOURNAL_RE = re.compile("|".join(map(re.escape, HIGH_IMPACT_JOURNALS)))
+
+
+def _keyword_automaton(words: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compile words into an Aho-Corasick DFA over UTF-8 bytes.
+    
+    Returns the (n_states, 256) transition table with failure links already
+    folded in, and the ids of the words ending at each state as CSR-style
+    offsets and ids, so matching takes one table lookup per byte.
+    """
+    goto: List[Dict[int, int]] = [{}]
+    outputs: List[Set[int]] = [set()]
+    for word_id, word in enumerate(words):
+        state = 0
+        for byte in word.encode('utf-8'):
+            if byte not in goto[state]:
+                goto.append({})
+                outputs.append(set())
+                goto[state][byte] = len(goto) - 1
+            state = goto[state][byte]
+        outputs[state].add(word_id)
+    
+    delta = np.zeros((len(goto), 256), dtype=np.int32)
+    fail = [0] * len(goto)
+    queue = []
+    for byte, child in goto[0].items():
+        delta[0, byte] = child
+        queue.append(child)
+    
+    # Breadth-first, so each state's failure target is complete before its children
+    for state in queue:
+        outputs[state] |= outputs[fail[state]]
+        delta[state] = delta[fail[state]]
+        for byte, child in goto[state].items():
+            fail[child] = delta[fail[state], byte]
+            delta[state, byte] = child
+            queue.append(child)
+    
+    out_offsets = np.zeros(len(goto) + 1, dtype=np.int32)
+    out_offsets[1:] = np.cumsum([len(ids) for ids in outputs])
+    out_ids = np.array([i for ids in outputs for i in sorted(ids)], dtype=np.int32)
+    return delta, out_offsets, out_ids
+
+
+def _count_keyword_matches(text: np.ndarray,
+                           delta: np.ndarray,
+                           out_offsets: np.ndarray,
+                           out_ids: np.ndarray,
+                           n_words: int) -> int:
+    """
+    Count the distinct words of a _keyword_automaton occurring in UTF-8 text.
+    
+    Compiled with Numba when installed, releasing the GIL so worker threads
+    score papers in parallel; only used in that case, as the interpreted
+    byte loop is slower than the alternatives.
+    """
+    seen = np.zeros(n_words, dtype=np.bool_)
+    count = 0
+    state = 0
+    for i in range(text.shape[0]):
+        state = delta[state, text[i]]
+        for j in range(out_offsets[state], out_offsets[state + 1]):
+            word_id = out_ids[j]
+            if not seen[word_id]:
+                seen[word_id] = True
+                count += 1
+                if count == n_words:
+                    return count
+    return count
+
+
+if NUMBA_AVAILABLE:
+    _count_keyword_matches = njit(cache=True, nogil=True)(_count_keyword_matches)
+
+
+def _build_keyword_counter(words: Iterable[str]) -> Callable[[str], int]:
+    """
+    Build a function counting how many distinct words occur in a text.
+    
+    Runs a compiled Aho-Corasick DFA over the text's UTF-8 bytes when Numba
+    is installed, and one pyahocorasick pass otherwise; both also report
+    overlapping matches. Without either, tests each word in turn.
+    """
+    words = tuple(words)
+    if NUMBA_AVAILABLE and words:
+        delta, out_offsets, out_ids = _keyword_automaton(words)
+        n_words = len(words)
+        
+        def count(text: str) -> int:
+            encoded = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+            return _count_keyword_matches(encoded, delta, out_offsets, out_ids, n_words)
+        
+        # Compile (or load from Numba's cache) now rather than on the first paper
+        count(" ")
+        return count
+    
+    if AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for word in words:
+            automaton.add_word(word, word)
+        automaton.make_automaton()
+        return lambda text: len({word for _, word in automaton.iter(text)})
+    
+    return lambda text: sum(1 for word in words if word in text)
+
+
 @dataclass
 class PipelineConfig:
     """Configuration for the complete NLP pipeline"""
@@ -42,8 +179,9 @@ class PipelineConfig:
     
     # Performance settings
     enable_warmup: bool = True
-    cleanup_on_complete: bool = True
-    monitor_performance: bool = True
+    relevance_cache_size: int = 100000  # Relevance scores kept by title/abstract/journal digest
+    cleanup_on_complete: bool = False  # Models stay loaded for later runs; see shutdown()
+    monitor_performance: bool = True  # Per-paper stage timings in stats["stage_times"]
     
     def __post_init__(self):
         if self.embedding_config is None:
@@ -74,10 +212,10 @@ class PipelineStats:
         self.end_time = None
     
     def start_processing(self):
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
     
     def end_processing(self):
-        self.end_time = time.time()
+        self.end_time = time.perf_counter()
         if self.start_time:
             self.total_processing_time = self.end_time - self.start_time
     
@@ -130,6 +268,14 @@ class NLPPipeline:
         self.embedding_generator = EmbeddingGenerator(embedding_repo, self.config.embedding_config)
         self.entity_extractor = EntityExtractor(entity_repo, self.config.entity_config)
         self.model_manager = get_model_manager()
+        self._count_protein_keywords = _build_keyword_counter(PROTEIN_KEYWORDS)
+        
+        # Relevance scores by digest of the scored fields, least recently used first
+        self._relevance_cache: "OrderedDict[bytes, float]" = OrderedDict()
+        self._relevance_lock = threading.Lock()  # Papers are scored on worker threads
+        
+        # Papers whose extracted text awaits the batch write in _finish_batch
+        self._unsaved_full_text: Set[str] = set()
         
         # Statistics tracking
         self.stats = PipelineStats()
@@ -139,57 +285,62 @@ class NLPPipeline:
     def _calculate_relevance_score(self, paper: Paper) -> float:
         """
         Calculate relevance score for protein design research
+        
+        The score depends only on title, abstract and journal, so papers
+        seen before with the same fields come from the relevance cache.
         """
         try:
-            score = 0.0
-            
-            # Keyword-based scoring for protein design relevance
-            protein_keywords = [
-                'protein', 'peptide', 'enzyme', 'antibody', 'antigen',
-                'folding', 'structure', 'design', 'engineering', 'modeling',
-                'binding', 'interaction', 'crystal', 'nmr', 'cryo-em',
-                'mutation', 'variant', 'evolution', 'directed evolution'
-            ]
-            
-            # Score based on title
-            if paper.title:
-                title_lower = paper.title.lower()
-                title_matches = sum(1 for keyword in protein_keywords if keyword in title_lower)
-                score += title_matches * 0.3
-            
-            # Score based on abstract
-            if paper.abstract:
-                abstract_lower = paper.abstract.lower()
-                abstract_matches = sum(1 for keyword in protein_keywords if keyword in abstract_lower)
-                score += abstract_matches * 0.2
-            
-            # Journal-based scoring
-            high_impact_journals = [
-                'nature', 'science', 'cell', 'pnas', 'nature biotechnology',
-                'nature structural', 'protein science', 'journal of molecular biology'
-            ]
-            
-            if paper.journal:
-                journal_lower = paper.journal.lower()
-                if any(journal in journal_lower for journal in high_impact_journals):
-                    score += 1.0
+            # Without title or abstract only the journal counts, which is
+            # cheaper to score than to look up
+            if not paper.title and not paper.abstract:
+                return self._score_relevance(paper)
             
-            # Normalize score to 0-1 range
-            max_possible_score = len(protein_keywords) * 0.5 + 1.0
-            normalized_score = min(score / max_possible_score, 1.0)
+            key = hashlib.blake2b(
+                f"{paper.title or ''}\0{paper.abstract or ''}\0{paper.journal or ''}".encode('utf-8'),
+                digest_size=16
+            ).digest()
+            cache = self._relevance_cache
+            with self._relevance_lock:
+                score = cache.get(key)
+                if score is not None:
+                    cache.move_to_end(key)
+                    return score
             
-            return normalized_score
+            score = self._score_relevance(paper)
+            with self._relevance_lock:
+                cache[key] = score
+                if len(cache) > self.config.relevance_cache_size:
+                    cache.popitem(last=False)
+            return score
             
         except Exception as e:
             logger.warning(f"Failed to calculate relevance score for paper {paper.id}: {e}")
             return 0.5  # Default score
     
-    def _process_single_paper(self, paper: Paper) -> Dict[str, Any]:
-        """
-        Process a single paper through the complete pipeline
-        """
-        start_time = time.time()
-        result = {
+    def _score_relevance(self, paper: Paper) -> float:
+        """Keyword and journal relevance score of a paper, in [0, 1]"""
+        score = 0.0
+        
+        # Score based on title
+        if paper.title:
+            score += self._count_protein_keywords(paper.title_lc) * 0.3
+        
+        # Score based on abstract
+        if paper.abstract:
+            score += self._count_protein_keywords(paper.abstract_lc) * 0.2
+        
+        # Journal-based scoring
+        if paper.journal and _HIGH_IMPACT_JOURNAL_RE.search(paper.journal_lc):
+            score += 1.0
+        
+        # Normalize score to 0-1 range
+        max_possible_score = len(PROTEIN_KEYWORDS) * 0.5 + 1.0
+        return min(score / max_possible_score, 1.0)
+    
+    @staticmethod
+    def _new_result(paper: Paper) -> Dict[str, Any]:
+        """Empty processing result for a paper"""
+        return {
             "paper_id": paper.id,
             "success": False,
             "stages_completed": [],
@@ -199,92 +350,222 @@ class NLPPipeline:
             "embedding_generated": False,
             "relevance_score": 0.0
         }
+    
+    def _record_outcome(self, result: Dict[str, Any]) -> None:
+        """Mark a result successful if at least one stage completed, and count it"""
+        if result["stages_completed"]:
+            result["success"] = True
+            self.stats.papers_processed += 1
+        else:
+            self.stats.papers_failed += 1
+    
+    def _process_single_paper(self, paper: Paper, embed: bool = True) -> Dict[str, Any]:
+        """
+        Process a single paper through the complete pipeline
+        
+        With embed=False the model stages (embeddings and entities) and the
+        relevance write are left to _finish_batch, which also records the
+        outcome.
+        """
+        start_time = time.perf_counter()
+        result = self._new_result(paper)
         
         try:
             logger.debug(f"Processing paper {paper.id}")
+            self._extract_text_stage(paper, result, defer_write=not embed)
+            self._analyze_paper(paper, result, embed)
             
-            # Stage 1: Text extraction (if needed)
-            if self.config.extract_text and not paper.full_text:
-                stage_start = time.time()
-                try:
-                    if paper.local_pdf_path:
-                        processing_result = self.pdf_processor.process_pdf(paper.local_pdf_path)
-                        if processing_result and processing_result.full_text:
-                            paper.full_text = processing_result.full_text
-                            # Update paper in database
-                            self.paper_repo.update(paper.id, {"full_text": paper.full_text})
-                            logger.debug(f"Extracted text for paper {paper.id}")
-                    
-                    result["stages_completed"].append("text_extraction")
-                    self.stats.add_stage_time("text_extraction", time.time() - stage_start)
-                    
-                except Exception as e:
-                    logger.warning(f"Text extraction failed for paper {paper.id}: {e}")
-                    result["errors"].append(f"text_extraction: {str(e)}")
-            
-            # Stage 2: Embedding generation
-            if self.config.generate_embeddings:
-                stage_start = time.time()
-                try:
-                    embedding_result = self.embedding_generator.generate_paper_embeddings(paper)
-                    if embedding_result:
-                        result["embedding_generated"] = True
-                        result["stages_completed"].append("embedding_generation")
-                        self.stats.embeddings_generated += 1
-                    
-                    self.stats.add_stage_time("embedding_generation", time.time() - stage_start)
-                    
-                except Exception as e:
-                    logger.error(f"Embedding generation failed for paper {paper.id}: {e}")
-                    result["errors"].append(f"embedding_generation: {str(e)}")
-            
-            # Stage 3: Entity extraction
-            if self.config.extract_entities:
-                stage_start = time.time()
-                try:
-                    entities = self.entity_extractor.extract_paper_entities(paper)
-                    result["entities_count"] = len(entities)
-                    result["stages_completed"].append("entity_extraction")
-                    self.stats.entities_extracted += len(entities)
-                    
-                    self.stats.add_stage_time("entity_extraction", time.time() - stage_start)
-                    
-                except Exception as e:
-                    logger.error(f"Entity extraction failed for paper {paper.id}: {e}")
-                    result["errors"].append(f"entity_extraction: {str(e)}")
-            
-            # Stage 4: Relevance calculation
-            if self.config.calculate_relevance:
-                stage_start = time.time()
-                try:
-                    relevance_score = self._calculate_relevance_score(paper)
-                    result["relevance_score"] = relevance_score
-                    
-                    # Update paper with relevance score
-                    self.paper_repo.update(paper.id, {"relevance_score": relevance_score})
-                    result["stages_completed"].append("relevance_calculation")
-                    
-                    self.stats.add_stage_time("relevance_calculation", time.time() - stage_start)
-                    
-                except Exception as e:
-                    logger.warning(f"Relevance calculation failed for paper {paper.id}: {e}")
-                    result["errors"].append(f"relevance_calculation: {str(e)}")
-            
-            # Mark as successful if at least one stage completed
-            if result["stages_completed"]:
-                result["success"] = True
-                self.stats.papers_processed += 1
-            else:
-                self.stats.papers_failed += 1
+            if embed:
+                self._record_outcome(result)
             
         except Exception as e:
             logger.error(f"Unexpected error processing paper {paper.id}: {e}")
             result["errors"].append(f"unexpected_error: {str(e)}")
-            self.stats.papers_failed += 1
+            if embed:
+                self.stats.papers_failed += 1
         
-        result["processing_time"] = time.time() - start_time
+        result["processing_time"] = time.perf_counter() - start_time
         return result
     
+    def _extract_text_stage(self, paper: Paper, result: Dict[str, Any], defer_write: bool = False) -> None:
+        """
+        Stage 1: Text extraction (if needed)
+        
+        With defer_write the text is saved by _finish_batch together with
+        the rest of the batch's paper updates.
+        """
+        monitor = self.config.monitor_performance
+        if self.config.extract_text and not paper.full_text:
+            stage_start = time.perf_counter() if monitor else 0.0
+            try:
+                if paper.local_pdf_path:
+                    processing_result = self.pdf_processor.process_pdf(paper.local_pdf_path)
+                    if processing_result and processing_result.full_text:
+                        paper.full_text = processing_result.full_text
+                        # Update paper in database
+                        if defer_write:
+                            self._unsaved_full_text.add(paper.id)
+                        else:
+                            self.paper_repo.update_full_text(paper.id, paper.full_text)
+                        logger.debug(f"Extracted text for paper {paper.id}")
+                
+                result["stages_completed"].append("text_extraction")
+                if monitor:
+                    self.stats.add_stage_time("text_extraction", time.perf_counter() - stage_start)
+                
+            except Exception as e:
+                logger.warning(f"Text extraction failed for paper {paper.id}: {e}")
+                result["errors"].append(f"text_extraction: {str(e)}")
+    
+    def _analyze_paper(self, paper: Paper, result: Dict[str, Any], embed: bool) -> None:
+        """Stages 2-4: embeddings and entities (when embed), and relevance"""
+        monitor = self.config.monitor_performance
+        # Stage 2: Embedding generation
+        if self.config.generate_embeddings and embed:
+            stage_start = time.perf_counter() if monitor else 0.0
+            try:
+                embedding_result = self.embedding_generator.generate_paper_embeddings(paper)
+                if embedding_result:
+                    result["embedding_generated"] = True
+                    result["stages_completed"].append("embedding_generation")
+                    self.stats.embeddings_generated += 1
+                
+                if monitor:
+                    self.stats.add_stage_time("embedding_generation", time.perf_counter() - stage_start)
+                
+            except Exception as e:
+                logger.error(f"Embedding generation failed for paper {paper.id}: {e}")
+                result["errors"].append(f"embedding_generation: {str(e)}")
+        
+        # Stage 3: Entity extraction
+        if self.config.extract_entities and embed:
+            stage_start = time.perf_counter() if monitor else 0.0
+            try:
+                entities = self.entity_extractor.extract_paper_entities(paper)
+                result["entities_count"] = len(entities)
+                result["stages_completed"].append("entity_extraction")
+                self.stats.entities_extracted += len(entities)
+                
+                if monitor:
+                    self.stats.add_stage_time("entity_extraction", time.perf_counter() - stage_start)
+                
+            except Exception as e:
+                logger.error(f"Entity extraction failed for paper {paper.id}: {e}")
+                result["errors"].append(f"entity_extraction: {str(e)}")
+        
+        # Stage 4: Relevance calculation
+        if self.config.calculate_relevance:
+            stage_start = time.perf_counter() if monitor else 0.0
+            try:
+                relevance_score = self._calculate_relevance_score(paper)
+                result["relevance_score"] = relevance_score
+                
+                # Update paper with relevance score; batches write theirs together
+                if embed:
+                    self.paper_repo.update_relevance_scores({paper.id: relevance_score})
+                result["stages_completed"].append("relevance_calculation")
+                
+                if monitor:
+                    self.stats.add_stage_time("relevance_calculation", time.perf_counter() - stage_start)
+                
+            except Exception as e:
+                logger.warning(f"Relevance calculation failed for paper {paper.id}: {e}")
+                result["errors"].append(f"relevance_calculation: {str(e)}")
+    
+    def _finish_batch(self, papers: List[Paper], results: List[Dict[str, Any]]) -> None:
+        """
+        Embed a batch of papers and extract their entities together, save
+        their extracted texts and relevance scores in one transaction and
+        record each outcome
+        """
+        if self.config.generate_embeddings:
+            self._embed_papers(papers, results)
+        
+        if self.config.extract_entities:
+            self._extract_entities(papers, results)
+        
+        updates = []
+        for paper, result in zip(papers, results):
+            fields = {}
+            if paper.id in self._unsaved_full_text:
+                self._unsaved_full_text.discard(paper.id)
+                fields["full_text"] = paper.full_text
+            if "relevance_calculation" in result["stages_completed"]:
+                fields["relevance_score"] = result["relevance_score"]
+            if fields:
+                updates.append((paper.id, fields, result))
+        
+        if updates:
+            try:
+                self.paper_repo.bulk_update([(paper_id, fields) for paper_id, fields, _ in updates])
+            except Exception as e:
+                logger.warning(f"Failed to store updates for {len(updates)} papers: {e}")
+                for _, fields, result in updates:
+                    if "full_text" in fields:
+                        result["stages_completed"].remove("text_extraction")
+                        result["errors"].append(f"text_extraction: {str(e)}")
+                    if "relevance_score" in fields:
+                        result["stages_completed"].remove("relevance_calculation")
+                        result["errors"].append(f"relevance_calculation: {str(e)}")
+        
+        for result in results:
+            self._record_outcome(result)
+    
+    def _embed_papers(self, papers: List[Paper], results: List[Dict[str, Any]]) -> None:
+        """
+        Embedding stage for a batch of papers, in one generate_batch_embeddings
+        call so their texts share length-sorted model batches
+        """
+        monitor = self.config.monitor_performance
+        stage_start = time.perf_counter() if monitor else 0.0
+        try:
+            embedded_ids = {
+                embedding_result["paper_id"]
+                for embedding_result in self.embedding_generator.generate_batch_embeddings(papers)
+            }
+        except Exception as e:
+            logger.error(f"Embedding generation failed for a batch of {len(papers)} papers: {e}")
+            for result in results:
+                result["errors"].append(f"embedding_generation: {str(e)}")
+            return
+        
+        for paper, result in zip(papers, results):
+            if paper.id in embedded_ids:
+                result["embedding_generated"] = True
+                result["stages_completed"].append("embedding_generation")
+                self.stats.embeddings_generated += 1
+        
+        if monitor:
+            self.stats.add_stage_time("embedding_generation", time.perf_counter() - stage_start)
+    
+    def _extract_entities(self, papers: List[Paper], results: List[Dict[str, Any]]) -> None:
+        """
+        Entity extraction stage for a batch of papers, in one
+        extract_batch_entities call so their texts share one spaCy stream
+        """
+        monitor = self.config.monitor_performance
+        stage_start = time.perf_counter() if monitor else 0.0
+        try:
+            paper_entities = self.entity_extractor.extract_batch_entities(papers)
+        except Exception as e:
+            logger.error(f"Entity extraction failed for a batch of {len(papers)} papers: {e}")
+            for result in results:
+                result["errors"].append(f"entity_extraction: {str(e)}")
+            return
+        
+        for paper, result in zip(papers, results):
+            entities = paper_entities.get(paper.id)
+            if entities is None:
+                result["errors"].append("entity_extraction: extraction failed")
+                continue
+            
+            result["entities_count"] = len(entities)
+            result["stages_completed"].append("entity_extraction")
+            self.stats.entities_extracted += len(entities)
+        
+        if monitor:
+            self.stats.add_stage_time("entity_extraction", time.perf_counter() - stage_start)
+    
     def process_papers(self, papers: List[Paper]) -> Dict[str, Any]:
         """
         Process multiple papers through the pipeline
@@ -293,24 +574,89 @@ class NLPPipeline:
             logger.warning("No papers provided for processing")
             return {"results": [], "stats": self.stats.to_dict()}
         
+        self._start_run(papers)
+        results = []
+        
+        # Per-paper stages run on each batch of papers first (text extraction
+        # feeds the models), then the whole batch goes through the models at once
+        for batch_start in range(0, len(papers), self.config.batch_size):
+            batch = papers[batch_start:batch_start + self.config.batch_size]
+            
+            if self.config.parallel_processing and len(batch) > 1:
+                # Parallel processing
+                batch_results = self._process_papers_parallel(batch, embed=False)
+            else:
+                # Sequential processing
+                batch_results = self._process_papers_sequential(batch, embed=False)
+            
+            self._finish_batch(batch, batch_results)
+            results.extend(batch_results)
+            
+            logger.info(f"Processed {len(results)}/{len(papers)} papers")
+        
+        return self._finish_run(results)
+    
+    async def process_papers_async(self, papers: List[Paper]) -> Dict[str, Any]:
+        """
+        Process multiple papers through the pipeline from async code
+        
+        Text extraction runs for all papers concurrently on worker threads,
+        at most max_workers at a time. The model stages then run batch by
+        batch on one dedicated inference thread, since the models are not
+        re-entrant, and the event loop stays free throughout.
+        """
+        if not papers:
+            logger.warning("No papers provided for processing")
+            return {"results": [], "stats": self.stats.to_dict()}
+        
+        loop = asyncio.get_running_loop()
+        results = [self._new_result(paper) for paper in papers]
+        semaphore = asyncio.Semaphore(self.config.max_workers)
+        
+        async def extract_text(paper: Paper, result: Dict[str, Any]) -> None:
+            async with semaphore:
+                start_time = time.perf_counter()
+                await loop.run_in_executor(None, self._extract_text_stage, paper, result, True)
+                result["processing_time"] += time.perf_counter() - start_time
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="nlp-inference") as inference:
+            await loop.run_in_executor(inference, self._start_run, papers)
+            await asyncio.gather(*(extract_text(paper, result) for paper, result in zip(papers, results)))
+            await loop.run_in_executor(inference, self._analyze_batches, papers, results)
+        
+        return await loop.run_in_executor(None, self._finish_run, results)
+    
+    def _analyze_batches(self, papers: List[Paper], results: List[Dict[str, Any]]) -> None:
+        """Run the model stages over papers whose text is already extracted, batch by batch"""
+        for batch_start in range(0, len(papers), self.config.batch_size):
+            batch = papers[batch_start:batch_start + self.config.batch_size]
+            batch_results = results[batch_start:batch_start + self.config.batch_size]
+            
+            for paper, result in zip(batch, batch_results):
+                start_time = time.perf_counter()
+                try:
+                    self._analyze_paper(paper, result, embed=False)
+                except Exception as e:
+                    logger.error(f"Unexpected error processing paper {paper.id}: {e}")
+                    result["errors"].append(f"unexpected_error: {str(e)}")
+                result["processing_time"] += time.perf_counter() - start_time
+            
+            self._finish_batch(batch, batch_results)
+            logger.info(f"Processed {batch_start + len(batch)}/{len(papers)} papers")
+    
+    def _start_run(self, papers: List[Paper]) -> None:
+        """Reset statistics and warm up models for a pipeline run"""
         logger.info(f"Starting NLP pipeline for {len(papers)} papers")
         self.stats.reset()
         self.stats.start_processing()
         
-        # Warm up models if configured
-        if self.config.enable_warmup:
+        # Warm up models if configured; they stay warm between runs
+        if self.config.enable_warmup and not self.model_manager.is_warm():
             logger.info("Warming up ML models...")
             self.model_manager.warmup_models()
-        
-        results = []
-        
-        if self.config.parallel_processing and len(papers) > 1:
-            # Parallel processing
-            results = self._process_papers_parallel(papers)
-        else:
-            # Sequential processing
-            results = self._process_papers_sequential(papers)
-        
+    
+    def _finish_run(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Close out a pipeline run and report its results"""
         self.stats.end_processing()
         
         # Cleanup if configured
@@ -338,56 +684,35 @@ class NLPPipeline:
             }
         }
     
-    def _process_papers_sequential(self, papers: List[Paper]) -> List[Dict[str, Any]]:
+    def _process_papers_sequential(self, papers: List[Paper], embed: bool = True) -> List[Dict[str, Any]]:
         """Process papers sequentially"""
-        results = []
-        
-        for i, paper in enumerate(papers):
-            result = self._process_single_paper(paper)
-            results.append(result)
-            
-            # Log progress
-            if (i + 1) % 10 == 0 or (i + 1) == len(papers):
-                logger.info(f"Processed {i + 1}/{len(papers)} papers")
-        
-        return results
+        return [self._process_single_paper(paper, embed) for paper in papers]
     
-    def _process_papers_parallel(self, papers: List[Paper]) -> List[Dict[str, Any]]:
+    def _process_papers_parallel(self, papers: List[Paper], embed: bool = True) -> List[Dict[str, Any]]:
         """Process papers in parallel using ThreadPoolExecutor"""
-        results = []
-        completed_count = 0
+        # Each result goes to its paper's slot, keeping input order
+        results: List[Optional[Dict[str, Any]]] = [None] * len(papers)
         
         with ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
             # Submit all papers for processing
-            future_to_paper = {
-                executor.submit(self._process_single_paper, paper): paper 
-                for paper in papers
+            future_to_index = {
+                executor.submit(self._process_single_paper, paper, embed): i
+                for i, paper in enumerate(papers)
             }
             
             # Collect results as they complete
-            for future in as_completed(future_to_paper):
-                paper = future_to_paper[future]
+            for future in as_completed(future_to_index):
+                i = future_to_index[future]
                 try:
-                    result = future.result()
-                    results.append(result)
-                    completed_count += 1
-                    
-                    # Log progress
-                    if completed_count % 10 == 0 or completed_count == len(papers):
-                        logger.info(f"Completed {completed_count}/{len(papers)} papers")
-                        
+                    results[i] = future.result()
                 except Exception as e:
+                    paper = papers[i]
                     logger.error(f"Failed to process paper {paper.id}: {e}")
-                    results.append({
-                        "paper_id": paper.id,
-                        "success": False,
-                        "errors": [f"execution_error: {str(e)}"]
-                    })
-                    self.stats.papers_failed += 1
-        
-        # Sort results by paper order
-        paper_order = {paper.id: i for i, paper in enumerate(papers)}
-        results.sort(key=lambda x: paper_order.get(x["paper_id"], len(papers)))
+                    result = self._new_result(paper)
+                    result["errors"].append(f"execution_error: {str(e)}")
+                    results[i] = result
+                    if embed:
+                        self.stats.papers_failed += 1
         
         return results
     
@@ -396,30 +721,16 @@ class NLPPipeline:
         Process all papers that haven't been processed yet
         """
         # Get papers that need processing (no embeddings or entities)
-        unprocessed_papers = []
-        
-        # Check for papers without embeddings
-        if self.config.generate_embeddings:
-            papers_without_embeddings = self.paper_repo.get_papers_without_embeddings(limit)
-            unprocessed_papers.extend(papers_without_embeddings)
-        
-        # Check for papers without entities
-        if self.config.extract_entities:
-            papers_without_entities = self.paper_repo.get_papers_without_entities(limit)
-            # Add papers that aren't already in the list
-            existing_ids = {p.id for p in unprocessed_papers}
-            for paper in papers_without_entities:
-                if paper.id not in existing_ids:
-                    unprocessed_papers.append(paper)
+        unprocessed_papers = self.paper_repo.get_unprocessed_papers(
+            need_embeddings=self.config.generate_embeddings,
+            need_entities=self.config.extract_entities,
+            limit=limit
+        )
         
         if not unprocessed_papers:
             logger.info("No unprocessed papers found")
             return {"results": [], "stats": self.stats.to_dict()}
         
-        # Limit if specified
-        if limit and len(unprocessed_papers) > limit:
-            unprocessed_papers = unprocessed_papers[:limit]
-        
         logger.info(f"Found {len(unprocessed_papers)} papers that need processing")
         return self.process_papers(unprocessed_papers)
     
@@ -438,6 +749,15 @@ class NLPPipeline:
                 "model_manager": self.model_manager.get_performance_stats()
             }
         }
+    
+    def shutdown(self) -> None:
+        """
+        Release the shared ML models once no more papers will be processed
+        
+        Models otherwise stay loaded and warm across pipeline runs.
+        """
+        logger.info("Cleaning up models...")
+        cleanup_models()
 
 
 # Convenience functions
@@ -6,6 +6,7 @@ import aiofiles
 from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple
 import hashlib
+import mmap
 import tempfile
 import logging
 from dataclasses import dataclass
@@ -129,6 +130,10 @@ class PDFProcessor:
                 processing_time=time.time() - start_time
             )
     
+    def process_pdf(self, pdf_path: str) -> ProcessingResult:
+        """Extract text from a local PDF, from synchronous code."""
+        return asyncio.run(self._extract_text_from_pdf(Path(pdf_path)))
+    
     async def _get_pdf_path(self, paper: Paper) -> Optional[Path]:
         """Get local path to PDF, downloading if necessary."""
         # Check if already downloaded
@@ -176,39 +181,53 @@ class PDFProcessor:
             return False
     
     async def _extract_text_from_pdf(self, pdf_path: Path) -> ProcessingResult:
-        """Extract text from PDF using available methods."""
+        """Extract text from PDF using available methods.
+        
+        The file is memory-mapped once and shared by every method tried, so
+        the parsers' many small seeks and reads become memory accesses
+        instead of system calls.
+        """
         # Try methods in order of preference
         methods = ["pdfplumber", "pymupdf", "pypdf2"]
         
-        for method in methods:
-            if method in self.available_methods:
-                try:
-                    result = await self._extract_with_method(pdf_path, method)
-                    if result.success and result.full_text.strip():
-                        return result
-                except Exception as e:
-                    self.logger.warning(f"Method {method} failed: {e}")
-                    continue
+        try:
+            with open(pdf_path, 'rb') as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for method in methods:
+                    if method in self.available_methods:
+                        try:
+                            data.seek(0)
+                            result = await self._extract_with_method(data, method)
+                            if result.success and result.full_text.strip():
+                                return result
+                        except Exception as e:
+                            self.logger.warning(f"Method {method} failed: {e}")
+                            continue
+        except (OSError, ValueError) as e:  # mmap rejects empty files with ValueError
+            return ProcessingResult(
+                success=False,
+                error_message=f"Could not read PDF: {e}"
+            )
         
         return ProcessingResult(
             success=False,
             error_message="All extraction methods failed"
         )
     
-    async def _extract_with_method(self, pdf_path: Path, method: str) -> ProcessingResult:
+    async def _extract_with_method(self, data: mmap.mmap, method: str) -> ProcessingResult:
         """Extract text using specific method."""
         self.logger.debug(f"Extracting text with {method}")
         
         if method == "pdfplumber":
-            return await self._extract_with_pdfplumber(pdf_path)
+            return await self._extract_with_pdfplumber(data)
         elif method == "pymupdf":
-            return await self._extract_with_pymupdf(pdf_path)
+            return await self._extract_with_pymupdf(data)
         elif method == "pypdf2":
-            return await self._extract_with_pypdf2(pdf_path)
+            return await self._extract_with_pypdf2(data)
         else:
             raise ValueError(f"Unknown extraction method: {method}")
     
-    async def _extract_with_pdfplumber(self, pdf_path: Path) -> ProcessingResult:
+    async def _extract_with_pdfplumber(self, data: mmap.mmap) -> ProcessingResult:
         """Extract text using pdfplumber (best for text extraction)."""
         import pdfplumber
         
@@ -216,7 +235,7 @@ class PDFProcessor:
             full_text = ""
             tables_text = []
             
-            with pdfplumber.open(pdf_path) as pdf:
+            with pdfplumber.open(data) as pdf:
                 for page_num, page in enumerate(pdf.pages):
                     # Extract text
                     page_text = page.extract_text()
@@ -247,12 +266,13 @@ class PDFProcessor:
                 error_message=f"pdfplumber extraction failed: {e}"
             )
     
-    async def _extract_with_pymupdf(self, pdf_path: Path) -> ProcessingResult:
+    async def _extract_with_pymupdf(self, data: mmap.mmap) -> ProcessingResult:
         """Extract text using PyMuPDF (good for complex layouts)."""
         import fitz
         
         try:
-            doc = fitz.open(pdf_path)
+            # PyMuPDF only takes bytes streams, so this method copies the file
+            doc = fitz.open(stream=data[:], filetype="pdf")
             full_text = ""
             figures_text = []
             
@@ -276,6 +296,7 @@ class PDFProcessor:
                 except Exception:
                     pass
             
+            page_count = len(doc)
             doc.close()
             
             # Parse sections
@@ -286,7 +307,7 @@ class PDFProcessor:
                 full_text=full_text.strip(),
                 sections=sections,
                 figures_text=figures_text,
-                metadata={"method": "pymupdf", "pages": len(doc)}
+                metadata={"method": "pymupdf", "pages": page_count}
             )
             
         except Exception as e:
@@ -295,20 +316,19 @@ class PDFProcessor:
                 error_message=f"PyMuPDF extraction failed: {e}"
             )
     
-    async def _extract_with_pypdf2(self, pdf_path: Path) -> ProcessingResult:
+    async def _extract_with_pypdf2(self, data: mmap.mmap) -> ProcessingResult:
         """Extract text using PyPDF2 (basic but reliable)."""
         import PyPDF2
         
         try:
             full_text = ""
             
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                for page_num, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text()
-                    if page_text:
-                        full_text += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
+            pdf_reader = PyPDF2.PdfReader(data)
+            
+            for page_num, page in enumerate(pdf_reader.pages):
+                page_text = page.extract_text()
+                if page_text:
+                    full_text += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
             
             # Parse sections
             sections = self._parse_sections(full_text)
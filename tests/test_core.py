@@ -11,7 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from core.config import ConfigManager, AppSettings
 from core.database import DatabaseManager
-from core.models import Paper, PaperType, SourceType
+from core.models import Paper, PaperType, SourceType, Embedding
 
 
 class TestConfiguration:
@@ -99,6 +99,84 @@ class TestModels:
         
         # Should clean up whitespace and remove empty strings
         assert paper.authors == ["Author One", "Author Two"]
+    
+    def test_paper_from_database_matches_validated(self):
+        """Test unvalidated construction matches the validated model."""
+        paper = Paper(
+            id="test-004",
+            title="Test Paper",
+            source=SourceType.PUBMED,
+            authors=["Author One"]
+        )
+        
+        rebuilt = Paper.from_database(paper.model_dump())
+        
+        assert rebuilt == paper
+        assert rebuilt.model_dump_json() == paper.model_dump_json()
+        rebuilt.title = "Renamed"
+        assert rebuilt.title == "Renamed"
+    
+    def test_lowercased_fields_cached(self):
+        """Test lowercased fields stay out of comparison and serialization."""
+        paper = Paper(
+            id="test-005",
+            title="Protein DESIGN",
+            journal="Nature",
+            source=SourceType.PUBMED
+        )
+        dumped = paper.model_dump()
+        
+        assert paper.title_lc == "protein design"
+        assert paper.title_lc is paper.title_lc
+        assert paper.abstract_lc == ""
+        assert paper.journal_lc == "nature"
+        assert paper.model_dump() == dumped
+        assert paper == Paper.from_database(dict(dumped))
+    
+    def test_embedding_stored_as_float32_array(self):
+        """Test Embedding keeps vectors as float32 arrays."""
+        import numpy as np
+        
+        from_list = Embedding(paper_id="p1", embedding=[0.1, 0.2, 0.3], model_version="m")
+        assert isinstance(from_list.embedding, np.ndarray)
+        assert from_list.embedding.dtype == np.float32
+        
+        array = np.arange(4, dtype=np.float32)
+        from_array = Embedding(paper_id="p1", embedding=array, model_version="m")
+        assert np.array_equal(from_array.embedding, array)
+        
+        with pytest.raises(ValueError):
+            Embedding(paper_id="p1", embedding=[], model_version="m")
+
+
+class TestEmbeddingSerialization:
+    """Test embedding BLOB encoding."""
+    
+    def test_int8_round_trip(self):
+        """Test quantized embeddings decode close to the original."""
+        import numpy as np
+        from core.repository import (
+            quantize_embedding, decode_embedding, INT8_VERSION_SUFFIX
+        )
+        
+        vector = np.random.default_rng(0).standard_normal(384).astype(np.float32)
+        blob = quantize_embedding(vector)
+        assert len(blob) == 4 + 384
+        
+        decoded, version = decode_embedding(blob, "model" + INT8_VERSION_SUFFIX)
+        assert version == "model"
+        assert decoded.dtype == np.float32
+        assert np.max(np.abs(decoded - vector)) <= np.abs(vector).max() / 127
+    
+    def test_legacy_float32_decode(self):
+        """Test rows written before quantization still decode."""
+        import numpy as np
+        from core.repository import decode_embedding
+        
+        vector = np.arange(8, dtype=np.float32)
+        decoded, version = decode_embedding(vector.tobytes(), "model")
+        assert version == "model"
+        assert np.array_equal(decoded, vector)
 
 
 if __name__ == "__main__":
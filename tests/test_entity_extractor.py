@@ -0,0 +1,64 @@
+"""Tests for entity extraction."""
+
+import pytest
+import sys
+from pathlib import Path
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+# The extractor imports the ML stack at module level
+pytest.importorskip("torch")
+pytest.importorskip("spacy")
+pytest.importorskip("sentence_transformers")
+
+from core.models import Paper, SourceType
+from core.repository import EntityRepository
+from processing.entity_extractor import EntityExtractor, _sentence_chunks
+
+
+class TestEntityExtractor:
+    """Test turning NER spans into entities."""
+    
+    def test_chunks_of_a_section_deduplicate_together(self):
+        """Test an entity repeated across full-text chunks is stored once per section."""
+        extractor = EntityExtractor(EntityRepository())
+        paper = Paper(id="paper-000", title="GFP design", source=SourceType.PUBMED)
+        texts = [
+            ("title", "GFP design"),
+            ("full_text", "GFP folds quickly. "),
+            ("full_text", "Mutants of GFP fold too."),
+        ]
+        spans = [
+            [("GFP", "PROTEIN", 0, 3, 0.9)],
+            [("GFP", "PROTEIN", 0, 3, 0.9)],
+            [("GFP", "PROTEIN", 11, 14, 0.9)],
+        ]
+        
+        entities = extractor._build_entities(paper, texts, spans)
+        
+        # Once for the title and once for the full text, at its first position
+        assert [entity.entity_text for entity in entities] == ["GFP", "GFP"]
+        assert [entity.start_position for entity in entities] == [0, 11]
+
+
+class TestSentenceChunks:
+    """Test the full-text split feeding NER, whose offsets rely on exact chunks."""
+    
+    @pytest.mark.parametrize("max_chars", [1, 7, 40, 200])
+    def test_chunks_rebuild_text_within_limit(self, max_chars):
+        """Test chunks concatenate to the text and never exceed max_chars."""
+        text = (
+            "Short one. Another sentence follows! "
+            + "A sentence far longer than the limit " * 8 + "ends here.\n\n"
+            + "New paragraph (with brackets.) Quote \"ends.\" \n\nLast"
+        )
+        
+        chunks = _sentence_chunks(text, max_chars)
+        
+        assert "".join(chunks) == text
+        assert all(0 < len(chunk) <= max_chars for chunk in chunks)
+    
+    def test_short_text_is_one_chunk(self):
+        """Test text within the limit comes back whole."""
+        assert _sentence_chunks("One sentence. Two.", 100) == ["One sentence. Two."]
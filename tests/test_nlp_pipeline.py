@@ -0,0 +1,72 @@
+"""Tests for the NLP pipeline's relevance scoring helpers."""
+
+import random
+
+import pytest
+import sys
+from pathlib import Path
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+# The pipeline imports the ML stack at module level
+pytest.importorskip("torch")
+pytest.importorskip("spacy")
+pytest.importorskip("sentence_transformers")
+
+import processing.nlp_pipeline as nlp_pipeline
+from processing.nlp_pipeline import PROTEIN_KEYWORDS, _build_keyword_counter
+
+KEYWORD_TEXTS = [
+    "",
+    "directed evolution of enzymes",
+    "evolution without direction",
+    "directed evolution",
+    "protein protein protein",
+    "cryo-em and nmr structure of an antibody-antigen complex",
+    "protéine désign: ωmega enzyme — modèle 結晶 structure",
+    "naïve variants, mutation-driven folding",
+    "nothing relevant here",
+]
+
+
+def substring_count(text: str) -> int:
+    """The baseline scorer: how many keywords occur in text."""
+    return sum(1 for keyword in PROTEIN_KEYWORDS if keyword in text)
+
+
+@pytest.fixture(params=["numba", "ahocorasick", "substring"])
+def keyword_counter(request, monkeypatch):
+    """A keyword counter built with one backend, skipped when it is not installed."""
+    backend = request.param
+    if backend == "numba" and not nlp_pipeline.NUMBA_AVAILABLE:
+        pytest.skip("numba is not installed")
+    if backend == "ahocorasick" and not nlp_pipeline.AHOCORASICK_AVAILABLE:
+        pytest.skip("pyahocorasick is not installed")
+    
+    monkeypatch.setattr(nlp_pipeline, "NUMBA_AVAILABLE", backend == "numba")
+    monkeypatch.setattr(nlp_pipeline, "AHOCORASICK_AVAILABLE", backend == "ahocorasick")
+    return _build_keyword_counter(PROTEIN_KEYWORDS)
+
+
+class TestKeywordCounter:
+    """Test every keyword counter backend against substring matching."""
+    
+    @pytest.mark.parametrize("text", KEYWORD_TEXTS)
+    def test_matches_substring_count(self, keyword_counter, text):
+        """Test fixed texts, including overlapping keywords, non-ASCII text and the empty string."""
+        assert keyword_counter(text) == substring_count(text)
+    
+    def test_overlapping_keywords_both_count(self, keyword_counter):
+        """Test a keyword inside a longer one counts as its own match."""
+        assert keyword_counter("directed evolution") == 2
+        assert keyword_counter("evolution") == 1
+    
+    def test_matches_substring_count_on_random_text(self, keyword_counter):
+        """Test random mixes of keyword fragments and non-ASCII characters."""
+        rng = random.Random(0)
+        pieces = [*PROTEIN_KEYWORDS, "direct", "evol", "ed ", " ", "-", "é", "ω", "結", "\n"]
+        pieces += [keyword[:rng.randint(1, len(keyword))] for keyword in PROTEIN_KEYWORDS]
+        for _ in range(500):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+            assert keyword_counter(text) == substring_count(text), text
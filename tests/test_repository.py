@@ -0,0 +1,544 @@
+"""Tests for the data access layer."""
+
+import pytest
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add src to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import core.repository as repository
+from core.config import config
+from core.database import DatabaseManager
+from core.schema import schema_manager
+from core.models import Paper, LazyPaper, SourceType, Entity, EntityType, Embedding
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point the repositories at a fresh SQLite database."""
+    monkeypatch.setattr(config.settings, "db_path", str(tmp_path / "literature.db"))
+    monkeypatch.setattr(config.settings, "analytics_db_path", str(tmp_path / "analytics.db"))
+    
+    manager = DatabaseManager()
+    with manager.get_sqlite_connection() as conn:
+        schema_manager.migrate_schema(conn)
+    
+    monkeypatch.setattr(repository, "db_manager", manager)
+    yield manager
+    manager.close_connections()
+
+
+def make_paper(index: int, **kwargs) -> Paper:
+    """Build a minimal paper for tests."""
+    fields = {
+        "id": f"paper-{index:03d}",
+        "title": f"Protein design paper {index}",
+        "abstract": "Directed evolution of enzymes.",
+        "doi": f"10.1000/test.{index}",
+        "source": SourceType.PUBMED,
+    }
+    fields.update(kwargs)
+    return Paper(**fields)
+
+
+class TestPaperRepository:
+    """Test paper data access."""
+    
+    def test_get_many_by_id_and_doi(self, temp_db):
+        """Test batched lookups return dicts and skip missing keys."""
+        repo = repository.PaperRepository()
+        for i in range(3):
+            repo.create(make_paper(i))
+        
+        by_id = repo.get_many_by_id(["paper-000", "paper-002", "missing"])
+        assert set(by_id) == {"paper-000", "paper-002"}
+        assert by_id["paper-002"].title == "Protein design paper 2"
+        
+        by_doi = repo.get_many_by_doi(["10.1000/test.1"])
+        assert by_doi["10.1000/test.1"].id == "paper-001"
+        
+        assert repo.get_many_by_id([]) == {}
+    
+    def test_get_many_by_id_chunks_large_lists(self, temp_db, monkeypatch):
+        """Test lookups spanning several IN-list chunks."""
+        monkeypatch.setattr(repository, "IN_CLAUSE_CHUNK_SIZE", 2)
+        repo = repository.PaperRepository()
+        for i in range(5):
+            repo.create(make_paper(i))
+        
+        ids = [f"paper-{i:03d}" for i in range(5)]
+        assert set(repo.get_many_by_id(ids)) == set(ids)
+    
+    def test_update_relevance_scores(self, temp_db):
+        """Test scores for many papers are written together."""
+        repo = repository.PaperRepository()
+        for i in range(3):
+            repo.create(make_paper(i))
+        
+        assert repo.update_relevance_scores({"paper-000": 0.25, "paper-002": 0.75}) == 2
+        
+        papers = repo.get_many_by_id(["paper-000", "paper-001", "paper-002"])
+        assert papers["paper-000"].relevance_score == 0.25
+        assert papers["paper-001"].relevance_score == make_paper(1).relevance_score
+        assert papers["paper-002"].relevance_score == 0.75
+        assert repo.update_relevance_scores({}) == 0
+    
+    def test_get_unprocessed_papers(self, temp_db):
+        """Test papers missing either stage come back once, limited together."""
+        import numpy as np
+        
+        repo = repository.PaperRepository()
+        for i in range(4):
+            repo.create(make_paper(i))
+        embedding_repo = repository.EmbeddingRepository()
+        for paper_id in ("paper-000", "paper-001"):
+            embedding_repo.create_or_update(
+                paper_id, {"document_average": np.ones(8, dtype=np.float32)}, "m"
+            )
+        repository.EntityRepository().create_entities([
+            Entity(paper_id=paper_id, entity_text="GFP",
+                   entity_type=EntityType.PROTEIN, confidence=0.9)
+            for paper_id in ("paper-000", "paper-000", "paper-002")
+        ])
+        
+        def ids(papers):
+            return [paper.id for paper in papers]
+        
+        assert ids(repo.get_unprocessed_papers()) == ["paper-001", "paper-002", "paper-003"]
+        assert ids(repo.get_unprocessed_papers(need_entities=False)) == ["paper-002", "paper-003"]
+        assert ids(repo.get_unprocessed_papers(need_embeddings=False)) == ["paper-001", "paper-003"]
+        assert ids(repo.get_unprocessed_papers(limit=2)) == ["paper-001", "paper-002"]
+        assert repo.get_unprocessed_papers(need_embeddings=False, need_entities=False) == []
+    
+    def test_bulk_update_mixed_columns(self, temp_db):
+        """Test updates with different column sets apply together and reindex text."""
+        repo = repository.PaperRepository()
+        for i in range(2):
+            repo.create(make_paper(i))
+        
+        assert repo.bulk_update([
+            ("paper-000", {"full_text": "Nanobody scaffolds", "relevance_score": 0.5}),
+            ("paper-001", {"relevance_score": 0.9}),
+        ]) == 2
+        
+        papers = repo.get_many_by_id(["paper-000", "paper-001"])
+        assert papers["paper-000"].full_text == "Nanobody scaffolds"
+        assert papers["paper-000"].relevance_score == 0.5
+        assert papers["paper-001"].relevance_score == 0.9
+        assert [paper.id for paper in repo.search("nanobody")] == ["paper-000"]
+        
+        with pytest.raises(ValueError):
+            repo.bulk_update([("paper-000", {"authors": "[]"})])
+    
+    def test_lazy_papers_parse_dates_on_access(self, temp_db):
+        """Test lazy results match eager ones once dates are read."""
+        repo = repository.PaperRepository()
+        repo.create(make_paper(0, publication_date=datetime(2024, 3, 1)))
+        
+        eager = repo.search("enzymes")[0]
+        lazy = repo.search("enzymes", lazy=True)[0]
+        
+        assert isinstance(lazy, LazyPaper)
+        assert "publication_date" not in lazy.__dict__
+        assert lazy.publication_date == datetime(2024, 3, 1)
+        assert lazy.model_dump() == eager.model_dump()
+    
+    def test_keyset_pages_cover_every_row_once(self, temp_db):
+        """Test paging with cursors matches one unpaged query."""
+        repo = repository.PaperRepository()
+        for i in range(7):
+            date = None if i % 3 == 0 else datetime(2024, 1, 1 + i % 2)
+            repo.create(make_paper(i, publication_date=date))
+        
+        for fetch_page in [
+            lambda limit, after: repo.search_page("enzymes", limit, after),
+            lambda limit, after: repo.get_recent_page(limit, after),
+            lambda limit, after: repo.get_by_source_page("pubmed", limit, after),
+        ]:
+            expected = [paper.id for paper in fetch_page(100, None)[0]]
+            ids, after = [], None
+            while True:
+                papers, after = fetch_page(3, after)
+                ids.extend(paper.id for paper in papers)
+                if after is None:
+                    break
+            assert len(expected) == 7
+            assert ids == expected
+        
+        dated = [paper.publication_date for paper in repo.get_by_source("pubmed", limit=7)]
+        assert dated[-3:] == [None, None, None]
+    
+    def test_bulk_ingest_indexes_new_rows(self, temp_db):
+        """Test bulk ingest keeps FTS in sync and restores the trigger."""
+        repo = repository.PaperRepository()
+        repo.create(make_paper(0, title="Existing enzyme study"))
+        
+        papers = [make_paper(i, title=f"Bulk antibody design {i}") for i in range(1, 4)]
+        assert repo.bulk_ingest(papers) == 3
+        
+        assert len(repo.search("antibody")) == 3
+        assert len(repo.search("enzyme")) == 1
+        
+        # Trigger is back in place for regular inserts
+        repo.create(make_paper(4, title="Single antibody insert"))
+        assert len(repo.search("antibody")) == 4
+    
+    def test_bulk_ingest_rolls_back_on_failure(self, temp_db):
+        """Test a failed bulk ingest leaves no rows and keeps the trigger."""
+        repo = repository.PaperRepository()
+        duplicate = [make_paper(1), make_paper(1)]
+        
+        with pytest.raises(Exception):
+            repo.bulk_ingest(duplicate)
+        
+        assert repo.get_many_by_id(["paper-001"]) == {}
+        repo.create(make_paper(2, title="Trigger still indexes"))
+        assert len(repo.search("indexes")) == 1
+
+    
+    def test_sort_queries_use_indexes(self, temp_db):
+        """Test get_by_source/get_recent sorts are served by an index."""
+        with temp_db.get_sqlite_connection() as conn:
+            for query, params in [
+                ("SELECT * FROM papers WHERE source = ? "
+                 "ORDER BY publication_date DESC LIMIT ?", ("pubmed", 10)),
+                ("SELECT * FROM papers ORDER BY created_at DESC LIMIT ?", (10,)),
+                ("SELECT * FROM papers WHERE source = ? AND publication_date <= ? "
+                 "AND (publication_date < ? OR rowid > ?) "
+                 "ORDER BY publication_date DESC, rowid LIMIT ?",
+                 ("pubmed", "2024", "2024", 1, 10)),
+                ("SELECT * FROM papers WHERE created_at <= ? "
+                 "AND (created_at < ? OR rowid > ?) "
+                 "ORDER BY created_at DESC, rowid LIMIT ?", ("2024", "2024", 1, 10)),
+            ]:
+                plan = " ".join(
+                    row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+                )
+                assert "TEMP B-TREE" not in plan
+
+    
+    def test_statistics_match_above_analytics_threshold(self, temp_db, monkeypatch):
+        """Test the DuckDB route (or its SQLite fallback) matches SQLite."""
+        repo = repository.PaperRepository()
+        for i in range(3):
+            repo.create(make_paper(i, source=SourceType.ARXIV if i else SourceType.PUBMED))
+        
+        expected = repo.get_statistics()
+        monkeypatch.setattr(repository, "ANALYTICS_ROW_THRESHOLD", 0)
+        
+        assert repo.get_statistics() == expected
+        assert expected["by_source"] == {"pubmed": 1, "arxiv": 2}
+
+
+class TestSchemaMigration:
+    """Test schema versioning."""
+    
+    def test_version_1_database_is_migrated(self, tmp_path):
+        """Test a version 1 database picks up every later index change."""
+        import sqlite3
+        
+        conn = sqlite3.connect(str(tmp_path / "v1.db"))
+        schema_manager.create_sqlite_schema(conn)
+        conn.execute("DROP INDEX idx_papers_source_pubdate")
+        conn.execute("DROP INDEX idx_papers_created_at")
+        conn.execute("CREATE INDEX idx_papers_doi ON papers(doi)")
+        assert schema_manager.get_schema_version(conn) == 1
+        
+        schema_manager.migrate_schema(conn)
+        
+        indexes = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index'"
+        )}
+        assert {"idx_papers_source_pubdate", "idx_papers_created_at"} <= indexes
+        assert "idx_papers_doi" not in indexes
+        assert schema_manager.get_schema_version(conn) == schema_manager.current_version
+        conn.close()
+    
+    def test_fts_follows_text_updates(self, temp_db):
+        """Test updating and deleting papers keeps full-text search consistent."""
+        repo = repository.PaperRepository()
+        repo.create(make_paper(0))
+        repo.update_full_text("paper-000", "Nanobody scaffolds")
+        
+        assert [paper.id for paper in repo.search("nanobody")] == ["paper-000"]
+        with temp_db.get_sqlite_connection() as conn:
+            conn.execute("INSERT INTO papers_fts(papers_fts) VALUES ('integrity-check')")
+            conn.execute("DELETE FROM papers WHERE id = 'paper-000'")
+            conn.commit()
+        assert repo.search("nanobody") == []
+    
+    def test_doi_lookup_uses_unique_autoindex(self, temp_db):
+        """Test DOI lookups are served by the UNIQUE constraint's index."""
+        with temp_db.get_sqlite_connection() as conn:
+            plan = " ".join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM papers WHERE doi = ?", ("10.1/x",)
+            ))
+        assert "sqlite_autoindex_papers" in plan
+
+
+class TestEntityRepository:
+    """Test entity data access."""
+    
+    def test_create_entities_stream_commits_in_batches(self, temp_db):
+        """Test streamed inserts yield running counts per batch."""
+        paper_repo = repository.PaperRepository()
+        paper_repo.create(make_paper(0))
+        
+        entities = (
+            Entity(paper_id="paper-000", entity_text=f"GFP{i}",
+                   entity_type=EntityType.PROTEIN, confidence=0.9)
+            for i in range(5)
+        )
+        entity_repo = repository.EntityRepository()
+        
+        assert list(entity_repo.create_entities_stream(entities, batch_size=2)) == [2, 4, 5]
+        assert len(entity_repo.get_by_paper("paper-000")) == 5
+    
+    def test_enum_members_stored_as_values(self, temp_db):
+        """Test enum members assigned after validation still store their value."""
+        repository.PaperRepository().create(make_paper(0))
+        entity = Entity(paper_id="paper-000", entity_text="Rosetta",
+                        entity_type=EntityType.METHOD, confidence=0.7)
+        entity.entity_type = EntityType.METHOD
+        
+        repository.EntityRepository().create_entities([entity])
+        
+        stored = repository.EntityRepository().get_by_type("method")
+        assert [e.entity_text for e in stored] == ["Rosetta"]
+    
+    def test_create_entities_assigns_ids(self, temp_db):
+        """Test generated IDs are back-filled onto the entities."""
+        repository.PaperRepository().create(make_paper(0))
+        entities = [
+            Entity(paper_id="paper-000", entity_text=text,
+                   entity_type=EntityType.PROTEIN, confidence=0.8)
+            for text in ("p53", "GFP", "Cas9")
+        ]
+        entity_repo = repository.EntityRepository()
+        
+        assert entity_repo.create_entities(entities) == 3
+        stored = {e.id: e.entity_text for e in entity_repo.get_by_paper("paper-000")}
+        assert {e.id: e.entity_text for e in entities} == stored
+    
+    def test_get_by_paper_ids_groups_entities(self, temp_db):
+        """Test batched entity lookups group rows by paper and skip papers without any."""
+        paper_repo = repository.PaperRepository()
+        for i in range(3):
+            paper_repo.create(make_paper(i))
+        
+        entity_repo = repository.EntityRepository()
+        entity_repo.create_entities([
+            Entity(paper_id="paper-000", entity_text="GFP", entity_type=EntityType.PROTEIN, confidence=0.6),
+            Entity(paper_id="paper-000", entity_text="TEV", entity_type=EntityType.PROTEIN, confidence=0.9),
+            Entity(paper_id="paper-002", entity_text="ATP", entity_type=EntityType.CHEMICAL, confidence=0.8),
+        ])
+        
+        found = entity_repo.get_by_paper_ids(["paper-000", "paper-001", "paper-002"])
+        
+        assert set(found) == {"paper-000", "paper-002"}
+        assert [e.entity_text for e in found["paper-000"]] == ["TEV", "GFP"]
+
+    def test_statistics_aggregate_in_sql(self, temp_db):
+        """Test entity statistics for one paper and across all papers."""
+        paper_repo = repository.PaperRepository()
+        for i in range(2):
+            paper_repo.create(make_paper(i))
+
+        entity_repo = repository.EntityRepository()
+        assert entity_repo.get_statistics("paper-000") == {
+            "total_entities": 0, "entities_by_type": {}, "avg_confidence": 0.0,
+        }
+
+        entity_repo.create_entities([
+            Entity(paper_id="paper-000", entity_text="GFP", entity_type=EntityType.PROTEIN, confidence=0.6),
+            Entity(paper_id="paper-000", entity_text="gfp", entity_type=EntityType.PROTEIN, confidence=0.8),
+            Entity(paper_id="paper-000", entity_text="ATP", entity_type=EntityType.CHEMICAL, confidence=1.0),
+            Entity(paper_id="paper-001", entity_text="TEV", entity_type=EntityType.PROTEIN, confidence=0.2),
+        ])
+
+        stats = entity_repo.get_statistics("paper-000")
+        assert stats["total_entities"] == 3
+        assert stats["entities_by_type"] == {"protein": 2, "chemical": 1}
+        assert stats["avg_confidence"] == pytest.approx(0.8)
+        assert stats["unique_entity_count"] == 2
+
+        overall = entity_repo.get_statistics()
+        assert overall["total_entities"] == 4
+        assert overall["unique_entity_count"] == 3
+
+
+class TestEmbeddingRepository:
+    """Test embedding data access."""
+    
+    def test_get_all_vectors_filters_by_model(self, temp_db):
+        """Test stored vectors come back as one matrix aligned with paper IDs."""
+        import numpy as np
+        
+        paper_repo = repository.PaperRepository()
+        embedding_repo = repository.EmbeddingRepository()
+        for i in range(3):
+            paper_repo.create(make_paper(i))
+            embedding_repo.create(Embedding(
+                paper_id=f"paper-{i:03d}",
+                embedding=np.full(8, i + 1, dtype=np.float32),
+                model_version="old" if i == 2 else "current"
+            ))
+        
+        paper_ids, matrix = embedding_repo.get_all_vectors("current")
+        
+        assert paper_ids == ["paper-000", "paper-001"]
+        assert matrix.shape == (2, 8) and matrix.dtype == np.float32
+        assert np.allclose(matrix[1], 2.0)
+        assert len(embedding_repo.get_all_vectors()[0]) == 3
+        assert embedding_repo.count_embeddings("current") == 2
+        assert embedding_repo.count_embeddings() == 3
+    
+    def test_get_by_paper_ids_chunks_and_skips_missing(self, temp_db, monkeypatch):
+        """Test batched embedding lookups across IN-list chunks."""
+        import numpy as np
+        
+        monkeypatch.setattr(repository, "IN_CLAUSE_CHUNK_SIZE", 2)
+        paper_repo = repository.PaperRepository()
+        embedding_repo = repository.EmbeddingRepository()
+        for i in range(3):
+            paper_repo.create(make_paper(i))
+            embedding_repo.create(Embedding(
+                paper_id=f"paper-{i:03d}",
+                embedding=np.full(8, i + 1, dtype=np.float32),
+                model_version="m"
+            ))
+        
+        found = embedding_repo.get_by_paper_ids(
+            ["paper-000", "paper-002", "paper-001", "missing", "paper-000"]
+        )
+        
+        assert set(found) == {"paper-000", "paper-001", "paper-002"}
+        assert np.allclose(found["paper-002"].embedding, 3.0)
+        assert found["paper-001"].model_version == "m"
+    
+    def test_create_or_update_stores_document_vector(self, temp_db):
+        """Test section embeddings store their document average, replacing old rows."""
+        import numpy as np
+        
+        repository.PaperRepository().create(make_paper(0))
+        embedding_repo = repository.EmbeddingRepository()
+        sections = {
+            "title": [np.ones(8, dtype=np.float32)],
+            "document": [np.full(8, 0.5, dtype=np.float32)],
+        }
+        
+        embedding_repo.create_or_update("paper-000", sections, "m")
+        assert np.allclose(embedding_repo.get_by_paper("paper-000").embedding, 0.5, atol=0.01)
+        
+        sections["document_average"] = np.full(8, -2.0, dtype=np.float32)
+        embedding_repo.create_or_update("paper-000", sections, "m")
+        
+        stored = embedding_repo.get_by_paper("paper-000")
+        assert np.allclose(stored.embedding, -2.0, atol=0.02)
+        assert stored.model_version == "m"
+        assert embedding_repo.count_embeddings() == 1
+    
+    @pytest.mark.asyncio
+    async def test_async_methods_run_on_executor(self, temp_db):
+        """Test async writes and prefetches go through pooled executor connections."""
+        import asyncio
+        import numpy as np
+        
+        paper_repo = repository.PaperRepository()
+        embedding_repo = repository.EmbeddingRepository()
+        for i in range(3):
+            paper_repo.create(make_paper(i))
+        
+        await asyncio.gather(*(
+            embedding_repo.create_or_update_async(
+                f"paper-{i:03d}", {"document_average": np.full(8, i + 1.0, dtype=np.float32)}, "m"
+            )
+            for i in range(3)
+        ))
+        found = await embedding_repo.get_by_paper_ids_async(["paper-000", "paper-002"])
+        
+        assert set(found) == {"paper-000", "paper-002"}
+        assert np.allclose(found["paper-002"].embedding, 3.0, atol=0.02)
+        assert embedding_repo.count_embeddings("m") == 3
+
+    
+    def test_token_cache_round_trip(self, temp_db):
+        """Test token ids are cached per tokenizer and returned as int32."""
+        import numpy as np
+        
+        embedding_repo = repository.EmbeddingRepository()
+        embedding_repo.store_token_ids({"h1": [101, 7, 102], "h2": np.array([101, 102])}, "tok-a")
+        
+        found = embedding_repo.get_token_ids(["h1", "h2", "h3", "h1"], "tok-a")
+        
+        assert set(found) == {"h1", "h2"}
+        assert found["h1"].dtype == np.int32
+        assert found["h1"].tolist() == [101, 7, 102]
+        assert embedding_repo.get_token_ids(["h1"], "tok-b") == {}
+    
+    def test_text_embedding_cache_round_trip(self, temp_db):
+        """Test text embeddings are cached per model and returned as float32."""
+        import numpy as np
+        
+        embedding_repo = repository.EmbeddingRepository()
+        embedding_repo.store_text_embeddings({
+            "h1": np.array([0.5, -1.0, 2.0]),
+            "h2": np.ones(3, dtype=np.float32)
+        }, "model-a")
+        
+        found = embedding_repo.get_text_embeddings(["h1", "h2", "h3", "h1"], "model-a")
+        
+        assert set(found) == {"h1", "h2"}
+        assert found["h1"].dtype == np.float32
+        assert found["h1"].tolist() == [0.5, -1.0, 2.0]
+        assert embedding_repo.get_text_embeddings(["h1"], "model-b") == {}
+    
+    def test_section_embeddings_round_trip(self, temp_db):
+        """Test section vectors of mixed dimensions come back from the binary column."""
+        import numpy as np
+        
+        repository.PaperRepository().create(make_paper(0))
+        embedding_repo = repository.EmbeddingRepository()
+        chunks = [np.full(4, i, dtype=np.float32) for i in range(3)]
+        embedding_repo.create_or_update("paper-000", {
+            "title": [np.ones(8, dtype=np.float32)],
+            "full_text": chunks,
+            "document_average": np.full(8, 0.25, dtype=np.float32),
+        }, "m")
+        
+        sections = embedding_repo.get_section_embeddings("paper-000")
+        
+        assert set(sections) == {"title", "full_text", "document_average"}
+        assert sections["full_text"].shape == (3, 4)
+        assert np.array_equal(sections["full_text"][2], chunks[2])
+        assert np.allclose(sections["document_average"], 0.25)
+        assert embedding_repo.get_section_embeddings("missing") == {}
+    
+    def test_embedding_fingerprint(self, temp_db):
+        """Test the fingerprint counts one model version's rows and changes on every write."""
+        import numpy as np
+        
+        paper_repo = repository.PaperRepository()
+        embedding_repo = repository.EmbeddingRepository()
+        assert embedding_repo.get_embedding_fingerprint("m") == (0, 0)
+        
+        def store(paper_id, model_version="m"):
+            embedding_repo.create_or_update(paper_id, {
+                "document_average": np.ones(4, dtype=np.float32)
+            }, model_version)
+        
+        for i in range(3):
+            paper_repo.create(make_paper(i))
+        store("paper-000")
+        store("paper-001")
+        store("paper-002", "other")
+        assert embedding_repo.get_embedding_fingerprint("m") == (2, 3)
+        
+        # Re-embedding within the same second keeps the count but not the fingerprint
+        store("paper-000")
+        assert embedding_repo.get_embedding_fingerprint("m") == (2, 4)
+
+if __name__ == "__main__":
+    pytest.main([__file__])